@@ -0,0 +1,78 @@
+from __future__ import annotations
+"""Profiling diagnostics (/diag/profile, /diag/slow-requests).
+
+Mounted only when PROFILER_ENABLED=1 and always behind bearer auth: stacks expose code
+structure. Collapsed output is one ``frame;frame;frame count`` line per stack, ready for
+flamegraph.pl or speedscope.
+"""
+import time
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.profiler import get_slow_request_recorder, profiler
+from app.core.security import get_current_user
+
+router = APIRouter(prefix="/diag", tags=["diag"], dependencies=[Depends(get_current_user)])
+
+
+def _profile_result(format: str) -> Any:
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    return {**profiler.status(), "stacks": dict(profiler.stacks.most_common())}
+
+
+@router.post("/profile/start", status_code=202, summary="Start the sampling profiler")
+def profile_start(
+    seconds: float = Query(10.0, gt=0, description="Sampling duration"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Time between samples"),
+) -> Dict[str, Any]:
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(status_code=400, detail={"error": {"code": "PROFILE_TOO_LONG", "message": f"seconds must be <= {settings.profiler_max_seconds}"}})
+    if not profiler.start(seconds, interval_ms / 1000.0):
+        raise HTTPException(status_code=409, detail={"error": {"code": "PROFILE_RUNNING", "message": "A profiling run is already in progress"}})
+    return profiler.status()
+
+
+@router.post("/profile/stop", summary="Stop the sampling profiler and return its result")
+def profile_stop(format: str = Query("collapsed", pattern="^(collapsed|json)$")) -> Any:
+    profiler.stop()
+    return _profile_result(format)
+
+
+@router.get("/profile", summary="Result of the current or last profiling run")
+def profile_result(
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    wait: bool = Query(False, description="Block until a running profile finishes"),
+) -> Any:
+    if wait:
+        deadline = time.monotonic() + settings.profiler_max_seconds
+        while profiler.running and time.monotonic() < deadline:
+            time.sleep(0.05)
+    return _profile_result(format)
+
+
+def _recorder():
+    recorder = get_slow_request_recorder()
+    if recorder is None:
+        raise HTTPException(status_code=404, detail={"error": {"code": "SLOW_REQUESTS_DISABLED", "message": "Set SLOW_REQUEST_THRESHOLD_MS to record slow requests"}})
+    return recorder
+
+
+@router.get("/slow-requests", summary="Recently recorded slow requests (newest first)")
+def slow_requests_list() -> Dict[str, Any]:
+    recorder = _recorder()
+    return {"threshold_ms": recorder.threshold * 1000, "items": recorder.list()}
+
+
+@router.get("/slow-requests/{request_id}", summary="Stack samples of one slow request")
+def slow_request_detail(request_id: str, format: str = Query("json", pattern="^(collapsed|json)$")) -> Any:
+    entry = _recorder().get(request_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail={"error": {"code": "SLOW_REQUEST_NOT_FOUND", "message": "No slow request recorded with this id"}})
+    if format == "collapsed":
+        return PlainTextResponse("".join(f"{thread};{stack} 1\n" for thread, stack in entry["stacks"].items()))
+    return entry
+
+
+__all__ = ["router"]
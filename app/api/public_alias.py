@@ -17,18 +17,23 @@ from pydantic import BaseModel
 from typing import List, Optional
 import hashlib
 from app.core.config import get_settings
-from app.database.database import get_session
+from app.database.database import get_session, prefix_filter
 from app.database.models import FileORM, SummaryORM
-from app.services.webdav_client import get_file_content, write_file_content, list_dir, mkdirs
+from app.services.webdav_client import get_file_checksum, get_file_content, get_file_head, write_file_content, list_dir, mkdirs
+from app.services import summary_store
+from concurrent.futures import ThreadPoolExecutor, wait
 from app.api.v1.files import _entry_rel_path  # type: ignore  # internal helper reuse
 from app.core import metrics
-from collections import deque
+from app.core.gcra import GCRALimiter, Rate
+from app.core.timing import bind
+from app.core.response_cache import cached_json, file_tag, response_cache
+from app.services.summary_previews import list_previews
+from app.services.auto_summary import get_executor as get_auto_summary_executor
+from app.services import content_hash_index
 from pathlib import Path
 import time
-import threading
 import time
 from app.core.metrics import auto_summary_total, auto_summary_duration_seconds
-from typing import Deque, Dict
 
 router = APIRouter()
 log = logging.getLogger("public_alias")
@@ -68,6 +73,63 @@ def _read_text_webdav(rel_path: str) -> str:
     except Exception:
         return ""
 
+SUMMARY_PREVIEW_CHARS = 300
+_SUMMARY_SUFFIX = ".summary.md"
+
+
+def _cached_summary_head(name: str) -> str | None:
+    if not name.endswith(_SUMMARY_SUFFIX):
+        return None
+    try:
+        return summary_store.read_cached(name, SUMMARY_PREVIEW_CHARS)
+    except Exception:
+        return None
+
+
+def _list_summary_cache(suffix: str = _SUMMARY_SUFFIX) -> list[str]:
+    try:
+        return summary_store.list_cached(suffix)
+    except Exception:
+        return []
+
+
+def _read_head_webdav(rel_path: str, timeout: float) -> str:
+    try:
+        # UTF-8 needs at most 4 bytes per character
+        return get_file_head(rel_path, SUMMARY_PREVIEW_CHARS * 4, timeout=timeout)[:SUMMARY_PREVIEW_CHARS]
+    except Exception:
+        return ""
+
+
+def _summary_previews(dir_path: str, names: list[str]) -> list[dict[str, str]]:
+    """Leading text of each summary: local cache first, then concurrent Range GETs.
+
+    WebDAV reads run on at most SUMMARIES_FALLBACK_CONCURRENCY threads; whatever has not
+    finished after SUMMARIES_FALLBACK_DEADLINE_SECONDS is left out of the response.
+    """
+    settings = get_settings()
+    heads: dict[str, str] = {}
+    missing: list[str] = []
+    for name in names:
+        cached = _cached_summary_head(name)
+        if cached is not None:
+            heads[name] = cached
+        else:
+            missing.append(name)
+    if missing:
+        deadline = max(0.1, settings.summaries_fallback_deadline_seconds)
+        pool = ThreadPoolExecutor(max_workers=max(1, min(settings.summaries_fallback_concurrency, len(missing))),
+                                  thread_name_prefix="summary-fetch")
+        # bind() per task: each worker gets its own copy of the request context
+        futures = {pool.submit(bind(_read_head_webdav), f"{dir_path}/{name}", deadline): name for name in missing}
+        done, not_done = wait(futures, timeout=deadline)
+        pool.shutdown(wait=False, cancel_futures=True)
+        for fut in done:
+            heads[futures[fut]] = fut.result()
+        if not_done:
+            log.warning("summaries_fallback_deadline", extra={"fetched": len(done), "dropped": len(not_done)})
+    return [{"name": name, "content": heads[name]} for name in names if heads.get(name)]
+
 # Local fallback root used when WebDAV operations fail (see write-file route)
 LOCAL_FALLBACK_ROOT = Path("public_fallback")
 
@@ -136,10 +198,15 @@ class AllSummariesResponse(BaseModel):
     operation_id="listFiles",
     description="Returns up to 500 newest file names for the given kind (entries|summaries)."
 )
-def public_list_files(kind: str):
-    settings = get_settings()
+def public_list_files(request: Request, kind: str):
     if kind not in ("entries", "summaries"):
         raise HTTPException(status_code=400, detail="invalid kind")
+    # Cached serialized body + ETag; dropped by writes of this kind (see public_write_file)
+    return cached_json(request, (kind,), lambda: _list_files(kind))
+
+
+def _list_files(kind: str) -> FileListResponse:
+    settings = get_settings()
     files: list[str] = []
     degraded = False
     db_rows = 0
@@ -147,28 +214,17 @@ def public_list_files(kind: str):
     try:
         with get_session() as s:  # type: ignore[assignment]
             if kind == "entries":
-                like_prefix = f"{settings.inbox_dir}/%"
                 entry_rows = (s.query(FileORM)
-                              .filter(FileORM.storage_path.like(like_prefix))
+                              .filter(prefix_filter(FileORM.storage_path, f"{settings.inbox_dir}/", s.get_bind().dialect.name))
                               .order_by(FileORM.id.desc())
                               .limit(500)
                               .all())
                 db_rows = len(entry_rows)
                 files.extend([r.original_name for r in entry_rows])
             else:
-                summary_rows = (s.query(SummaryORM)
-                                .order_by(SummaryORM.id.desc())
-                                .limit(500)
-                                .all())
+                summary_rows = list_previews(s, 500)
                 db_rows = len(summary_rows)
-                file_ids = {r.file_id for r in summary_rows if r.file_id}
-                file_map: dict[int, str] = {}
-                if file_ids:
-                    for fr in s.query(FileORM).filter(FileORM.id.in_(file_ids)).all():  # type: ignore[arg-type]
-                        file_map[fr.id] = fr.original_name
-                for r in summary_rows:
-                    name = file_map.get(r.file_id, f"summary_{r.id}") if r.file_id is not None else f"summary_{r.id}"
-                    files.append(name)
+                files.extend(r.name for r in summary_rows)
     except Exception as exc:  # pragma: no cover
         degraded = True
         log.warning("public_list_files_degraded_db", extra={"kind": kind, "error": str(exc)})
@@ -195,6 +251,8 @@ def public_list_files(kind: str):
             log.warning("public_list_files_webdav_fallback_failed", extra={"error": str(exc)})
     if not files:
         lf = _list_local_fallback(kind)
+        if kind == "summaries":  # written summaries are in the store cache, their upload may still be queued
+            lf += [n for n in _list_summary_cache("") if n not in lf]
         if lf:
             files = lf
     try:
@@ -211,22 +269,28 @@ def public_list_files(kind: str):
     tags=["public"],
     summary="Read a stored file (entry or summary)",
     operation_id="readFile",
-    description="Reads full text content (no 304 shortcut if unchanged in this simplified fallback)."
+    description="Reads full text content. Sends an ETag; If-None-Match with the current ETag returns 304."
 )
-def public_read_file(name: str, kind: str = "entries"):
-    settings = get_settings()
+def public_read_file(request: Request, name: str, kind: str = "entries"):
     if kind not in ("entries", "summaries"):
         raise HTTPException(status_code=400, detail="invalid kind")
+    # Strong ETag over the serialized body for WebDAV and local-fallback reads alike
+    return cached_json(request, (file_tag(kind, name),), lambda: _read_file(name, kind))
+
+
+def _read_file(name: str, kind: str) -> ReadFileResponse:
+    settings = get_settings()
     if kind == "entries":
         rel_path = _entry_rel_path(name)
     else:
         safe = name.replace('..', '_').lstrip('/')
         rel_path = f"{settings.summaries_dir}/{safe}" if settings.summaries_dir else safe
     content = None
+    if kind == "summaries":  # the local cache has summaries whose upload is still pending
+        content = summary_store.read_cached(name.replace('..', '_').lstrip('/'))
     webdav_disabled = os.getenv("WEBDAV_DISABLED", "").lower() in {"1", "true", "yes"}
-    etag: str | None = None
     attempted_remote = False
-    if not webdav_disabled:
+    if content is None and not webdav_disabled:
         try:
             content = get_file_content(rel_path)
             attempted_remote = True
@@ -239,17 +303,6 @@ def public_read_file(name: str, kind: str = "entries"):
         fallback_file = LOCAL_FALLBACK_ROOT / ("entries" if kind == "entries" else "summaries") / name
         if fallback_file.exists():
             content = fallback_file.read_text(encoding="utf-8", errors="replace")
-            etag = hashlib.sha256(content.encode('utf-8')).hexdigest()
-            if response is not None:
-                response.headers['ETag'] = f'"{etag}"'
-                response.headers['Cache-Control'] = 'private, max-age=30'
-            # Conditional match check (only if remote was attempted or webdav disabled)
-            inm = request.headers.get('if-none-match') if request else None  # type: ignore[union-attr]
-            cache_bust = request.query_params.get('cb') if request else None  # type: ignore[union-attr]
-            if not cache_bust and inm and etag and inm.strip('"') == etag:
-                if response is not None:
-                    response.status_code = 304
-                return ReadFileResponse(name=name, kind=kind, content="")
         else:
             # Nothing found anywhere
             if attempted_remote:
@@ -262,6 +315,65 @@ def public_read_file(name: str, kind: str = "entries"):
         pass
     return out
 
+# Background auto-summary generation (heuristic or OpenAI depending on config); runs on
+# the bounded executor of app.services.auto_summary
+def _bg_generate_summary(file_id: int | None, original_name: str, content: str, storage: str = "unknown"):  # pragma: no cover - non-deterministic timing
+    t0 = time.perf_counter()
+    try:
+        log.info("auto_summary_start", extra={"file": original_name, "storage": storage})
+    except Exception:
+        pass
+    try:
+        from app.services.summarizer import summarize_text
+        res = summarize_text(content, file_name=original_name, source="public_write")
+        summary_text = res.summary
+        # Persist DB row if file_id available
+        if file_id is not None:
+            try:
+                with get_session() as s:  # type: ignore[assignment]
+                    s.add(SummaryORM(file_id=file_id, summary_text=summary_text))  # type: ignore[arg-type]
+            except Exception as exc_db:  # pragma: no cover
+                log.warning("auto_summary_db_fail", extra={"error": str(exc_db)})
+        # Write summary artifact to summaries_dir if configured
+        wrote_storage = storage
+        try:
+            settings_local = get_settings()
+            summary_name = f"{original_name}.summary.md"
+            if settings_local.summaries_dir:
+                try:
+                    # Local cache now (visible to /query at once), Nextcloud via write-behind
+                    wrote_storage = "webdav" if summary_store.write(summary_name, summary_text) == "sync" else "cache"
+                except Exception as webdav_exc:  # pragma: no cover
+                    # local fallback
+                    try:
+                        fb_root = LOCAL_FALLBACK_ROOT / "summaries"
+                        fb_root.mkdir(parents=True, exist_ok=True)
+                        (fb_root / summary_name).write_text(summary_text, encoding="utf-8")
+                        wrote_storage = "local-fallback"
+                        log.warning("auto_summary_local_fallback", extra={"file": summary_name, "reason": str(webdav_exc)})
+                    except Exception:
+                        pass
+        except Exception as exc_any:  # pragma: no cover
+            log.warning("auto_summary_write_fail", extra={"error": str(exc_any)})
+        # Metrics success
+        try:
+            auto_summary_total.labels(status="ok", storage=wrote_storage or storage).inc()
+            auto_summary_duration_seconds.observe(time.perf_counter() - t0)
+        except Exception:  # pragma: no cover
+            pass
+        try:
+            log.info("public_write_file_summary_created", extra={"file": original_name, "model": res.model, "chars": len(summary_text), "storage": wrote_storage})
+        except Exception:
+            pass
+    except Exception as exc:  # pragma: no cover
+        try:
+            auto_summary_total.labels(status="error", storage=storage).inc()
+            auto_summary_duration_seconds.observe(time.perf_counter() - t0)
+        except Exception:  # pragma: no cover
+            pass
+        log.warning("auto_summary_failed", extra={"error": str(exc), "file": original_name, "storage": storage})
+
+
 @router.post("/write-file")
 @router.post(
     "/write-file/",
@@ -275,40 +387,31 @@ def public_write_file(body: WriteFileRequest, request: Request, response: Respon
     settings = get_settings()
     if not settings.public_write_enabled:
         raise HTTPException(status_code=403, detail="public write disabled")
-    # Per-app, per-IP minute window limiter using app.state
+    # Per-app, per-IP GCRA limiter (same engine as the global middleware) on app.state
     if settings.public_writefile_limit_per_minute > 0:
-        store_existing = getattr(request.app.state, 'public_write_buckets', None)  # type: ignore[attr-defined]
-        if store_existing is None:
-            store: Dict[str, Deque[float]] = {}
-            setattr(request.app.state, 'public_write_buckets', store)  # type: ignore[attr-defined]
-        else:
-            store = store_existing  # type: ignore[assignment]
+        limiter = getattr(request.app.state, 'public_write_limiter', None)  # type: ignore[attr-defined]
+        if limiter is None:
+            limiter = GCRALimiter(max_keys=settings.rate_limit_max_keys)
+            setattr(request.app.state, 'public_write_limiter', limiter)  # type: ignore[attr-defined]
         ip = request.client.host if request.client else 'unknown'
-        existing_dq = store.get(ip)
-        if existing_dq is None:
-            store[ip] = deque()
-            existing_dq = store[ip]
-        dq = existing_dq  # Deque[float]
-        now = time.time()
-        while dq and now - dq[0] > 60:
-            dq.popleft()
-        if len(dq) >= settings.public_writefile_limit_per_minute:
+        rate = Rate(settings.public_writefile_limit_per_minute, 60.0)
+        allowed, remaining, _, _ = limiter.hit(ip, rate)
+        used = rate.limit - remaining
+        if not allowed:
             try:
                 metrics.write_file_errors_total.inc()
             except Exception:
                 pass
-            log.info("public_write_file_rate_limited", extra={"ip": ip, "count": len(dq)})
+            log.info("public_write_file_rate_limited", extra={"ip": ip, "count": used})
             raise HTTPException(status_code=429, detail='public write limit reached')
-        # record this request
-        dq.append(float(now))
         try:
             metrics.write_file_total.inc()
         except Exception:
             pass
         try:
-            response.headers['X-Public-Write-Count'] = str(len(dq))
+            response.headers['X-Public-Write-Count'] = str(used)
             response.headers['X-Public-Write-Limit'] = str(settings.public_writefile_limit_per_minute)
-            response.headers['X-Public-Write-IPs'] = str(len(store))
+            response.headers['X-Public-Write-IPs'] = str(len(limiter))
         except Exception:
             pass
     if body.kind not in ("entries", "summaries"):
@@ -333,18 +436,43 @@ def public_write_file(body: WriteFileRequest, request: Request, response: Respon
                 mkdirs(parent)
         except Exception:
             pass
-    existing_content = None
-    try:
-        existing_content = get_file_content(rel_path)
-    except Exception:
-        existing_content = None
+    # Dedup against the stored content hash instead of downloading the current body:
+    # entries carry FileORM.sha256, summaries the checksum the server kept from our PUT.
+    # A matching entry hash is confirmed against the server checksum: the file may have
+    # been archived, overwritten or deleted without touching its row.
+    digest = hashlib.sha256(content_bytes).hexdigest()
+    known_sha: Optional[str] = None
+    file_record_id: Optional[int] = None
+    if body.kind == "entries":
+        try:
+            with get_session() as s:  # type: ignore[assignment]
+                row = s.query(FileORM.id, FileORM.sha256).filter(FileORM.storage_path == rel_path).first()  # type: ignore[attr-defined]
+                if row is not None:
+                    file_record_id, known_sha = row.id, row.sha256
+        except Exception as db_exc:  # pragma: no cover
+            log.warning("public_write_file_db_skip", extra={"error": str(db_exc)})
+        if known_sha == digest:
+            try:
+                known_sha = get_file_checksum(rel_path)
+            except Exception:
+                known_sha = None
+    else:
+        try:
+            # While a write-behind upload of this summary is queued the server checksum is stale
+            known_sha = None if summary_store.upload_pending(safe) else get_file_checksum(rel_path)
+        except Exception:
+            known_sha = None
     status = "saved"
     storage_mode = "webdav"
     try:
-        if existing_content is not None and existing_content == body.content:
+        if known_sha == digest:
             status = "unchanged"
+        elif body.kind == "summaries":
+            # Through the store: it orders this write after a running upload of older text
+            if summary_store.write(safe, body.content) != "sync":
+                storage_mode = "cache"  # Nextcloud upload queued
         else:
-            write_file_content(rel_path, body.content)
+            write_file_content(rel_path, body.content, sha256=digest)
     except Exception as exc:  # pragma: no cover
         try:
             fallback_root = Path("public_fallback") / ("entries" if body.kind == "entries" else "summaries")
@@ -356,12 +484,18 @@ def public_write_file(body: WriteFileRequest, request: Request, response: Respon
             log.warning("public_write_file_fallback", extra={"path": str(local_path), "reason": str(exc)})
         except Exception as exc2:
             raise HTTPException(status_code=502, detail=f"write failed: {exc2}")
-    file_record_id: Optional[int] = None
-    if body.kind == "entries" and storage_mode != "local-fallback":
+    if body.kind == "summaries" and status == "unchanged":
+        summary_store.cache_put(safe, body.content)  # Nextcloud has it; /query reads the cache
+    if body.kind == "entries" and storage_mode != "local-fallback" and status != "unchanged":
         try:
             with get_session() as s:  # type: ignore[assignment]
                 existing = s.query(FileORM).filter(FileORM.storage_path == rel_path).first()  # type: ignore[attr-defined]
                 if existing:
+                    if existing.sha256 and existing.sha256 != digest:  # old content is gone from this file
+                        content_hash_index.release(s, existing.sha256, existing.id)
+                    # Keep the hash current: it is the dedup reference for the next write
+                    existing.sha256 = digest
+                    existing.size_bytes = len(content_bytes)
                     file_record_id = existing.id
                 else:
                     f = FileORM(
@@ -369,82 +503,30 @@ def public_write_file(body: WriteFileRequest, request: Request, response: Respon
                         storage_path=rel_path,
                         mime_type="text/plain",
                         size_bytes=len(content_bytes),
-                        sha256=hashlib.sha256(content_bytes).hexdigest(),
+                        sha256=digest,
                     )
                     s.add(f)
                     s.flush()  # assign id
                     file_record_id = f.id
+                content_hash_index.register(s, digest, file_record_id, len(content_bytes))
         except Exception as db_exc:  # pragma: no cover
             log.warning("public_write_file_db_skip", extra={"error": str(db_exc)})
 
-    # Background auto-summary generation (heuristic or OpenAI depending on config)
-    def _bg_generate_summary(file_id: int | None, original_name: str, content: str, storage: str = "unknown"):  # pragma: no cover - non-deterministic timing
-        t0 = time.perf_counter()
-        try:
-            log.info("auto_summary_start", extra={"file": original_name, "storage": storage})
-        except Exception:
-            pass
-        try:
-            from app.services.summarizer import summarize_text
-            res = summarize_text(content, file_name=original_name, source="public_write")
-            summary_text = res.summary
-            # Persist DB row if file_id available
-            if file_id is not None:
-                try:
-                    with get_session() as s:  # type: ignore[assignment]
-                        s.add(SummaryORM(file_id=file_id, summary_text=summary_text))  # type: ignore[arg-type]
-                except Exception as exc_db:  # pragma: no cover
-                    log.warning("auto_summary_db_fail", extra={"error": str(exc_db)})
-            # Write summary artifact to summaries_dir if configured
-            wrote_storage = storage
-            try:
-                settings_local = get_settings()
-                summary_name = f"{original_name}.summary.md"
-                if settings_local.summaries_dir:
-                    summary_rel = f"{settings_local.summaries_dir}/{summary_name}"
-                    try:
-                        write_file_content(summary_rel, summary_text)
-                        wrote_storage = "webdav"
-                    except Exception as webdav_exc:  # pragma: no cover
-                        # local fallback
-                        try:
-                            fb_root = LOCAL_FALLBACK_ROOT / "summaries"
-                            fb_root.mkdir(parents=True, exist_ok=True)
-                            (fb_root / summary_name).write_text(summary_text, encoding="utf-8")
-                            wrote_storage = "local-fallback"
-                            log.warning("auto_summary_local_fallback", extra={"file": summary_name, "reason": str(webdav_exc)})
-                        except Exception:
-                            pass
-            except Exception as exc_any:  # pragma: no cover
-                log.warning("auto_summary_write_fail", extra={"error": str(exc_any)})
-            # Metrics success
-            try:
-                auto_summary_total.labels(status="ok", storage=wrote_storage or storage).inc()
-                auto_summary_duration_seconds.observe(time.perf_counter() - t0)
-            except Exception:  # pragma: no cover
-                pass
-            try:
-                log.info("public_write_file_summary_created", extra={"file": original_name, "model": res.model, "chars": len(summary_text), "storage": wrote_storage})
-            except Exception:
-                pass
-        except Exception as exc:  # pragma: no cover
-            try:
-                auto_summary_total.labels(status="error", storage=storage).inc()
-                auto_summary_duration_seconds.observe(time.perf_counter() - t0)
-            except Exception:  # pragma: no cover
-                pass
-            log.warning("auto_summary_failed", extra={"error": str(exc), "file": original_name, "storage": storage})
+    if status != "unchanged":
+        # Listing of this kind and cached reads of this file are stale now
+        response_cache.invalidate(body.kind, file_tag(body.kind, body.name))
 
-    # Spawn thread only if this was a real save (not unchanged) and we have entry content
+    # Queue a summary only if this was a real save (not unchanged) and we have entry content.
+    # Pending jobs are keyed by path: rewriting a file before its summary ran replaces the job.
     if body.kind == "entries" and status != "unchanged":
         try:
-            # type: ignore[arg-type] - dynamic logging extras fine
-            log.info("public_write_file_summary_thread_start", extra={"file": body.name, "file_id": file_record_id})
-            threading.Thread(target=_bg_generate_summary, args=(file_record_id, body.name, body.content, storage_mode), daemon=True).start()
+            # bind(): spans of the background summary are attributed to this request id
+            queued = get_auto_summary_executor().submit(rel_path, bind(_bg_generate_summary), file_record_id, body.name, body.content, storage_mode)
+            response.headers['X-Auto-Summary'] = queued
+            log.info("public_write_file_summary_submitted", extra={"file": body.name, "file_id": file_record_id, "result": queued})
         except Exception:  # pragma: no cover
             pass
-    etag = hashlib.sha256(body.content.encode('utf-8')).hexdigest()
-    response.headers['ETag'] = f'"{etag}"'
+    response.headers['ETag'] = f'"{digest}"'
     response.headers['X-Deduplicated'] = 'true' if status == 'unchanged' else 'false'
     response.headers['Cache-Control'] = 'no-cache'
     response.headers['X-Storage'] = storage_mode
@@ -465,11 +547,16 @@ def public_write_file(body: WriteFileRequest, request: Request, response: Respon
     operation_id="getAllSummaries",
     description="DB-first with WebDAV fallback. Always 200. Capped via MAX_SUMMARIES."
 )
-def get_all_summaries():  # type: ignore[override]
+def get_all_summaries(request: Request):
+    return cached_json(request, ("summaries",), _all_summaries)
+
+
+def _all_summaries() -> AllSummariesResponse:
     """Defensive summaries endpoint.
 
     1) Try dynamic db.list_summaries() if provided (returns iterable of dict-like) else ORM fallback.
-    2) If empty/error -> WebDAV fallback.
+    2) If empty/error -> WebDAV fallback: local summary cache first, then concurrent Range
+       reads of the leading bytes under an overall deadline.
     3) Always 200; never raises.
     4) Truncates each summary text to 300 chars and caps total items by MAX_SUMMARIES.
     """
@@ -486,43 +573,27 @@ def get_all_summaries():  # type: ignore[override]
     except Exception:
         log.exception("db_list_summaries_failed")
 
-    # ORM fallback
+    # ORM fallback: one read of the precomputed preview rows (name + first 300 chars)
     try:
         with get_session() as s:  # type: ignore[assignment]
-            rows = (s.query(SummaryORM)  # type: ignore[attr-defined]
-                    .order_by(SummaryORM.id.desc())  # type: ignore[attr-defined]
-                    .limit(MAX_SUMMARIES)
-                    .all())
-            file_ids = {r.file_id for r in rows if r.file_id}  # type: ignore[misc]
-            file_map: dict[int, str] = {}
-            if file_ids:
-                for fr in s.query(FileORM).filter(FileORM.id.in_(file_ids)).all():  # type: ignore[arg-type]
-                    file_map[fr.id] = fr.original_name  # type: ignore[attr-defined]
-            summaries: list[dict[str, str]] = []
-            for r in rows:  # type: ignore[misc]
-                name = file_map.get(r.file_id, f"summary_{r.id}") if r.file_id is not None else f"summary_{r.id}"
-                summaries.append({"name": name, "content": r.summary_text[:300]})
-            if summaries:
-                return AllSummariesResponse(summaries=[SummaryItem(name=s["name"], content=s["content"]) for s in summaries[:MAX_SUMMARIES]])
+            rows = list_previews(s, MAX_SUMMARIES)
+        if rows:
+            return AllSummariesResponse(summaries=[SummaryItem(name=r.name, content=r.preview) for r in rows])
     except Exception:
         log.exception("orm_list_summaries_failed")
 
-    # 2) WebDAV fallback
+    # 2) WebDAV fallback (local summary cache when the listing is unavailable)
     settings = get_settings()
-    names = _list_files_webdav(settings.summaries_dir)
-    out: list[dict[str, str]] = []
-    for name in names[:MAX_SUMMARIES]:
-        text = _read_text_webdav(f"{settings.summaries_dir}/{name}")
-        if text:
-            out.append({"name": name, "content": text[:300]})
+    names = _list_files_webdav(settings.summaries_dir) or _list_summary_cache()
+    out = _summary_previews(settings.summaries_dir, names[:MAX_SUMMARIES])
     return AllSummariesResponse(summaries=[SummaryItem(name=s["name"], content=s["content"]) for s in out])
 
-# Backward compatibility alias for older test name
-public_get_all_summaries = get_all_summaries
+# Backward compatibility alias for older test name (direct call, no response cache)
+public_get_all_summaries = _all_summaries
 
 # Simple alias expected by some docs/snippets
 def list_files(kind: str):  # pragma: no cover - thin wrapper
-    return public_list_files(kind=kind)
+    return _list_files(kind)
 
 
 @router.get("/diag/storage", tags=["public"], summary="Diagnostic storage paths (public)")
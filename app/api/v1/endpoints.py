@@ -3,13 +3,15 @@ from fastapi import BackgroundTasks
 import logging
 from pydantic import BaseModel, ConfigDict
 from typing import List
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import get_session
+from app.database.database import get_async_session
 from app.database.models import EntryORM, JobORM, JobStatus
 from app.core.security import get_current_user
 from app.services.job_processor import process_job
+from app.services.entry_counts import cached_entry_count_async
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/entries")
 
@@ -43,8 +45,8 @@ class EntryOut(BaseModel):
     )
 
 
-def session_dep():
-    with get_session() as s:  # generator style for dependency
+async def session_dep():
+    async with get_async_session() as s:  # generator style for dependency
         yield s
 
 
@@ -53,6 +55,7 @@ class EntriesPage(BaseModel):
     limit: int
     offset: int
     items: List[EntryOut]
+    next_cursor: str | None = None
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -65,6 +68,7 @@ class EntriesPage(BaseModel):
                         {"id": 1, "text": "Notiz über ein neues Feature"},
                         {"id": 2, "text": "Idee: Embeddings für Ähnlichkeit"},
                     ],
+                    "next_cursor": "eyJpZCI6Mn0",
                 }
             ]
         }
@@ -118,7 +122,9 @@ class ValidationErrorResponse(ErrorResponse):
     summary="List entries",
     description=(
         "Gibt eine paginierte Liste aller gespeicherten Einträge zurück. "
-        "Parameter 'limit' bestimmt die maximale Anzahl (1-100), 'offset' überspringt eine Anzahl von Einträgen."
+        "Parameter 'limit' bestimmt die maximale Anzahl (1-100), 'offset' überspringt eine Anzahl von Einträgen. "
+        "Für tiefe Seiten 'cursor' verwenden: den Wert 'next_cursor' der vorherigen Antwort unverändert übergeben "
+        "(Keyset-Pagination, 'offset' wird dann ignoriert). 'total' ist ein kurzzeitig gecachter Wert."
     ),
     tags=["entries"],
     responses={
@@ -131,21 +137,39 @@ class ValidationErrorResponse(ErrorResponse):
 async def list_entries(
     limit: int = Query(10, ge=1, le=100, description="Max entries to return"),
     offset: int = Query(0, ge=0, description="Number of entries to skip"),
-    session: Session = Depends(session_dep),
+    cursor: str | None = Query(None, description="Opaque next_cursor from a previous page (keyset mode)"),
+    session: AsyncSession = Depends(session_dep),
     user=Depends(get_current_user),
 ):
-    total = session.query(func.count(EntryORM.id)).scalar() or 0
-    query = session.query(EntryORM).order_by(EntryORM.id.asc()).offset(offset).limit(limit)
-    rows = query.all()
+    total = await cached_entry_count_async(session)
+    query = select(EntryORM).order_by(EntryORM.id.asc())
+    if cursor:
+        try:
+            after_id = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": {"code": "INVALID_CURSOR", "message": "Malformed pagination cursor"}},
+            )
+        # Keyset mode: seek via primary key index instead of skipping rows
+        query = query.where(EntryORM.id > after_id)
+        offset = 0
+    else:
+        query = query.offset(offset)
+    # Fetch one extra row to know whether another page exists
+    rows = (await session.execute(query.limit(limit + 1))).scalars().all()
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    rows = rows[:limit]
     logging.getLogger("app.entries").info(
         "entries_listed",
-        extra={"count": len(rows), "total": total, "limit": limit, "offset": offset},
+        extra={"count": len(rows), "total": total, "limit": limit, "offset": offset, "keyset": bool(cursor)},
     )
     return {
         "total": total,
         "limit": limit,
         "offset": offset,
         "items": rows,
+        "next_cursor": next_cursor,
     }
 
 
@@ -174,12 +198,12 @@ class JobAccepted(BaseModel):
 async def create_entry(
     entry: EntryIn,
     background_tasks: BackgroundTasks,
-    session: Session = Depends(session_dep),
+    session: AsyncSession = Depends(session_dep),
     user=Depends(get_current_user),
 ):
     job = JobORM(input_text=entry.text)
     session.add(job)
-    session.flush()
+    await session.flush()
     logging.getLogger("app.entries").info("job_enqueued", extra={"job_id": job.id})
     background_tasks.add_task(process_job, job.id)
     return {"job_id": job.id, "status": job.status}
@@ -199,8 +223,8 @@ async def create_entry(
         },
     },
 )
-async def get_entry(entry_id: int, session: Session = Depends(session_dep), user=Depends(get_current_user)):
-    obj = session.get(EntryORM, entry_id)
+async def get_entry(entry_id: int, session: AsyncSession = Depends(session_dep), user=Depends(get_current_user)):
+    obj = await session.get(EntryORM, entry_id)
     if not obj:
         raise HTTPException(
             status_code=404,
@@ -221,14 +245,14 @@ async def get_entry(entry_id: int, session: Session = Depends(session_dep), user
         404: {"model": ErrorResponse, "description": "Eintrag nicht gefunden"},
     },
 )
-async def delete_entry(entry_id: int, session: Session = Depends(session_dep), user=Depends(get_current_user)):
-    obj = session.get(EntryORM, entry_id)
+async def delete_entry(entry_id: int, session: AsyncSession = Depends(session_dep), user=Depends(get_current_user)):
+    obj = await session.get(EntryORM, entry_id)
     if not obj:
         raise HTTPException(
             status_code=404,
             detail={"error": {"code": "ENTRY_NOT_FOUND", "message": "Entry not found"}},
         )
-    session.delete(obj)
+    await session.delete(obj)
     logging.getLogger("app.entries").info("entry_deleted", extra={"id": entry_id})
     # 204 No Content
     return None
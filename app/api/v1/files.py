@@ -1,15 +1,22 @@
 from __future__ import annotations
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Response
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Response, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy.orm import Session
-from typing import Generator, TypedDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncGenerator, Iterator, TypedDict
 import hashlib
-from app.database.database import get_session
+import json
+from app.database.database import get_async_session, get_session, prefix_filter
 from app.database.models import FileORM, JobORM, JobType
 from app.database.models import SummaryORM
 from app.core.security import get_current_user, UserORM
+from app.services import content_hash_index
+from app.services.entry_counts import cached_file_count_async
 from app.services.webdav_client import load_webdav_config, write_file_content, get_file_content
 from app.core.config import settings
+from app.core.response_cache import file_tag, response_cache
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 INBOX_DIR = settings.inbox_dir
 
@@ -21,8 +28,8 @@ def _entry_rel_path(name: str) -> str:
 router = APIRouter(prefix="/files", tags=["files"])
 
 
-def session_dep() -> Generator[Session, None, None]:
-    with get_session() as s:  # type: ignore[assignment]
+async def session_dep() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_session() as s:
         yield s
 
 class FileOut(BaseModel):
@@ -34,9 +41,28 @@ class FileOut(BaseModel):
     sha256: str | None
     model_config = ConfigDict(from_attributes=True)
 
+class FileListItem(BaseModel):
+    id: int
+    original_name: str | None = None
+    storage_path: str | None = None
+    mime_type: str | None = None
+    size_bytes: int | None = None
+    sha256: str | None = None
+
 class FileList(BaseModel):
-    total: int
-    items: list[FileOut]
+    total: int  # all files (cached COUNT), not the page size
+    items: list[FileListItem]
+    next_cursor: str | None = None
+
+# Columns selectable via ?fields= (id is always included; it drives the cursor)
+_FILE_FIELDS = {
+    "original_name": FileORM.original_name,
+    "storage_path": FileORM.storage_path,
+    "mime_type": FileORM.mime_type,
+    "size_bytes": FileORM.size_bytes,
+    "sha256": FileORM.sha256,
+}
+_STREAM_BATCH = 500
 
 class WriteTextIn(BaseModel):
     kind: str
@@ -55,13 +81,9 @@ class SummaryOut(BaseModel):
 
 
 @router.get("/summaries", response_model=list[SummaryOut], summary="List recent summaries")
-async def list_summaries(limit: int = 20, session: Session = Depends(session_dep), user: UserORM = Depends(get_current_user)) -> list[SummaryOut]:
-    rows = (
-        session.query(SummaryORM)
-        .order_by(SummaryORM.id.desc())
-        .limit(min(max(limit, 1), 100))
-        .all()
-    )
+async def list_summaries(limit: int = 20, session: AsyncSession = Depends(session_dep), user: UserORM = Depends(get_current_user)) -> list[SummaryOut]:
+    stmt = select(SummaryORM).order_by(SummaryORM.id.desc()).limit(min(max(limit, 1), 100))
+    rows = (await session.execute(stmt)).scalars().all()
     out: list[SummaryOut] = []
     for r in rows:
         out.append(
@@ -82,7 +104,7 @@ class UploadAccepted(TypedDict, total=False):
 @router.post("/upload", summary="Upload a file", response_model=dict, status_code=202)
 async def upload_file(
     file: UploadFile = File(...),
-    session: Session = Depends(session_dep),
+    session: AsyncSession = Depends(session_dep),
     user: UserORM = Depends(get_current_user),
 ) -> UploadAccepted:
     data = await file.read()
@@ -91,15 +113,15 @@ async def upload_file(
     # Determine storage path
     storage_name = f"{sha256[:16]}_{file.filename}"
     storage_path = f"{INBOX_DIR}/{storage_name}" if INBOX_DIR else storage_name
-    # Check duplicate
-    existing = session.query(FileORM).filter(FileORM.sha256 == sha256).first()
-    if existing:
-        return UploadAccepted(status="duplicate", file_id=existing.id)  # type: ignore[arg-type]
+    # Check duplicate (content hash index: same bytes already stored under any name)
+    known = await session.run_sync(lambda s: content_hash_index.lookup(s, sha256))
+    if known is not None and known.file_id is not None:
+        return UploadAccepted(status="duplicate", file_id=known.file_id)  # type: ignore[arg-type]
     # Upload to WebDAV
     url, user_nc, password_nc = load_webdav_config()
     import requests
     put_url = f"{url.rstrip('/')}/{storage_path}"
-    resp = requests.put(put_url, auth=(user_nc, password_nc), data=data)
+    resp = requests.put(put_url, auth=(user_nc, password_nc), data=data, headers={"OC-Checksum": f"SHA256:{sha256}"})
     if resp.status_code >= 400:
         raise HTTPException(status_code=502, detail={"error": {"code": "WEBDAV_UPLOAD_FAILED", "message": resp.text[:200]}})
     f = FileORM(
@@ -110,17 +132,58 @@ async def upload_file(
         sha256=sha256,
     )
     session.add(f)
-    session.flush()
+    await session.flush()
+    await session.run_sync(lambda s: content_hash_index.register(s, sha256, f.id, size))
     job = JobORM(job_type=JobType.file, file_id=f.id)
     session.add(job)
-    session.flush()
+    await session.flush()
     return UploadAccepted(status="accepted", file_id=f.id, job_id=job.id)
 
-@router.get("/", response_model=FileList)
-async def list_files(session: Session = Depends(session_dep), user: UserORM = Depends(get_current_user)) -> FileList:
-    rows = session.query(FileORM).order_by(FileORM.id.desc()).all()
-    out_items = [FileOut.model_validate(r) for r in rows]
-    return FileList(total=len(out_items), items=out_items)
+def _file_list_stmt(fields: str | None, cursor: str | None) -> tuple[Any, list[str]]:
+    names = list(_FILE_FIELDS)
+    if fields:
+        requested = [f.strip() for f in fields.split(',') if f.strip() and f.strip() != "id"]
+        unknown = [f for f in requested if f not in _FILE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail={"error": {"code": "UNKNOWN_FIELD", "message": ",".join(unknown)}})
+        names = requested
+    stmt = select(FileORM.id, *[_FILE_FIELDS[n] for n in names]).order_by(FileORM.id.desc())
+    if cursor:
+        try:
+            stmt = stmt.where(FileORM.id < decode_cursor(cursor))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail={"error": {"code": "INVALID_CURSOR", "message": "Malformed pagination cursor"}})
+    return stmt, ["id", *names]
+
+
+def _stream_ndjson(stmt: Any, columns: list[str]) -> Iterator[bytes]:
+    # Own session: dependency sessions are closed before a streaming body is sent
+    with get_session() as s:  # type: ignore[assignment]
+        result = s.execute(stmt.execution_options(stream_results=True, yield_per=_STREAM_BATCH))
+        for part in result.partitions():
+            yield "".join(json.dumps(dict(zip(columns, row)), separators=(",", ":")) + "\n" for row in part).encode("utf-8")
+
+
+@router.get("/", response_model=FileList, summary="List files, newest first",
+            description="Keyset pagination: pages of `limit` files (default 100, max 1000), follow `next_cursor`. "
+                        "`total` counts all files (cached for ENTRIES_COUNT_CACHE_TTL_SECONDS).")
+async def list_files(
+    limit: int = Query(100, ge=1, le=1000, description="Max files per page (json mode, default 100)"),
+    cursor: str | None = Query(None, description="Opaque next_cursor from the previous page"),
+    fields: str | None = Query(None, description="Comma separated columns to return (id is always included)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="ndjson streams all matching rows, one object per line"),
+    session: AsyncSession = Depends(session_dep),
+    user: UserORM = Depends(get_current_user),
+):
+    stmt, columns = _file_list_stmt(fields, cursor)
+    if format == "ndjson":
+        return StreamingResponse(_stream_ndjson(stmt, columns), media_type="application/x-ndjson")
+    rows = (await session.execute(stmt.limit(limit + 1))).all()
+    next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    # Plain dicts from row tuples; no per-row model instantiation
+    items = [dict(zip(columns, row)) for row in rows[:limit]]
+    total = await cached_file_count_async(session)
+    return JSONResponse({"total": total, "items": items, "next_cursor": next_cursor})
 
 
 class WriteTextOut(BaseModel):
@@ -129,30 +192,40 @@ class WriteTextOut(BaseModel):
 
 
 @router.post("/write-file", summary="Write a small text file (kind=entries)", response_model=WriteTextOut)
-async def write_text_file(body: WriteTextIn, user: UserORM = Depends(get_current_user), session: Session = Depends(session_dep)) -> WriteTextOut:
+async def write_text_file(body: WriteTextIn, user: UserORM = Depends(get_current_user), session: AsyncSession = Depends(session_dep)) -> WriteTextOut:
     if body.kind != "entries":
         raise HTTPException(status_code=400, detail={"error": {"code": "UNSUPPORTED_KIND", "message": "Only kind=entries supported"}})
     # Simple path policy: entries stored under configured inbox dir
     if len(body.content.encode('utf-8')) > settings.max_text_file_bytes:
         raise HTTPException(status_code=413, detail={"error": {"code": "CONTENT_TOO_LARGE", "message": f"File exceeds {settings.max_text_file_bytes} bytes"}})
     rel_path = _entry_rel_path(body.name)
+    data = body.content.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
     try:
-        write_file_content(rel_path, body.content)
+        write_file_content(rel_path, body.content, sha256=digest)
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=502, detail={"error": {"code": "WRITE_FAILED", "message": str(exc)}})
-    # Create DB record if not exists (hash optional)
-    existing = session.query(FileORM).filter(FileORM.storage_path == rel_path).first()
+    response_cache.invalidate("entries", file_tag("entries", body.name))  # public list-files / read-file
+    # Create DB record if not exists; the stored hash is the dedup reference of /write-file
+    existing = (await session.execute(select(FileORM).where(FileORM.storage_path == rel_path).limit(1))).scalars().first()
     if not existing:
         f = FileORM(
             original_name=body.name,
             storage_path=rel_path,
             mime_type="text/plain",
-            size_bytes=len(body.content.encode("utf-8")),
-            sha256=hashlib.sha256(body.content.encode("utf-8")).hexdigest(),
+            size_bytes=len(data),
+            sha256=digest,
         )
         session.add(f)
-        session.flush()
+        await session.flush()
+        await session.run_sync(lambda s: content_hash_index.register(s, digest, f.id, len(data)))
         return WriteTextOut(status="ok", file_id=f.id)
+    previous = existing.sha256
+    if previous and previous != digest:  # old content is gone from this file
+        await session.run_sync(lambda s: content_hash_index.release(s, previous, existing.id))
+    existing.sha256 = digest
+    existing.size_bytes = len(data)
+    await session.run_sync(lambda s: content_hash_index.register(s, digest, existing.id, len(data)))
     return WriteTextOut(status="ok", file_id=existing.id)
 
 
@@ -174,7 +247,6 @@ async def read_text_file(kind: str, name: str, request: Request, user: UserORM =
     if inm == etag:
         # Not modified -> 304, empty body
         return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
-    from fastapi.responses import JSONResponse
     resp = JSONResponse({"content": content})
     resp.headers["ETag"] = etag
     resp.headers["Cache-Control"] = cache_control
@@ -187,19 +259,19 @@ class ListFilesOut(BaseModel):
 
 
 @router.get("/list-files", summary="List files (kind=entries)", response_model=ListFilesOut)
-async def list_entry_files(kind: str, prefix: str | None = None, limit: int = 100, user: UserORM = Depends(get_current_user), session: Session = Depends(session_dep)) -> ListFilesOut:
+async def list_entry_files(kind: str, prefix: str | None = None, limit: int = 100, user: UserORM = Depends(get_current_user), session: AsyncSession = Depends(session_dep)) -> ListFilesOut:
     if kind != "entries":
         raise HTTPException(status_code=400, detail={"error": {"code": "UNSUPPORTED_KIND", "message": "Only kind=entries supported"}})
     # Prefilter / safety rule: Force caller to use prefix OR a small limit
     MAX_UNFILTERED = 100
     if not prefix and limit > MAX_UNFILTERED:
         raise HTTPException(status_code=400, detail={"error": {"code": "PREFILTER_REQUIRED", "message": f"Use prefix and/or reduce limit (>{MAX_UNFILTERED}) to narrow results"}})
-    like_prefix = f"{INBOX_DIR}/%" if INBOX_DIR else '%'
-    q = session.query(FileORM).filter(FileORM.storage_path.like(like_prefix))
+    dialect = session.bind.dialect.name
+    q = select(FileORM).where(prefix_filter(FileORM.storage_path, f"{INBOX_DIR}/" if INBOX_DIR else '', dialect))
     if prefix:
         safe_prefix = prefix.replace('..','_').lstrip('/')
-        q = q.filter(FileORM.storage_path.like(f"{INBOX_DIR}/{safe_prefix}%"))
-    rows = q.order_by(FileORM.id.desc()).limit(min(max(limit,1),500)).all()
+        q = q.where(prefix_filter(FileORM.storage_path, f"{INBOX_DIR}/{safe_prefix}", dialect))
+    rows = (await session.execute(q.order_by(FileORM.id.desc()).limit(min(max(limit,1),500)))).scalars().all()
     files = [FileOut.model_validate(r) for r in rows]
     return ListFilesOut(total=len(files), items=files)
 
@@ -213,7 +285,7 @@ class ArchiveOut(BaseModel):
     to_path: str
 
 @router.post("/archive", summary="Move an entry file to archive/", response_model=ArchiveOut)
-async def archive_file(body: ArchiveIn, user: UserORM = Depends(get_current_user)) -> ArchiveOut:
+async def archive_file(body: ArchiveIn, user: UserORM = Depends(get_current_user), session: AsyncSession = Depends(session_dep)) -> ArchiveOut:
     # Only supports files under inbox (kind=entries)
     rel_path = _entry_rel_path(body.name)
     # Validate existence
@@ -248,4 +320,7 @@ async def archive_file(body: ArchiveIn, user: UserORM = Depends(get_current_user
             requests.delete(src_url, auth=(user_nc, password_nc))
         except Exception as exc:
             raise HTTPException(status_code=502, detail={"error": {"code": "ARCHIVE_FAILED", "message": str(exc)}})
+    response_cache.invalidate("entries", file_tag("entries", body.name))
+    # The entry path is empty now: its stored hash must not dedup the next write of it
+    await session.run_sync(lambda s: content_hash_index.record_path_content(s, rel_path, None))
     return ArchiveOut(status="archived", from_path=rel_path, to_path=target_rel)
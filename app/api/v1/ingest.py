@@ -10,7 +10,7 @@ def _require_enabled():
     if not settings.auto_ingest_enabled:
         raise HTTPException(status_code=400, detail={"error": {"code": "DISABLED", "message": "auto ingest disabled"}})
 
-@router.post("/scan-now", summary="Trigger on-demand ingest scan", description="Scans drop directories and ingests new files up to the configured per-cycle limit.")
+@router.post("/scan-now", summary="Trigger on-demand ingest scan", description="Scans drop directories and ingests new files up to the configured per-cycle limit. Returns busy=true without scanning while another cycle (e.g. the background loop) is running.")
 def scan_now(_: Any = Depends(_require_enabled)) -> Dict[str, Any]:  # type: ignore[override]
     return run_scan_cycle()
 
@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy.orm import Session
-from app.database.database import get_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_async_session
 from app.database.models import JobORM, JobStatus
 from app.core.security import get_current_user
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
-def session_dep():
-    with get_session() as s:
+async def session_dep():
+    async with get_async_session() as s:
         yield s
 
 class JobStatusOut(BaseModel):
@@ -21,8 +21,8 @@ class JobStatusOut(BaseModel):
     model_config = ConfigDict(json_schema_extra={"example": {"job_id": 1, "status": "completed", "result_text": "SUMMARY ..."}})
 
 @router.get("/{job_id}/status", response_model=JobStatusOut, summary="Get job status")
-async def get_job_status(job_id: int, session: Session = Depends(session_dep), user=Depends(get_current_user)):
-    job = session.get(JobORM, job_id)
+async def get_job_status(job_id: int, session: AsyncSession = Depends(session_dep), user=Depends(get_current_user)):
+    job = await session.get(JobORM, job_id)
     if not job:
         raise HTTPException(status_code=404, detail={"error": {"code": "JOB_NOT_FOUND", "message": "Job not found"}})
     return {
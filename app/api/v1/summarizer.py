@@ -3,7 +3,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, cast
 from app.core.security import get_current_user, UserORM
-from app.services.webdav_client import get_file_content, write_file_content
+from app.services.webdav_client import get_file_content
+from app.services import summary_store
 from app.core.config import settings
 from app.services.summarizer import summarize_text
 from app.database.database import get_session
@@ -25,6 +26,7 @@ class SummarizeOut(BaseModel):
     chars_in: int
     chars_out: int
     model: str
+    storage: str = Field("webdav", description="webdav: on Nextcloud; cache: stored locally, Nextcloud upload pending")
 
 class SummarizePrefixIn(BaseModel):
     kind: str = Field(..., pattern="^(entries|summaries)$")
@@ -37,6 +39,7 @@ class SummarizePrefixOut(BaseModel):
     files: List[str]
     bundle_summary_path: str
     model: str
+    storage: str = Field("webdav", description="webdav: on Nextcloud; cache: stored locally, Nextcloud upload pending")
 
 
 class SummarizerUsageItem(BaseModel):
@@ -154,16 +157,16 @@ async def summarize_file(body: SummarizeIn, user: UserORM = Depends(get_current_
 
     tags = _extract_tags(content + "\n" + summary_text)
 
-    # Write summary file under summaries
+    # Write summary file under summaries (local cache now, Nextcloud via write-behind)
     stem = os.path.splitext(os.path.basename(body.name))[0]
-    summary_filename = f"{stem}.summary.md"
-    summary_rel = f"{settings.summaries_dir}/{summary_filename}".lstrip('/')
+    summary_filename = summary_store.summary_name(stem)
+    summary_rel = summary_store.remote_path(summary_filename)
     try:
-        write_file_content(summary_rel, summary_text)
+        storage = "webdav" if summary_store.write(summary_filename, summary_text) == "sync" else "cache"
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=502, detail={"error": {"code": "WRITE_FAILED", "message": str(exc)}})
 
-    return SummarizeOut(summary_path=summary_rel, tags=tags, chars_in=chars_in, chars_out=len(summary_text), model=used_model or "heuristic")
+    return SummarizeOut(summary_path=summary_rel, tags=tags, chars_in=chars_in, chars_out=len(summary_text), model=used_model or "heuristic", storage=storage)
 
 
 @router.post("/summarize-prefix", response_model=SummarizePrefixOut, summary="Summarize multiple files by prefix and create bundle summary")
@@ -202,13 +205,13 @@ async def summarize_prefix(body: SummarizePrefixIn, user: UserORM = Depends(get_
     model_final = used_model or bundle_res.model
     # store bundle summary
     safe_prefix = body.prefix.replace('/', '_')
-    bundle_name = f"{safe_prefix}.bundle.summary.md"
-    bundle_rel = f"{settings.summaries_dir}/{bundle_name}".lstrip('/')
+    bundle_name = summary_store.summary_name(f"{safe_prefix}.bundle")
+    bundle_rel = summary_store.remote_path(bundle_name)
     try:
-        write_file_content(bundle_rel, bundle_summary)
+        storage = "webdav" if summary_store.write(bundle_name, bundle_summary) == "sync" else "cache"
     except Exception as exc:
         raise HTTPException(status_code=502, detail={"error": {"code": "WRITE_FAILED", "message": str(exc)}})
-    return SummarizePrefixOut(processed=len(processed_files), files=processed_files, bundle_summary_path=bundle_rel, model=model_final)
+    return SummarizePrefixOut(processed=len(processed_files), files=processed_files, bundle_summary_path=bundle_rel, model=model_final, storage=storage)
 
 
 @router.get("/usage", response_model=SummarizerUsageResponse, summary="Recent summarizer usage + stats")
@@ -3,12 +3,18 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, Query, Form
 from pydantic import BaseModel, Field
 from typing import Optional
+import hashlib
+import logging
 from app.core.config import settings
+from app.core.response_cache import file_tag, response_cache
 from app.core.security import get_current_user, UserORM
+from app.database.database import get_session
+from app.services import content_hash_index
 from app.services.webdav_client import list_dir, get_file_content, write_file_content, mkdirs
 from fastapi.responses import JSONResponse
 
 router = APIRouter(prefix="/webdav", tags=["webdav"])
+log = logging.getLogger("app.webdav")
 
 @router.get("/list", summary="List files in inbox", response_model=list[str])
 async def list_inbox(user: UserORM = Depends(get_current_user)):
@@ -67,12 +73,30 @@ class DirectWriteIn(BaseModel):
     content: str = Field(..., description="Inhalt")
 
 
+def _invalidate_public_reads(path: str) -> None:
+    # Files in the entries / summaries dirs are served by public list-files and read-file
+    path = path.strip('/')
+    for kind, base in (("entries", settings.inbox_dir), ("summaries", settings.summaries_dir)):
+        base = (base or "").strip('/')
+        if base and path.startswith(base + '/'):
+            response_cache.invalidate(kind, file_tag(kind, path[len(base) + 1:]))
+
+
 @router.post("/put", summary="Write file directly to WebDAV", response_model=dict)
 async def put_file(payload: DirectWriteIn, user: UserORM = Depends(get_current_user)):
+    data = payload.content.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
     try:
-        write_file_content(payload.path, payload.content)
+        write_file_content(payload.path, payload.content, sha256=digest)
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=500, detail={"error": {"code": "WEBDAV_WRITE_FAILED", "message": str(exc)}})
+    _invalidate_public_reads(payload.path)
+    try:
+        # A tracked file (e.g. an entry) keeps its dedup hash in step with the new content
+        with get_session() as s:  # type: ignore[assignment]
+            content_hash_index.record_path_content(s, payload.path.strip('/'), digest, len(data))
+    except Exception as db_exc:  # pragma: no cover
+        log.warning("webdav_put_db_skip", extra={"error": str(db_exc)})
     return {"status": "ok", "path": payload.path}
 
 @router.post("/mkdir-form", summary="Create directory via form")
@@ -1,12 +1,24 @@
 from __future__ import annotations
 import secrets
 import hashlib
+import logging
+import threading
 from datetime import datetime, UTC
+from sqlalchemy import update
 from sqlalchemy.orm import Session
+from app.database.database import get_session
 from app.database.models import APIKeyORM
 from fastapi import Header, HTTPException, Depends
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
 from app.core.security import get_session_dep
 
+log = logging.getLogger("app.api_keys")
+
+# key_hash -> detached APIKeyORM (or None for unknown / revoked keys)
+_key_cache: TTLCache[str, APIKeyORM | None] = TTLCache(settings.api_key_cache_max_entries, settings.api_key_cache_ttl_seconds)
+
+
 def _hash_key(raw: str) -> str:
     return hashlib.sha256(raw.encode()).hexdigest()
 
@@ -15,17 +27,104 @@ def create_api_key(session: Session, name: str) -> str:
     key_hash = _hash_key(raw)
     session.add(APIKeyORM(name=name, key_hash=key_hash))
     session.commit()
+    _key_cache.pop(key_hash)
     return raw
 
+class _LastUsedFlusher:
+    """Coalesces last_used_at updates and writes them in one batched UPDATE per interval."""
+
+    def __init__(self) -> None:
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def touch(self, key_id: int) -> None:
+        with self._lock:
+            self._pending[key_id] = datetime.now(UTC)
+            if settings.api_key_last_used_flush_seconds > 0 and self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="api-key-last-used", daemon=True)
+                self._thread.start()
+        if settings.api_key_last_used_flush_seconds <= 0:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            with get_session() as s:
+                # ORM bulk UPDATE by primary key: one executemany statement for all keys
+                s.execute(update(APIKeyORM), [{"id": k, "last_used_at": ts} for k, ts in pending.items()])
+        except Exception:
+            with self._lock:  # keep them for the next round unless newer touches arrived
+                for k, ts in pending.items():
+                    self._pending.setdefault(k, ts)
+            raise
+        return len(pending)
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.api_key_last_used_flush_seconds):
+            try:
+                self.flush()
+            except Exception:  # pragma: no cover - DB hiccup; pending entries are retried next interval
+                log.exception("api_key_last_used_flush_failed")
+
+
+last_used_flusher = _LastUsedFlusher()
+
+
+def _load_key(session: Session, key_hash: str) -> APIKeyORM | None:
+    key = session.query(APIKeyORM).filter(APIKeyORM.key_hash == key_hash, APIKeyORM.revoked_at.is_(None)).first()
+    if key is None:
+        _key_cache.set(key_hash, None, ttl=settings.api_key_negative_cache_ttl_seconds)
+        return None
+    # Cached across requests/threads: never bound to a session, read-only for callers
+    session.expunge(key)
+    _key_cache.set(key_hash, key)
+    return key
+
+
 def verify_api_key(session: Session, raw: str) -> APIKeyORM | None:
     key_hash = _hash_key(raw)
-    key = session.query(APIKeyORM).filter(APIKeyORM.key_hash == key_hash, APIKeyORM.revoked_at.is_(None)).first()
-    if key:
-        key.last_used_at = datetime.now(UTC)
-        session.commit()
+    key = _key_cache.get(key_hash, MISSING)
+    if key is MISSING:
+        key = _load_key(session, key_hash)
+    if key is not None:
+        last_used_flusher.touch(key.id)  # type: ignore[union-attr]
+    return key  # type: ignore[return-value]
+
+
+def cached_api_key(raw: str) -> APIKeyORM | None | object:
+    """Cache-only lookup: the record, None (known invalid) or MISSING. Never touches the DB."""
+    key = _key_cache.get(_hash_key(raw), MISSING)
+    if key is not MISSING and key is not None:
+        last_used_flusher.touch(key.id)  # type: ignore[union-attr]
     return key
 
 
+def verify_api_key_cached(raw: str) -> APIKeyORM | None:
+    """verify_api_key without a caller session: only a cache miss opens one."""
+    key_hash = _hash_key(raw)
+    key = _key_cache.get(key_hash, MISSING)
+    if key is MISSING:
+        with get_session() as s:  # type: ignore[assignment]
+            key = _load_key(s, key_hash)
+    if key is not None:
+        last_used_flusher.touch(key.id)  # type: ignore[union-attr]
+    return key  # type: ignore[return-value]
+
+
 async def api_key_dep(x_api_key: str | None = Header(None), session: Session = Depends(get_session_dep)) -> APIKeyORM:
     if not x_api_key:
         raise HTTPException(status_code=401, detail={"error": {"code": "API_KEY_REQUIRED", "message": "Missing X-API-Key"}})
@@ -40,6 +139,7 @@ def revoke_api_key(session: Session, key_id: int) -> bool:
         return False
     key.revoked_at = datetime.now(UTC)
     session.commit()
+    _key_cache.pop(key.key_hash)
     return True
 
-__all__ = ["create_api_key", "verify_api_key", "api_key_dep", "revoke_api_key"]
+__all__ = ["create_api_key", "verify_api_key", "verify_api_key_cached", "cached_api_key", "api_key_dep", "revoke_api_key", "last_used_flusher"]
@@ -0,0 +1,67 @@
+from __future__ import annotations
+"""Small in-process caches.
+
+TTLCache is a thread-safe, size-bounded LRU whose entries expire after a TTL. It backs
+hot lookups that would otherwise hit the database on every request (API keys, auth
+principals). Values may be ``None`` (negative caching); use a sentinel default with
+``get`` to tell a cached ``None`` from a miss.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.clock = clock
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:  # stored, possibly expired; no LRU touch
+        return key in self._data
+
+    def get(self, key: K, default: object = None) -> V | object:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                if item[0] > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self.clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+__all__ = ["TTLCache", "MISSING"]
@@ -31,23 +31,72 @@ class Settings(BaseSettings):
 	search_backend: str = "basic"  # basic|vector (vector planned)
 	rate_limit_requests_per_minute: int = 120
 	redis_url: str | None = None  # REDIS_URL for optional redis rate limiting
+	rate_limit_redis_timeout_ms: int = 200  # RATE_LIMIT_REDIS_TIMEOUT_MS socket timeout per limiter call
+	rate_limit_redis_retry_seconds: float = 5.0  # RATE_LIMIT_REDIS_RETRY_SECONDS use local limiting this long after a Redis error
 	allowed_origins: str | None = None  # comma separated list for CORS
 	manual_uploads_dir: str = "BACKBRAIN5.2/manual_uploads"  # optional zweiter Eingang (manueller Drop)
 	# --- Auto Ingest (Drag&Drop Scanner) ---
 	auto_ingest_enabled: bool = False  # AUTO_INGEST_ENABLED=1 aktiviert Hintergrund-Scan
 	auto_ingest_interval_seconds: int = 120  # AUTO_INGEST_INTERVAL_SECONDS (Standard 2min)
 	auto_ingest_min_interval_seconds: int = 2  # AUTO_INGEST_MIN_INTERVAL_SECONDS Untergrenze für Scan (Standard 2s)
-	auto_ingest_max_files_per_cycle: int = 10  # Begrenzung pro Scan um Last zu kontrollieren
+	auto_ingest_max_files_per_cycle: int = 1000  # AUTO_INGEST_MAX_FILES_PER_CYCLE Begrenzung pro Scan um Last zu kontrollieren
+	ingest_fetch_concurrency: int = 8  # INGEST_FETCH_CONCURRENCY parallele Downloads pro Scan
+	ingest_extract_workers: int = 2  # INGEST_EXTRACT_WORKERS Prozesse für Textextraktion
+	ingest_write_concurrency: int = 8  # INGEST_WRITE_CONCURRENCY parallele Uploads pro Scan
+	ingest_queue_size: int = 64  # INGEST_QUEUE_SIZE Puffer zwischen den Pipeline-Stufen
+	ingest_max_file_bytes: int = 20 * 1024 * 1024  # INGEST_MAX_FILE_BYTES größere Dateien werden nicht geladen (too_large)
+	extract_timeout_seconds: float = 30.0  # EXTRACT_TIMEOUT_SECONDS pro Dokument (PDF/HTML-Extraktion)
+	extract_cache_max_entries: int = 256  # EXTRACT_CACHE_MAX_ENTRIES extrahierte Texte nach Inhalts-Hash
+	extract_cache_ttl_seconds: float = 3600.0  # EXTRACT_CACHE_TTL_SECONDS
 	ingest_allowed_extensions: str = ".txt,.md,.pdf"  # INGEST_ALLOWED_EXTENSIONS kommasepariert (inkl. Punkt)
 	pdf_max_pages: int = 8  # PDF_MAX_PAGES maximale Seiten für einfache Extraktion
 	enable_public_alias: bool = False  # steuert öffentliche Alias-Routen (False default for safety)
 	enable_diag: bool = False  # /diag route exposure
+	profiler_enabled: bool = False  # PROFILER_ENABLED mounts /diag/profile + /diag/slow-requests (bearer auth)
+	profiler_max_seconds: int = 60  # PROFILER_MAX_SECONDS upper bound for one sampling run
+	slow_request_threshold_ms: int = 0  # SLOW_REQUEST_THRESHOLD_MS capture stacks of requests slower than this (0 = off)
+	slow_request_buffer_size: int = 100  # SLOW_REQUEST_BUFFER_SIZE slow requests kept (ring buffer)
+	summaries_fallback_concurrency: int = 8  # SUMMARIES_FALLBACK_CONCURRENCY parallel WebDAV reads in get_all_summaries fallback
+	summaries_fallback_deadline_seconds: float = 5.0  # SUMMARIES_FALLBACK_DEADLINE_SECONDS return what finished by then
+	response_cache_ttl_seconds: float = 30.0  # RESPONSE_CACHE_TTL_SECONDS public read responses (0 = no caching, ETags still sent)
+	response_cache_max_entries: int = 512  # RESPONSE_CACHE_MAX_ENTRIES
+	response_cache_max_body_bytes: int = 1024 * 1024  # RESPONSE_CACHE_MAX_BODY_BYTES larger responses are not cached (0 = no limit)
+	auto_summary_workers: int = 2  # AUTO_SUMMARY_WORKERS threads generating summaries for public writes
+	auto_summary_queue_max: int = 100  # AUTO_SUMMARY_QUEUE_MAX pending summaries before new ones are rejected
+	auto_summary_drain_seconds: float = 10.0  # AUTO_SUMMARY_DRAIN_SECONDS wait for pending summaries on shutdown
+	summary_writeback_workers: int = 2  # SUMMARY_WRITEBACK_WORKERS threads writing cached summaries to Nextcloud
+	summary_writeback_queue_max: int = 1000  # SUMMARY_WRITEBACK_QUEUE_MAX pending Nextcloud writes; beyond that writes are synchronous
+	summary_writeback_retries: int = 5  # SUMMARY_WRITEBACK_RETRIES attempts per summary before giving up (the cache keeps it; the next startup re-queues it)
+	summary_writeback_retry_seconds: float = 2.0  # SUMMARY_WRITEBACK_RETRY_SECONDS first backoff, doubled per failed attempt
+	summary_writeback_drain_seconds: float = 10.0  # SUMMARY_WRITEBACK_DRAIN_SECONDS wait for pending Nextcloud writes on shutdown
 	public_writefile_limit_per_minute: int = 30  # rate limit for unauthenticated public write-file (0 = disable limit)
 	rate_limit_bypass_paths: str | None = None  # comma-separated paths that bypass global rate limiter (in addition to built-ins)
 	public_write_enabled: bool = True  # PUBLIC_WRITE_ENABLED (allow unauthenticated write-file)
 	rate_limit_key_strategy: str = "ip"  # RATE_LIMIT_KEY_STRATEGY=apikey|ip
 	api_key_rate_limit_window: str | None = None  # API_KEY_RATE_LIMIT_WINDOW like '60/min'
+	rate_limit_route_limits: str | None = None  # RATE_LIMIT_ROUTE_LIMITS per-route overrides '/api/v1/auth/token=10/min,/api/v1/files/upload=30/min'
+	rate_limit_max_keys: int = 100_000  # RATE_LIMIT_MAX_KEYS bound of the in-memory limiter key table (LRU eviction beyond)
+	api_key_cache_ttl_seconds: float = 30.0  # API_KEY_CACHE_TTL_SECONDS verified keys (revocation in another process is seen after this)
+	api_key_negative_cache_ttl_seconds: float = 5.0  # API_KEY_NEGATIVE_CACHE_TTL_SECONDS unknown/revoked keys
+	api_key_cache_max_entries: int = 10_000  # API_KEY_CACHE_MAX_ENTRIES
+	api_key_last_used_flush_seconds: float = 30.0  # API_KEY_LAST_USED_FLUSH_SECONDS batch interval for last_used_at (0 = write inline)
+	auth_principal_cache_ttl_seconds: float = 60.0  # AUTH_PRINCIPAL_CACHE_TTL_SECONDS username -> user for JWT auth (0 = disabled)
+	auth_principal_cache_max_entries: int = 1024  # AUTH_PRINCIPAL_CACHE_MAX_ENTRIES
 	access_log_enabled: bool = True  # ACCESS_LOG_ENABLED toggle structured JSON access log middleware
+	access_log_sample_rates: str = "/health=0.01,/metrics=0.01"  # ACCESS_LOG_SAMPLE_RATES path=fraction logged (errors always logged)
+	log_queue_enabled: bool = False  # LOG_QUEUE_ENABLED log via bounded queue + background listener thread
+	log_queue_size: int = 10_000  # LOG_QUEUE_SIZE records buffered before new ones are dropped (log_records_dropped_total)
+	# --- Database engine tuning ---
+	db_sqlite_profile: str = "default"  # DB_SQLITE_PROFILE=default|production (production: WAL + pragmas below)
+	sqlite_busy_timeout_ms: int = 5000  # SQLITE_BUSY_TIMEOUT_MS wait for locks instead of failing with "database is locked"
+	sqlite_mmap_size_bytes: int = 256 * 1024 * 1024  # SQLITE_MMAP_SIZE_BYTES memory-mapped I/O window
+	sqlite_cache_size_kib: int = 64 * 1024  # SQLITE_CACHE_SIZE_KIB page cache per connection
+	db_pool_size: int = 5  # DB_POOL_SIZE (non-SQLite engines)
+	db_max_overflow: int = 10  # DB_MAX_OVERFLOW
+	db_pool_timeout_seconds: int = 30  # DB_POOL_TIMEOUT_SECONDS
+	db_pool_recycle_seconds: int = 1800  # DB_POOL_RECYCLE_SECONDS (-1 = never)
+	db_pool_pre_ping: bool = True  # DB_POOL_PRE_PING
+	entries_count_cache_ttl_seconds: int = 5  # ENTRIES_COUNT_CACHE_TTL_SECONDS cached COUNT for /entries and /files (0 = always count)
 
 	# Allow unknown extra env vars (so future additions don't break startup/tests)
 	model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore")
@@ -0,0 +1,113 @@
+from __future__ import annotations
+"""Constant-space rate limiting (GCRA, generic cell rate algorithm).
+
+A limit of ``N`` requests per ``period`` is enforced by storing a single float per key:
+the theoretical arrival time (TAT) of the next request. Each admitted request pushes
+the TAT forward by ``period / N``; a request is rejected while the TAT lies more than
+``period`` in the future. This is equivalent to a token bucket of capacity ``N``
+refilled continuously, without per-request timestamps.
+
+Keys live in an LRU ordered table bounded by ``max_keys``. A key whose TAT is in the
+past carries no state (it behaves exactly like an unseen key), so idle keys are
+dropped opportunistically from the LRU end whenever a new key is inserted.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Tuple
+
+_PERIODS = {"s": 1.0, "sec": 1.0, "second": 1.0, "m": 60.0, "min": 60.0, "minute": 60.0, "h": 3600.0, "hour": 3600.0}
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    period: float = 60.0
+
+
+def parse_rate(raw: str) -> Rate:
+    """Parse ``'30/min'``, ``'5/s'`` or ``'1000/hour'``."""
+    count, _, unit = raw.strip().partition("/")
+    period = _PERIODS.get(unit.strip().lower() or "min")
+    if period is None or not count.strip().isdigit() or int(count) <= 0:
+        raise ValueError(f"invalid rate: {raw!r}")
+    return Rate(int(count), period)
+
+
+def parse_route_limits(raw: str | None) -> list[tuple[str, Rate]]:
+    """Parse ``'/api/v1/auth/token=10/min,/api/v1/files/upload=30/min'``.
+
+    Returned longest prefix first so the most specific rule wins.
+    """
+    rules: list[tuple[str, Rate]] = []
+    for part in (raw or "").split(","):
+        prefix, sep, rate = part.partition("=")
+        if not sep or not prefix.strip():
+            continue
+        prefix = prefix.strip()
+        rules.append((prefix if prefix.startswith("/") else "/" + prefix, parse_rate(rate)))
+    return sorted(rules, key=lambda r: len(r[0]), reverse=True)
+
+
+# (allowed, remaining, retry_after, reset_after): retry_after = seconds until the next
+# request would be admitted (0 if allowed), reset_after = seconds until a full burst is
+# available again. A plain tuple: NamedTuple construction dominated the hot path.
+Decision = Tuple[bool, int, float, float]
+
+
+class GCRALimiter:
+    """Thread-safe GCRA with a bounded LRU key table (one float per key)."""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max(1, int(max_keys))
+        self.clock = clock
+        self.tat: "OrderedDict[str, float]" = OrderedDict()
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tat)
+
+    def hit(self, key: str, rate: Rate) -> Decision:
+        interval = rate.period / rate.limit
+        tat_table = self.tat
+        with self._lock:
+            now = self.clock()
+            tat = tat_table.get(key)
+            if tat is None:
+                tat = now
+                # Only a new key grows the table, so only then sweep / enforce the bound
+                self._evict(now)
+            elif tat < now:
+                tat = now
+            new_tat = tat + interval
+            allow_at = new_tat - rate.period
+            if now < allow_at:
+                return (False, 0, allow_at - now, tat - now)
+            tat_table[key] = new_tat
+            tat_table.move_to_end(key)
+        remaining = int((rate.period - (new_tat - now)) / interval + 1e-9)
+        return (True, remaining if remaining > 0 else 0, 0.0, new_tat - now)
+
+    def reset(self, key: str | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self.tat.clear()
+            else:
+                self.tat.pop(key, None)
+
+    def _evict(self, now: float) -> None:
+        # Amortised idle sweep: look at a couple of least recently used keys per new key
+        tat_table = self.tat
+        for oldest_key, oldest_tat in list(islice(tat_table.items(), 2)):
+            if oldest_tat > now:
+                break
+            del tat_table[oldest_key]
+        while len(tat_table) >= self.max_keys:
+            tat_table.popitem(last=False)
+            self.evicted += 1
+
+
+__all__ = ["Rate", "Decision", "GCRALimiter", "parse_rate", "parse_route_limits"]
@@ -4,17 +4,28 @@ Features:
 - JSON logs in all environments (dev pretty vs prod compact)
 - Automatic request_id injection from RequestIDMiddleware
 - Supports logging via stdlib logging OR structlog logger
+- Optional queue mode (LOG_QUEUE_ENABLED): request threads only enqueue records into a
+  bounded queue; a QueueListener thread formats (orjson if installed) and writes them.
+  When the queue is full records are dropped and counted instead of blocking requests.
 """
 
 from __future__ import annotations
 
+import json
 import logging
 import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, MutableMapping
 import structlog
 from datetime import datetime, timezone
 
+try:  # optional dependency: faster JSON serialization
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
 try:  # runtime import safety
     from app.middleware.request_id import get_request_id
 except Exception:  # pragma: no cover
@@ -48,14 +59,108 @@ def _rename_event_key(logger: Any, method: str, event_dict: MutableMapping[str,
     return event_dict
 
 
-def setup_logging(env: str | None = None) -> None:
+def dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode()
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+# Attributes every LogRecord has; anything else came in via extra= and is emitted as a field
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class JSONLineFormatter(logging.Formatter):
+    """One compact JSON object per record (runs on the listener thread in queue mode)."""
+
+    def format(self, record: logging.LogRecord) -> str:  # type: ignore[override]
+        payload: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                payload.setdefault(key, value)
+        payload.setdefault("request_id", "-")
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return dumps(payload)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks and never formats on the calling thread."""
+
+    def __init__(self, q: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:  # type: ignore[override]
+        # The stock prepare() formats the whole record here; only capture what is gone
+        # once the request finishes (request id contextvar, mutable %-args).
+        if not hasattr(record, "request_id"):
+            record.request_id = get_request_id() or "-"
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:  # type: ignore[override]
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            try:
+                from app.core.metrics import log_records_dropped_total
+                log_records_dropped_total.inc()
+            except Exception:  # pragma: no cover
+                pass
+
+
+_listener: QueueListener | None = None
+
+
+def _setup_queue_logging(maxsize: int, level: str) -> None:
+    global _listener
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=maxsize)
+    sink = logging.StreamHandler(sys.stdout)
+    sink.setFormatter(JSONLineFormatter())
+    _listener = QueueListener(q, sink, respect_handler_level=True)
+    _listener.start()
+    logging.basicConfig(handlers=[DroppingQueueHandler(q)], level=level, force=True)
+    # structlog loggers hand their event dict to stdlib as extra= (rendered by the listener)
+    structlog.configure(
+        processors=[structlog.contextvars.merge_contextvars, structlog.stdlib.render_to_log_kwargs],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+
+def shutdown_logging() -> None:
+    """Stop the queue listener (flushes everything still queued)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(env: str | None = None, queue_mode: bool | None = None, queue_size: int | None = None) -> None:
     env = (env or os.getenv("BB_ENV") or "dev").lower()
     is_dev = env != "prod"
 
     # Reset any existing configuration to avoid duplicate handlers in reload
+    shutdown_logging()
     for h in list(logging.root.handlers):
         logging.root.removeHandler(h)
 
+    if queue_mode is None:
+        queue_mode = os.getenv("LOG_QUEUE_ENABLED", "0").lower() in ("1", "true", "yes")
+    if queue_mode:
+        _setup_queue_logging(queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000")), "DEBUG" if is_dev else "INFO")
+        logging.getLogger(__name__).info("logging_configured", extra={"env": env, "queue": True})
+        return
+
     shared_processors: list[structlog.types.Processor] = [
         _add_timestamp,
         _add_request_id,
@@ -113,4 +218,4 @@ def setup_logging(env: str | None = None) -> None:
     structlog.get_logger(__name__).info("logging_configured", env=env)
 
 
-__all__ = ["setup_logging"]
+__all__ = ["setup_logging", "shutdown_logging", "JSONLineFormatter", "DroppingQueueHandler", "dumps"]
@@ -3,10 +3,26 @@ from __future__ import annotations
 
 Legacy helper functions (inc, observe, etc.) kept as no-ops for backward compatibility.
 New code should import concrete metric objects and use .labels(...).inc()/observe().
+
+Multiprocess mode: with PROMETHEUS_MULTIPROC_DIR set in the environment (before this
+module is imported) every worker writes its samples to mmap files in that directory and
+/metrics aggregates all of them, so a scrape hitting any worker sees cluster-wide values.
+Gauges must declare how workers combine (``multiprocess_mode``). The directory must be
+emptied before the workers start (see docker-entrypoint.sh); gauges of workers that died
+are dropped on startup by cleanup_dead_workers() or gunicorn's child_exit hook.
 """
-from prometheus_client import Counter, Histogram, CollectorRegistry, generate_latest
+import glob
+import os
+import re
 from typing import Any
 
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+if MULTIPROC_DIR:  # prometheus_client picks the mmap value class at import time
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
 registry = CollectorRegistry()
 
 http_requests_total = Counter(
@@ -24,6 +40,13 @@ http_request_duration_seconds = Histogram(
     registry=registry,
 )
 
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",  # summed over live workers only
+    registry=registry,
+)
+
 rate_limit_drops_total = Counter(
     "rate_limit_drops_total",
     "Requests blocked by rate limiting",
@@ -31,6 +54,33 @@ rate_limit_drops_total = Counter(
     registry=registry,
 )
 
+rate_limit_redis_fallback_total = Counter(
+    "rate_limit_redis_fallback_total",
+    "Redis limiter errors that switched limiting to the local engine",
+    registry=registry,
+)
+
+log_records_dropped_total = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the logging queue was full",
+    registry=registry,
+)
+
+stage_duration_seconds = Histogram(
+    "bb_stage_duration_seconds",
+    "Time spent per request stage (db, webdav, llm, rank, ...), see app.core.timing",
+    labelnames=("stage",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=registry,
+)
+
+response_cache_total = Counter(
+    "bb_response_cache_total",
+    "Public read responses served from / stored into the response cache",
+    labelnames=("result",),  # result=hit|miss
+    registry=registry,
+)
+
 write_file_total = Counter(
     "write_file_total",
     "Total write-file attempts",
@@ -55,18 +105,120 @@ auto_summary_duration_seconds = Histogram(
     "Duration of auto summary generation",
     registry=registry,
 )
+auto_summary_submissions_total = Counter(
+    "bb_auto_summary_submissions_total",
+    "Auto summary jobs handed to the executor",
+    labelnames=("result",),  # result=queued|coalesced|rejected
+    registry=registry,
+)
+auto_summary_queue_depth = Gauge(
+    "bb_auto_summary_queue_depth",
+    "Auto summary jobs waiting for a worker",
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+auto_summary_queue_wait_seconds = Histogram(
+    "bb_auto_summary_queue_wait_seconds",
+    "Time an auto summary job waited in the queue",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+    registry=registry,
+)
 
 # Auto ingest metrics
 auto_ingest_scan_total = Counter(
     "bb_auto_ingest_scan_total",
     "Auto-ingest scan cycles",
-    labelnames=("result",),  # result=ok|error
+    labelnames=("result",),  # result=ok|error|busy
     registry=registry,
 )
 auto_ingest_files_total = Counter(
     "bb_auto_ingest_files_total",
     "Files considered by auto-ingest",
-    labelnames=("action",),  # action=skipped|ingested|error
+    labelnames=("action",),  # action=skipped|ingested|duplicate|too_large|error
+    registry=registry,
+)
+auto_ingest_scan_duration_seconds = Histogram(
+    "bb_auto_ingest_scan_duration_seconds",
+    "Duration of one auto-ingest scan cycle (discovery and ingest)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    registry=registry,
+)
+auto_ingest_files_diffed_total = Counter(
+    "bb_auto_ingest_files_diffed_total",
+    "Files compared against the persisted scanner state",
+    labelnames=("result",),  # result=new|changed|unchanged|deleted
+    registry=registry,
+)
+auto_ingest_dirs_total = Counter(
+    "bb_auto_ingest_dirs_total",
+    "Drop directories checked per cycle",
+    labelnames=("result",),  # result=unchanged (ETag short-circuit)|listed|error
+    registry=registry,
+)
+ingest_stage_items_total = Counter(
+    "bb_ingest_stage_items_total",
+    "Items processed per ingest pipeline stage",
+    labelnames=("stage", "result"),  # stage=fetch|extract|write, result=ok|skipped|error
+    registry=registry,
+)
+ingest_stage_duration_seconds = Histogram(
+    "bb_ingest_stage_duration_seconds",
+    "Time per item in an ingest pipeline stage",
+    labelnames=("stage",),
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=registry,
+)
+ingest_stage_busy = Gauge(
+    "bb_ingest_stage_busy",
+    "Workers currently processing an item, per ingest pipeline stage",
+    labelnames=("stage",),
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+extract_total = Counter(
+    "bb_extract_total",
+    "Documents run through text extraction",
+    labelnames=("kind", "result"),  # kind=text|markdown|html|pdf, result=ok|cached|error|timeout
+    registry=registry,
+)
+extract_duration_seconds = Histogram(
+    "bb_extract_duration_seconds",
+    "Text extraction time per document (process pool round trip)",
+    labelnames=("kind",),
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=registry,
+)
+ingest_stage_queue_depth = Gauge(
+    "bb_ingest_stage_queue_depth",
+    "Items waiting in front of an ingest pipeline stage",
+    labelnames=("stage",),
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+# Summary store (local cache + write-behind to Nextcloud)
+summary_store_writes_total = Counter(
+    "bb_summary_store_writes_total",
+    "Summary writes accepted by the summary store",
+    labelnames=("result",),  # result=queued|coalesced|sync
+    registry=registry,
+)
+summary_store_reads_total = Counter(
+    "bb_summary_store_reads_total",
+    "Summary reads by the source that answered",
+    labelnames=("source",),  # source=cache|webdav
+    registry=registry,
+)
+summary_writeback_total = Counter(
+    "bb_summary_writeback_total",
+    "Write-behind attempts of cached summaries to Nextcloud",
+    labelnames=("result",),  # result=ok|retry|failed
+    registry=registry,
+)
+summary_writeback_queue_depth = Gauge(
+    "bb_summary_writeback_queue_depth",
+    "Summaries written to the local cache but not yet to Nextcloud",
+    multiprocess_mode="livesum",
     registry=registry,
 )
 
@@ -81,9 +233,55 @@ def set_gauge(name: str, value: float):  # pragma: no cover
 def snapshot() -> tuple[dict[str, float], dict[str, float]]:  # pragma: no cover
     return {}, {}
 
+def multiprocess_enabled() -> bool:
+    return bool(MULTIPROC_DIR)
+
+
 def render_prometheus() -> str:
+    if MULTIPROC_DIR:
+        # Fresh registry per scrape: the collector reads every worker's files
+        agg = CollectorRegistry()
+        multiprocess.MultiProcessCollector(agg, path=MULTIPROC_DIR)
+        return generate_latest(agg).decode("utf-8")
     return generate_latest(registry).decode("utf-8")
 
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # pragma: no cover - exists, owned by someone else
+        return True
+    return True
+
+
+def mark_worker_dead(pid: int) -> None:
+    """gunicorn ``child_exit`` hook body: drop the live gauges of an exited worker."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+
+def cleanup_dead_workers(path: str | None = None) -> list[int]:
+    """Drop live gauges of worker pids that no longer exist (called at worker startup).
+
+    Counter/histogram files of dead workers are kept on purpose: removing them would make
+    cluster totals go backwards.
+    """
+    path = path or MULTIPROC_DIR
+    if not path:
+        return []
+    pids = set()
+    for f in glob.glob(os.path.join(path, "gauge_live*_*.db")):
+        m = re.search(r"_(\d+)\.db$", f)
+        if m:
+            pids.add(int(m.group(1)))
+    dead = sorted(pid for pid in pids if pid != os.getpid() and not _pid_alive(pid))
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, path)
+    return dead
+
+
 from typing import Iterable
 def observe(name: str, value: float, buckets: Iterable[float] | None = None):  # pragma: no cover
     # use specific histograms instead
@@ -95,11 +293,35 @@ def inc_labeled(base: str, **labels: Any):  # pragma: no cover
 
 __all__ = [
     "http_requests_total",
+    "http_requests_in_progress",
     "http_request_duration_seconds",
     "rate_limit_drops_total",
+    "rate_limit_redis_fallback_total",
+    "log_records_dropped_total",
+    "stage_duration_seconds",
+    "response_cache_total",
     "write_file_total",
     "write_file_errors_total",
     "auto_summary_total",
     "auto_summary_duration_seconds",
+    "auto_summary_submissions_total",
+    "auto_summary_queue_depth",
+    "auto_summary_queue_wait_seconds",
+    "auto_ingest_scan_duration_seconds",
+    "auto_ingest_files_diffed_total",
+    "auto_ingest_dirs_total",
+    "ingest_stage_items_total",
+    "ingest_stage_duration_seconds",
+    "ingest_stage_busy",
+    "ingest_stage_queue_depth",
+    "summary_store_writes_total",
+    "summary_store_reads_total",
+    "summary_writeback_total",
+    "summary_writeback_queue_depth",
+    "extract_total",
+    "extract_duration_seconds",
     "render_prometheus",
+    "multiprocess_enabled",
+    "mark_worker_dead",
+    "cleanup_dead_workers",
 ]
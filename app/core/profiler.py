@@ -0,0 +1,230 @@
+from __future__ import annotations
+"""Statistical sampling profiler and slow-request recorder.
+
+SamplingProfiler walks ``sys._current_frames()`` every ``interval`` seconds from a daemon
+thread and counts collapsed stacks (``root;caller;leaf count`` lines, the folded format
+read by flamegraph.pl / speedscope). No tracing hooks are installed, so the overhead is
+one stack walk per thread per tick and nothing while it is stopped.
+
+SlowRequestRecorder tracks in-flight requests; a watchdog thread snapshots the stacks of
+any request still running past the threshold (the event loop thread it entered on plus
+busy worker threads) into a bounded ring buffer keyed by request id. A request that keeps
+running is snapshotted again each time its age doubles, so the entry shows where it
+spent its time, not a pause it happened to hit at the threshold. ``stop`` ends the
+watchdog (lifespan teardown; also when create_app replaces the recorder).
+"""
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from types import FrameType
+from typing import Any, Dict, List, Optional
+
+# Leaf functions of threads that are parked (thread pools, selectors, queues)
+_IDLE_LEAVES = {"wait", "select", "poll", "epoll", "get", "_wait_for_tstate_lock", "acquire", "sleep"}
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame: Optional[FrameType]) -> str:
+    """Frame chain as ``root;...;leaf``."""
+    parts: List[str] = []
+    while frame is not None:
+        parts.append(_label(frame))
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+def _is_idle(frame: FrameType) -> bool:
+    return frame.f_code.co_name in _IDLE_LEAVES
+
+
+def render_collapsed(stacks: Dict[str, int]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda kv: -kv[1]))
+
+
+class SamplingProfiler:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.interval = 0.01
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval: float = 0.01) -> bool:
+        """Start sampling for ``seconds``; False if a run is already in progress."""
+        with self._lock:
+            if self.running:
+                return False
+            self.stacks = Counter()
+            self.samples = 0
+            self.interval = max(0.001, interval)
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(seconds,), name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def _run(self, seconds: float) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident != own and not _is_idle(frame):
+                    self.stacks[collapse(frame)] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+        self.stopped_at = time.time()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval_ms": round(self.interval * 1000, 3),
+            "distinct_stacks": len(self.stacks),
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+    def collapsed(self) -> str:
+        return render_collapsed(dict(self.stacks))
+
+
+class SlowRequestRecorder:
+    def __init__(self, threshold: float, capacity: int = 100, poll: Optional[float] = None) -> None:
+        self.threshold = threshold
+        self.capacity = max(1, capacity)
+        self.poll = poll if poll is not None else min(0.25, max(0.01, threshold / 4))
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def begin(self, request_id: str, method: str, path: str) -> None:
+        with self._lock:
+            self._inflight[request_id] = {
+                "request_id": request_id,
+                "method": method,
+                "path": path,
+                "thread": threading.get_ident(),
+                "start": time.perf_counter(),
+                "started_at": time.time(),
+            }
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._watch, name="slow-request-watchdog", daemon=True)
+                self._thread.start()
+
+    def end(self, request_id: str, status: int) -> None:
+        with self._lock:
+            info = self._inflight.pop(request_id, None)
+            if info is None:
+                return
+            duration = time.perf_counter() - info["start"]
+            entry = self._entries.get(request_id)
+            if entry is None and duration >= self.threshold and "next" not in info:
+                # Finished between two watchdog polls: keep the timing, no stacks
+                entry = self._store(info, {})
+            if entry is not None:
+                entry["duration_ms"] = round(duration * 1000, 3)
+                entry["status"] = status
+
+    def _store(self, info: Dict[str, Any], stacks: Dict[str, str]) -> Dict[str, Any]:
+        entry = {k: info[k] for k in ("request_id", "method", "path", "started_at")}
+        entry.update(stacks=stacks, duration_ms=None, status=None)
+        self._entries[info["request_id"]] = entry
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _watch(self) -> None:  # pragma: no cover - timing dependent, exercised via capture()
+        while not self._stop.wait(self.poll):
+            self.capture()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """End the watchdog thread; in-flight requests are no longer snapshotted."""
+        self._stop.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def capture(self) -> int:
+        """Snapshot every in-flight request that is due (threshold, then each doubling of its age)."""
+        now = time.perf_counter()
+        with self._lock:
+            due = [info for info in self._inflight.values()
+                   if now - info["start"] >= info.get("next", self.threshold)]
+        if not due:
+            return 0
+        frames = sys._current_frames()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own = threading.get_ident()
+        busy = {f"{names.get(ident, 'thread')}:{ident}": collapse(f) for ident, f in frames.items()
+                if ident != own and not _is_idle(f)}
+        with self._lock:
+            for info in due:
+                stacks = dict(busy)
+                home = info["thread"]
+                if home in frames:  # the thread the request entered on, even when parked in the loop
+                    stacks[f"{names.get(home, 'thread')}:{home}"] = collapse(frames[home])
+                info["next"] = max(self.threshold, now - info["start"]) * 2
+                entry = self._entries.get(info["request_id"])
+                if entry is not None:
+                    entry["stacks"] = stacks
+                else:
+                    self._store(info, stacks)
+        return len(due)
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(request_id)
+            return dict(entry) if entry is not None else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{k: v for k, v in e.items() if k != "stacks"} for e in reversed(self._entries.values())]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+profiler = SamplingProfiler()
+slow_requests: Optional[SlowRequestRecorder] = None
+
+
+def get_slow_request_recorder() -> Optional[SlowRequestRecorder]:
+    return slow_requests
+
+
+def configure_slow_requests(threshold_ms: float, capacity: int) -> Optional[SlowRequestRecorder]:
+    global slow_requests
+    if slow_requests is not None:  # replaced (new app instance): end its watchdog
+        slow_requests.stop()
+    slow_requests = SlowRequestRecorder(threshold_ms / 1000.0, capacity) if threshold_ms > 0 else None
+    return slow_requests
+
+
+__all__ = [
+    "SamplingProfiler", "SlowRequestRecorder", "collapse", "render_collapsed",
+    "profiler", "get_slow_request_recorder", "configure_slow_requests",
+]
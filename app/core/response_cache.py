@@ -0,0 +1,144 @@
+from __future__ import annotations
+"""Serialized response cache with strong ETags for public read endpoints.
+
+Entries are keyed by route + normalized query (``request_key``) and hold the rendered
+JSON body and a sha256 ETag. Every entry carries tags (``entries`` / ``summaries`` for
+listings, ``file_tag(kind, name)`` for single files) so writers drop exactly what they
+affect via ``invalidate(...)``; the TTL bounds staleness for writes made elsewhere.
+Clients revalidate with ``If-None-Match`` and get an empty 304 when nothing changed.
+A ``cb`` (cache-bust) query parameter bypasses both the cache and the 304.
+
+A response computed while a write committed must not be cached: ``put`` is skipped when
+an invalidation happened after the caller read ``generation``. Bodies larger than
+``max_body_bytes`` (RESPONSE_CACHE_MAX_BODY_BYTES) are served but not stored, so a few
+huge files cannot fill the memory that ``maxsize`` entries would otherwise bound.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    media_type: str
+
+
+def render_json(payload: Any) -> bytes:
+    # Same encoding as starlette's JSONResponse
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def request_key(request: Request) -> str:
+    """``/path?a=1&b=2``: trailing slash and parameter order do not create new entries."""
+    path = request.url.path.rstrip("/") or "/"
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if k != "cb")
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def file_tag(kind: str, name: str) -> str:
+    return f"file:{kind}:{name.strip().lstrip('/')}"
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: ``W/"x"`` matches ``"x"``; ``*`` matches anything."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int, ttl: float, max_body_bytes: int = 0) -> None:
+        self.max_body_bytes = max_body_bytes  # 0 = no limit
+        self._entries: TTLCache[str, Tuple[CachedResponse, frozenset[str]]] = TTLCache(maxsize, ttl)
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        item = self._entries.get(key)
+        return item[0] if item is not None else None  # type: ignore[index]
+
+    def put(self, key: str, body: bytes, tags: Iterable[str], generation: Optional[int] = None,
+            media_type: str = "application/json") -> CachedResponse:
+        entry = CachedResponse(body, strong_etag(body), media_type)
+        tagset = frozenset(tags)
+        with self._lock:
+            if self._entries.ttl <= 0 or (generation is not None and generation != self.generation):
+                return entry  # caching disabled / data changed while this response was built
+            if self.max_body_bytes > 0 and len(body) > self.max_body_bytes:
+                return entry
+            self._entries.set(key, (entry, tagset))
+            for tag in tagset:
+                keys = self._tags.setdefault(tag, set())
+                keys.add(key)
+                if len(keys) > 2 * self._entries.maxsize:  # drop keys the LRU already evicted
+                    self._tags[tag] = {k for k in keys if k in self._entries}
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._entries.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._tags.clear()
+            self._entries.clear()
+
+
+response_cache = ResponseCache(settings.response_cache_max_entries, settings.response_cache_ttl_seconds,
+                               settings.response_cache_max_body_bytes)
+
+
+def cached_json(request: Request, tags: Iterable[str], build: Callable[[], Any], key: Optional[str] = None) -> Response:
+    """Serve ``build()`` as JSON from the cache (filled on miss), honouring If-None-Match.
+
+    Exceptions from ``build`` (404s, ...) propagate and nothing is cached.
+    """
+    if "cb" in request.query_params:
+        body = render_json(build())
+        return Response(content=body, media_type="application/json",
+                        headers={"ETag": strong_etag(body), "Cache-Control": "no-cache", "X-Cache": "BYPASS"})
+    key = key or request_key(request)
+    entry = response_cache.get(key)
+    result = "hit"
+    if entry is None:
+        result = "miss"
+        generation = response_cache.generation
+        entry = response_cache.put(key, render_json(build()), tags, generation=generation)
+    try:
+        metrics.response_cache_total.labels(result=result).inc()
+    except Exception:  # pragma: no cover
+        pass
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": result.upper()}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+
+__all__ = [
+    "CachedResponse", "ResponseCache", "response_cache", "cached_json", "request_key", "file_tag",
+    "render_json", "strong_etag", "etag_matches",
+]
@@ -4,19 +4,27 @@ from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 
+from app.core.cache import MISSING, TTLCache
 from app.core.config import settings
-from app.database.database import get_session
+from app.database.database import get_async_session, get_session
 from app.database.models import UserORM
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
+# username -> detached UserORM; keeps get_current_user off the database for valid tokens
+_principal_cache: TTLCache[str, UserORM] = TTLCache(settings.auth_principal_cache_max_entries, settings.auth_principal_cache_ttl_seconds)
 
 def get_session_dep():
     with get_session() as s:
         yield s
 
+async def get_async_session_dep():
+    async with get_async_session() as s:
+        yield s
+
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
@@ -39,7 +47,33 @@ def authenticate_user(session: Session, username: str, password: str) -> UserORM
         return None
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session_dep)) -> UserORM:
+def _load_principal(username: str) -> UserORM | None:
+    cached = _principal_cache.get(username, MISSING)
+    if cached is not MISSING:
+        return cached  # type: ignore[return-value]
+    with get_session() as session:
+        user = get_user_by_username(session, username)
+        if user is None:
+            return None
+        session.expunge(user)  # shared read-only across requests
+    _principal_cache.set(username, user)
+    return user
+
+def invalidate_principal(username: str | None = None) -> None:
+    if username is None:
+        _principal_cache.clear()
+    else:
+        _principal_cache.pop(username)
+
+@event.listens_for(UserORM, "after_update")
+@event.listens_for(UserORM, "after_delete")
+def _user_changed(mapper, connection, target) -> None:  # type: ignore[no-untyped-def]
+    # Evict the current and (on rename) the previous username
+    hist = inspect(target).attrs.username.history
+    for name in [target.username, *(hist.deleted or ())]:
+        invalidate_principal(name)
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> UserORM:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail={"error": {"code": "NOT_AUTHENTICATED", "message": "Could not validate credentials"}},
@@ -52,7 +86,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = get_user_by_username(session, username)
+    user = _load_principal(username)
     if user is None:
         raise credentials_exception
     return user
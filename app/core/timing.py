@@ -0,0 +1,106 @@
+from __future__ import annotations
+"""Per-request stage timing (spans).
+
+``span("webdav")`` / ``@timed("llm")`` measure a stage: every span is observed in the
+``bb_stage_duration_seconds`` histogram and, while a request is active, appended to
+that request's ``RequestTimings``. RequestIDMiddleware opens the collector (bound to the
+request id) and renders it as a ``Server-Timing`` response header.
+
+The collector lives in a contextvar. Starlette's threadpool copies the context, so sync
+endpoints/dependencies report into the same collector; for hand-made threads wrap the
+target with ``bind(fn)`` to carry the request context across.
+"""
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from app.core import metrics
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class RequestTimings:
+    """Spans recorded for one request. Appends may come from worker threads."""
+
+    __slots__ = ("request_id", "started", "spans", "_lock")
+
+    def __init__(self, request_id: Optional[str]) -> None:
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.spans.append((stage, seconds))
+
+    def totals(self) -> Dict[str, Tuple[float, int]]:
+        """stage -> (summed seconds, span count), in first-seen order."""
+        out: Dict[str, Tuple[float, int]] = {}
+        with self._lock:
+            for stage, seconds in self.spans:
+                total, count = out.get(stage, (0.0, 0))
+                out[stage] = (total + seconds, count + 1)
+        return out
+
+    def server_timing(self) -> str:
+        parts = [f"{stage};dur={total * 1000:.1f}" for stage, (total, _n) in self.totals().items()]
+        parts.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_timings_ctx: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def begin(request_id: Optional[str]) -> contextvars.Token:
+    return _timings_ctx.set(RequestTimings(request_id))
+
+
+def end(token: contextvars.Token) -> None:
+    _timings_ctx.reset(token)
+
+
+def current() -> Optional[RequestTimings]:
+    return _timings_ctx.get()
+
+
+def record(stage: str, seconds: float) -> None:
+    try:
+        metrics.stage_duration_seconds.labels(stage=stage).observe(seconds)
+    except Exception:  # pragma: no cover - metrics must never break a request
+        pass
+    timings = _timings_ctx.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorator form of span() for sync functions."""
+    def deco(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return deco
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Run ``fn`` later (e.g. as a Thread target) inside a copy of the current context."""
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, fn)
+
+
+__all__ = ["RequestTimings", "begin", "end", "current", "record", "span", "timed", "bind"]
@@ -1,21 +1,117 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from sqlalchemy import and_, create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Generator
 import os
+import time
+from app.core.timing import record, span
+
+if TYPE_CHECKING:  # pragma: no cover
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 DB_URL = os.getenv("BB_DB_URL", "sqlite:///./backbrain.db")
 
+def _sqlite_pragmas(s: Any) -> list[str]:
+    """PRAGMAs for the SQLite production profile (API threads + worker share one file)."""
+    if s.db_sqlite_profile.lower() != "production":
+        return []
+    return [
+        "PRAGMA journal_mode=WAL",  # readers no longer block the writer (and vice versa)
+        "PRAGMA synchronous=NORMAL",  # safe with WAL; fsync on checkpoint instead of every commit
+        f"PRAGMA busy_timeout={int(s.sqlite_busy_timeout_ms)}",
+        f"PRAGMA mmap_size={int(s.sqlite_mmap_size_bytes)}",
+        f"PRAGMA cache_size=-{int(s.sqlite_cache_size_kib)}",  # negative = KiB
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def _apply_sqlite_pragmas(engine: Any, pragmas: list[str]) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):  # type: ignore[no-untyped-def]
+        cur = dbapi_connection.cursor()
+        try:
+            for stmt in pragmas:
+                cur.execute(stmt)
+        finally:
+            cur.close()
+
+
+def _time_statements(engine: Any) -> None:
+    """Report statement execution time as the "db" stage (app.core.timing)."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-untyped-def]
+        conn.info.setdefault("bb_stmt_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-untyped-def]
+        starts = conn.info.get("bb_stmt_start")
+        if starts:
+            record("db", time.perf_counter() - starts.pop())
+
+
 def _make_engine(url: str):
-    return create_engine(
+    from app.core.config import get_settings
+    s = get_settings()
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        pragmas = _sqlite_pragmas(s)
+        # WAL needs a real file; skip for in-memory databases
+        if pragmas and ":memory:" not in url and url.rstrip("/") != "sqlite:":
+            _apply_sqlite_pragmas(engine, pragmas)
+        _time_statements(engine)
+        return engine
+    engine = create_engine(
         url,
-        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+        pool_size=s.db_pool_size,
+        max_overflow=s.db_max_overflow,
+        pool_timeout=s.db_pool_timeout_seconds,
+        pool_recycle=s.db_pool_recycle_seconds,
+        pool_pre_ping=s.db_pool_pre_ping,
+    )
+    _time_statements(engine)
+    return engine
+
+def _async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (aiosqlite / asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    if not sep:  # pragma: no cover - malformed, let SQLAlchemy complain
+        return url
+    if scheme in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2", "postgresql+psycopg"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def _make_async_engine(url: str) -> "AsyncEngine":
+    from sqlalchemy.ext.asyncio import create_async_engine  # optional driver deps imported lazily
+    from app.core.config import get_settings
+    s = get_settings()
+    if url.startswith("sqlite"):
+        async_engine = create_async_engine(_async_url(url))
+        pragmas = _sqlite_pragmas(s)
+        if pragmas and ":memory:" not in url and url.rstrip("/") != "sqlite:":
+            _apply_sqlite_pragmas(async_engine.sync_engine, pragmas)
+        _time_statements(async_engine.sync_engine)
+        return async_engine
+    async_engine = create_async_engine(
+        _async_url(url),
+        pool_size=s.db_pool_size,
+        max_overflow=s.db_max_overflow,
+        pool_timeout=s.db_pool_timeout_seconds,
+        pool_recycle=s.db_pool_recycle_seconds,
+        pool_pre_ping=s.db_pool_pre_ping,
     )
+    _time_statements(async_engine.sync_engine)
+    return async_engine
 
 # initial engine
 engine = _make_engine(DB_URL)
+# async engine is created on first use so aiosqlite/asyncpg stay optional for sync-only callers
+_async_engine: "AsyncEngine | None" = None
+_async_session_factory: "async_sessionmaker[AsyncSession] | None" = None
 
 class Base(DeclarativeBase):
     pass
@@ -33,19 +129,68 @@ def configure_engine():
             pass
         engine = _make_engine(current_url)
         SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+        _reset_async_engine()
+
+
+def _reset_async_engine() -> None:
+    # AsyncEngine.dispose() must be awaited on its loop; dropping the reference lets
+    # pooled connections close on garbage collection.
+    global _async_engine, _async_session_factory
+    _async_engine = None
+    _async_session_factory = None
+
+
+def get_async_engine() -> "AsyncEngine":
+    """Async counterpart of ``engine`` bound to the same database URL."""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_engine = _make_async_engine(engine.url.render_as_string(hide_password=False))
+        _async_session_factory = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
 
 @contextmanager
 def get_session() -> Generator[Session, None, None]:
     session: Session = SessionLocal()
     try:
         yield session
-        session.commit()
+        session.flush()  # statements are timed per cursor execute; the span covers the COMMIT itself
+        with span("db"):
+            session.commit()
     except Exception:
         session.rollback()
         raise
     finally:
         session.close()
 
+def prefix_filter(column: Any, prefix: str, dialect_name: str) -> Any:
+    """Index friendly ``column LIKE 'prefix%'``.
+
+    SQLite only uses an index for LIKE with case_sensitive_like, so add equivalent
+    binary range bounds there. Other dialects keep the plain LIKE (Postgres uses the
+    varchar_pattern_ops index; range bounds would be wrong under locale collations).
+    """
+    like = column.like(f"{prefix}%")
+    if dialect_name != "sqlite" or not prefix:
+        return like
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper, like)
+
+@asynccontextmanager
+async def get_async_session() -> AsyncIterator["AsyncSession"]:
+    """Async variant of get_session(): commit on success, rollback on error."""
+    get_async_engine()
+    assert _async_session_factory is not None
+    session = _async_session_factory()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
 # Startup helper
 def init_db():
     configure_engine()
@@ -55,3 +200,10 @@ def init_db():
     if _os.getenv("BB_TESTING") == "1":
         models.Base.metadata.drop_all(bind=engine)
     models.Base.metadata.create_all(bind=engine)
+    # summary_previews may be new on an existing database: fill rows for older summaries
+    from app.services.summary_previews import backfill, register
+    from app.services import content_hash_index
+    register()  # ORM events that keep summary_previews current
+    with engine.begin() as conn:
+        backfill(conn)
+        content_hash_index.backfill(conn)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Integer, String, DateTime, Enum as SAEnum, Boolean
+from sqlalchemy import Integer, String, DateTime, Enum as SAEnum, Boolean, Index, text
 from datetime import datetime, UTC
 import enum
 from sqlalchemy.orm import Mapped, mapped_column
@@ -28,6 +28,10 @@ class JobType(str, enum.Enum):
 
 class JobORM(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # worker poll: status IN (pending, failed) -> job ids (covering, id rides along)
+        Index("ix_jobs_status_id", "status", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     # Store timezone-aware timestamps (UTC)
@@ -54,17 +58,25 @@ class UserORM(Base):
 # Minimal file model for tracking uploaded files (public alias + summaries relation)
 class FileORM(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        # list-files prefix filter (LIKE 'inbox/%') on Postgres; SQLite uses the unique index + range bounds
+        Index("ix_files_storage_path_pattern", "storage_path", postgresql_ops={"storage_path": "varchar_pattern_ops"}).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     original_name: Mapped[str] = mapped_column(String, index=True, nullable=False)
     storage_path: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     mime_type: Mapped[str | None] = mapped_column(String, nullable=True)
     size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    sha256: Mapped[str | None] = mapped_column(String, nullable=True)
+    sha256: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
 
 
 class SummaryORM(Base):
     __tablename__ = "summaries"
+    __table_args__ = (
+        # latest_summary: WHERE file_id = ? ORDER BY created_at DESC LIMIT 1
+        Index("ix_summaries_file_id_created_at", "file_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     file_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
@@ -72,8 +84,24 @@ class SummaryORM(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
 
 
+# Denormalized read model for get_all_summaries / list-files(kind=summaries): one small
+# row per summary, kept in sync by ORM events (app.services.summary_previews).
+class SummaryPreviewORM(Base):
+    __tablename__ = "summary_previews"
+
+    summary_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    file_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    preview: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
 class APIKeyORM(Base):
     __tablename__ = "api_keys"
+    __table_args__ = (
+        # verify_api_key: key_hash = ? AND revoked_at IS NULL (partial index holds active keys only)
+        Index("ix_api_keys_active_key_hash", "key_hash", sqlite_where=text("revoked_at IS NULL"), postgresql_where=text("revoked_at IS NULL")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
@@ -98,3 +126,39 @@ class SummarizerUsageORM(Base):
     file_name: Mapped[str | None] = mapped_column(String, nullable=True)
     prefix: Mapped[str | None] = mapped_column(String, nullable=True)
     fallback: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+
+# Auto-ingest scanner state: PROPFIND metadata of every file seen in a drop directory
+# plus one is_dir row per directory (its ETag lets a cycle skip an unchanged directory).
+class IngestScanStateORM(Base):
+    __tablename__ = "ingest_scan_state"
+
+    path: Mapped[str] = mapped_column(String, primary_key=True)
+    dir: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    is_dir: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    etag: Mapped[str | None] = mapped_column(String, nullable=True)
+    size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_action: Mapped[str | None] = mapped_column(String, nullable=True)  # ingested|skipped|summarized|error
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC), nullable=False)
+
+
+# Content-addressable index: sha256 -> canonical file (first one stored with that content).
+# file_id is NULL for content only seen by auto-ingest (copied into entries, no files row).
+class ContentHashORM(Base):
+    __tablename__ = "content_hashes"
+
+    sha256: Mapped[str] = mapped_column(String, primary_key=True)
+    file_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
+
+
+# WebDAV ETag -> sha256 learned when a file was hashed, so the same file version is
+# recognised from a PROPFIND listing without downloading it again.
+class ContentHashEtagORM(Base):
+    __tablename__ = "content_hash_etags"
+
+    etag: Mapped[str] = mapped_column(String, primary_key=True)
+    sha256: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
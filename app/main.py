@@ -9,11 +9,15 @@ from starlette.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1 import router as v1_router
 from app.api import public_alias
+from app.api import diag as diag_router
 from app.middleware.request_id import RequestIDMiddleware
 from app.middleware.rate_limit import select_rate_limiter
 from app.middleware.access_log import AccessLogMiddleware
 from app.middleware.request_metrics import RequestMetricsMiddleware
 from app.middleware.api_key_auth import ApiKeyAuthMiddleware
+from app.middleware.static_headers import StaticHeadersMiddleware
+from app.middleware.slow_requests import SlowRequestMiddleware
+from app.core.profiler import configure_slow_requests
 from app.database.database import get_session
 from sqlalchemy import text  # for readiness lightweight query
 from app.services.webdav_client import load_webdav_config
@@ -32,16 +36,34 @@ _SPEC_HASH_FILE = pathlib.Path(__file__).resolve().parent.parent / 'actions' / '
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # pragma: no cover
+  if settings.log_queue_enabled:
+    from app.core.logging_config import setup_logging
+    setup_logging(queue_mode=True, queue_size=settings.log_queue_size)
   try:
     logger.info("app_start", extra={"public_alias": settings.enable_public_alias})
   except Exception:
     pass
+  if metrics.multiprocess_enabled():
+    try:  # drop live gauges left behind by crashed/restarted workers
+      metrics.cleanup_dead_workers()
+    except Exception:
+      logger.exception("metrics_multiproc_cleanup_failed")
   # Ensure DB migrations are applied at startup (idempotent); ignore failures in readonly env
   try:  # pragma: no cover - operational path
     subprocess.run(["alembic", "upgrade", "head"], check=False, capture_output=True)
   except Exception:
     pass
 
+  # Queue cached summaries whose Nextcloud upload was lost (crash, redeploy, retries exhausted)
+  def _reconcile_summaries():  # pragma: no cover - needs Nextcloud
+    try:
+      from app.services import summary_store
+      summary_store.reconcile()
+    except Exception:
+      logger.exception("summary_reconcile_failed")
+
+  threading.Thread(target=_reconcile_summaries, name="summary-reconcile", daemon=True).start()
+
   # Background auto-ingest loop (thread + asyncio sleep coordination)
   from app.core.config import settings as live_settings
   if live_settings.auto_ingest_enabled:
@@ -72,6 +94,34 @@ async def lifespan(app: FastAPI):  # pragma: no cover
       stop.set()
   except Exception:
     pass
+  try:  # pragma: no cover - let queued auto-summaries finish before the process exits
+    from app.services import auto_summary
+    auto_summary.shutdown(live_settings.auto_summary_drain_seconds)
+  except Exception:
+    logger.exception("auto_summary_drain_failed")
+  try:  # pragma: no cover - upload summaries still queued for Nextcloud (auto-summaries above add to it)
+    from app.services import summary_store
+    summary_store.shutdown(live_settings.summary_writeback_drain_seconds)
+  except Exception:
+    logger.exception("summary_writeback_drain_failed")
+  try:  # pragma: no cover - stop text extraction worker processes
+    from app.services import extraction
+    extraction.shutdown()
+  except Exception:
+    logger.exception("extraction_shutdown_failed")
+  try:  # pragma: no cover - end the slow-request watchdog thread
+    recorder = getattr(app.state, "slow_requests", None)
+    if recorder is not None:
+      recorder.stop()
+  except Exception:
+    logger.exception("slow_request_watchdog_stop_failed")
+  try:  # pragma: no cover - write out batched API key last_used_at
+    from app.core.api_keys import last_used_flusher
+    last_used_flusher.stop()
+  except Exception:
+    logger.exception("api_key_last_used_flush_failed")
+  from app.core.logging_config import shutdown_logging
+  shutdown_logging()  # drain queued log records last
 
 logger = logging.getLogger("startup")
 
@@ -79,6 +129,8 @@ def create_app() -> FastAPI:
   """Application factory to allow fresh instances in tests with mutated settings."""
   from app.core.config import settings as live_settings  # late import for updated values
   _app = FastAPI(title=live_settings.api_name, version="5.2-public-ok2", lifespan=lifespan)
+  from app.services import summary_previews
+  summary_previews.register()  # ORM events that keep summary_previews current
   # --- Secret guard: prevent accidental use of production OpenAI keys locally ---
   # Heuristic: project (sk-proj-) or regular (sk-live, sk-prod) or long length >= 70
   key = live_settings.openai_api_key
@@ -100,11 +152,16 @@ def create_app() -> FastAPI:
   _app.openapi = custom_openapi  # type: ignore
   # Middleware
   _app.add_middleware(RequestMetricsMiddleware)
+  slow_recorder = configure_slow_requests(live_settings.slow_request_threshold_ms, live_settings.slow_request_buffer_size)
+  _app.state.slow_requests = slow_recorder  # watchdog stopped in the lifespan teardown
+  if slow_recorder is not None:  # inside RequestIDMiddleware: entries are keyed by request id
+    _app.add_middleware(SlowRequestMiddleware, recorder=slow_recorder)
   _app.add_middleware(RequestIDMiddleware)
-  # Attach API key (non-blocking) before rate limiter so limiter can key by API key id
-  _app.add_middleware(ApiKeyAuthMiddleware)
+  # add_middleware wraps outermost-last: the limiter is added first so ApiKeyAuth runs
+  # before it and the limiter can key by API key id
   RateLimiterCls = select_rate_limiter()
   _app.add_middleware(RateLimiterCls)
+  _app.add_middleware(ApiKeyAuthMiddleware)
   # Structured access log after rate limiting (to log only accepted requests)
   if live_settings.access_log_enabled:
     try:
@@ -126,6 +183,8 @@ def create_app() -> FastAPI:
   _app.include_router(v1_router.api_router, prefix="/api/v1")  # type: ignore[attr-defined]
   if live_settings.enable_public_alias:
     _app.include_router(public_alias.router)
+  if live_settings.profiler_enabled:
+    _app.include_router(diag_router.router)
   # Optional /diag
   if live_settings.enable_diag:
     @_app.api_route("/diag", methods=["GET", "POST"])
@@ -178,20 +237,10 @@ app = create_app()
 
 # Global machine/version identifiers (env overridable)
 from os import getenv as _getenv  # localized import to avoid polluting top-level namespace
-from typing import Callable, Awaitable
-from starlette.responses import Response as StarletteResponse
 MACHINE_ID = _getenv("FLY_MACHINE_ID", "unknown")
 APP_VERSION = _getenv("APP_VERSION", "5.2-public-ok2")
 
-@app.middleware("http")
-async def add_ids(request: Request, call_next: Callable[[Request], Awaitable[StarletteResponse]]) -> StarletteResponse:  # pragma: no cover - trivial header injection
-  resp = await call_next(request)
-  try:  # defensive: never break pipeline due to header injection
-    resp.headers["x-machine-id"] = MACHINE_ID
-    resp.headers["x-app-version"] = APP_VERSION
-  except Exception:
-    pass
-  return resp
+app.add_middleware(StaticHeadersMiddleware, headers={"x-machine-id": MACHINE_ID, "x-app-version": APP_VERSION})
 
 @app.get("/health")
 def health(request: Request) -> JSONResponse:  # enhanced public health
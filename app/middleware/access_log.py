@@ -1,14 +1,30 @@
 from __future__ import annotations
+import logging
+import random
 import time
-import json
 from starlette.types import ASGIApp, Receive, Scope, Send, Message
 from typing import Dict, Any
+from app.core.config import settings
+
+
+def parse_sample_rates(raw: str | None) -> Dict[str, float]:
+    """'/health=0.01,/metrics=0' -> {'/health': 0.01, '/metrics': 0.0}"""
+    rates: Dict[str, float] = {}
+    for part in (raw or "").split(","):
+        path, sep, rate = part.partition("=")
+        if sep and path.strip():
+            try:
+                rates[path.strip()] = min(1.0, max(0.0, float(rate)))
+            except ValueError:
+                continue
+    return rates
+
 
 class AccessLogMiddleware:
-    def __init__(self, app: ASGIApp, *, logger_name: str = "access"):
+    def __init__(self, app: ASGIApp, *, logger_name: str = "access", sample_rates: Dict[str, float] | None = None):
         self.app = app
-        import logging
         self.logger = logging.getLogger(logger_name)
+        self.sample_rates = parse_sample_rates(settings.access_log_sample_rates) if sample_rates is None else sample_rates
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
         if scope["type"] != "http":
@@ -26,16 +42,26 @@ class AccessLogMiddleware:
 
         try:
             await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_holder.setdefault("status", 500)  # ServerErrorMiddleware answers outside us
+            raise
         finally:
             duration = time.time() - start
             status = status_holder.get("status", 0)
-            record: Dict[str, Any] = {
-                "method": method,
-                "path": path,
-                "status": status,
-                "duration_ms": round(duration * 1000, 3),
-            }
-            try:
-                self.logger.info(json.dumps(record, separators=(",", ":")))
-            except Exception:
-                pass
+            rate = self.sample_rates.get(path, 1.0)  # type: ignore[arg-type]
+            # High-volume probes are sampled; failures are always logged
+            if (rate >= 1.0 or status >= 500 or status == 0 or random.random() < rate) and self.logger.isEnabledFor(logging.INFO):
+                record: Dict[str, Any] = {
+                    "method": method,
+                    "path": path,
+                    "status": status,
+                    "duration_ms": round(duration * 1000, 3),
+                }
+                if rate < 1.0:
+                    record["sample_rate"] = rate
+                try:
+                    # Fields travel as extra= and the message is %-formatted lazily: both are
+                    # rendered in the formatter (listener thread in queue mode), not on the request path
+                    self.logger.info("%s %s %s %.1fms", method, path, status, record["duration_ms"], extra=record)
+                except Exception:
+                    pass
@@ -1,26 +1,36 @@
 from __future__ import annotations
-"""API Key auth middleware (non-blocking).
+"""API Key auth middleware (non-blocking, raw ASGI).
 
 If X-API-Key header present and valid, attaches request.state.api_key_id for downstream
 rate limiter / handlers. Does NOT reject on invalid/missing key (public endpoints remain
 accessible); explicit dependencies still enforce auth where needed.
 """
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
-from app.core.api_keys import verify_api_key
-from app.database.database import get_session
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.api_keys import cached_api_key, verify_api_key_cached
+from app.core.cache import MISSING
 
-class ApiKeyAuthMiddleware(BaseHTTPMiddleware):  # pragma: no cover
-    async def dispatch(self, request: Request, call_next):  # type: ignore[no-untyped-def]
-        key = request.headers.get('X-API-Key')
-        if key:
-            try:
-                with get_session() as s:  # type: ignore[assignment]
-                    rec = verify_api_key(s, key)
+class ApiKeyAuthMiddleware:  # pragma: no cover
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            key = None
+            for name, value in scope["headers"]:
+                if name == b"x-api-key":
+                    key = value.decode("latin-1")
+                    break
+            if key:
+                try:
+                    # Cache hit stays on the event loop; a miss queries the DB in the threadpool
+                    rec = cached_api_key(key)
+                    if rec is MISSING:
+                        rec = await run_in_threadpool(verify_api_key_cached, key)
                     if rec:
-                        setattr(request.state, 'api_key_id', rec.id)
-            except Exception:
-                pass
-        return await call_next(request)
+                        scope.setdefault("state", {})["api_key_id"] = rec.id  # type: ignore[union-attr]
+                except Exception:
+                    pass
+        await self.app(scope, receive, send)
 
 __all__ = ["ApiKeyAuthMiddleware"]
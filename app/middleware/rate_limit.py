@@ -2,37 +2,65 @@ from __future__ import annotations
 """Rate limiting middleware.
 
 Provides:
- - InMemoryRateLimiter (default for dev/testing)
- - RedisRateLimiter (if REDIS_URL configured) using INCR+EXPIRE per IP window.
+ - InMemoryRateLimiter (default for dev/testing) on the constant-space GCRA engine (app.core.gcra)
+ - RedisRateLimiter (if REDIS_URL configured): the same GCRA evaluated atomically in Redis
+   by one Lua script per request, shared by all workers; falls back to the local engine
+   while Redis is unreachable.
 """
+import logging
+import math
 import time
-from collections import defaultdict, deque
-from typing import Deque, Dict, Optional
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Any, Optional
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import os
 from app.core.config import settings
 from app.core import metrics
+from app.core.gcra import Decision, GCRALimiter, Rate, parse_route_limits
 
 try:  # optional dependency
     import redis  # type: ignore
+    import redis.asyncio as aioredis  # type: ignore
 except ImportError:  # pragma: no cover
     redis = None  # type: ignore
+    aioredis = None  # type: ignore
 
 current_rate_limiter: Optional['InMemoryRateLimiter'] = None
+log = logging.getLogger("app.rate_limit")
 
 
-class InMemoryRateLimiter(BaseHTTPMiddleware):
-    def __init__(self, app):  # type: ignore[no-untyped-def]
-        super().__init__(app)
+def rate_limit_key(scope: Scope) -> str:
+    """Client identity: API key id (strategy apikey, set by ApiKeyAuthMiddleware) or client IP."""
+    state = scope.get("state") or {}
+    if settings.rate_limit_key_strategy == 'apikey' and 'api_key_id' in state:
+        return f"api_key:{state['api_key_id']}"
+    client = scope.get("client")
+    return client[0] if client else 'unknown'
+
+
+class InMemoryRateLimiter:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
         self.window_seconds = 60
         self.max_requests = settings.rate_limit_requests_per_minute
-        self.buckets: Dict[str, Deque[float]] = defaultdict(deque)
+        self.engine = GCRALimiter(max_keys=settings.rate_limit_max_keys)
+        # key -> theoretical arrival time (one float per client, bounded LRU)
+        self.buckets = self.engine.tat
+        self.route_limits = parse_route_limits(settings.rate_limit_route_limits)
         global current_rate_limiter
         current_rate_limiter = self
 
-    async def dispatch(self, request: Request, call_next):  # type: ignore[no-untyped-def]
-        path = request.url.path
+    def _rate_for(self, path: str) -> tuple[str, Rate]:
+        for prefix, rate in self.route_limits:
+            if path.startswith(prefix):
+                return prefix, rate
+        return '', Rate(self.max_requests, float(self.window_seconds))
+
+    async def _hit(self, key: str, rate: Rate) -> Decision:
+        return self.engine.hit(key, rate)
+
+    def _bypass_paths(self) -> set[str]:
         # Build bypass set once (cache on instance)
         if not hasattr(self, '_bypass_set'):
             default_public = {"/read-file", "/read-file/", "/list-files", "/list-files/", "/write-file", "/write-file/", "/get_all_summaries", "/get_all_summaries/", "/version"}
@@ -44,112 +72,122 @@ class InMemoryRateLimiter(BaseHTTPMiddleware):
                     if p:
                         dynamic.add(p if p.startswith('/') else '/' + p)
             self._bypass_set = default_public.union(dynamic)
-        if path in self._bypass_set:
-            response = await call_next(request)
-            try:
-                response.headers['X-RateLimit-Bypass'] = 'true'
-            except Exception:
-                pass
-            return response
-        # Determine key: API key id if strategy apikey and header present (later set by auth middleware), else IP
-        key_basis = 'unknown'
-        if settings.rate_limit_key_strategy == 'apikey' and hasattr(request.state, 'api_key_id'):
-            key_basis = f"api_key:{getattr(request.state, 'api_key_id')}"
-        else:
-            key_basis = request.client.host if request.client else 'unknown'
-        client_ip = key_basis
-        now = time.time()
-        dq = self.buckets[client_ip]
-        while dq and now - dq[0] > self.window_seconds:
-            dq.popleft()
-        remaining = self.max_requests - len(dq)
-        if remaining <= 0:
+        return self._bypass_set
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        if path in self._bypass_paths():
+            await self.app(scope, receive, _with_headers(send, {'X-RateLimit-Bypass': 'true'}))
+            return
+        key_basis = rate_limit_key(scope)
+        # Per-route rules get their own bucket per client; the global rule keys on the client only
+        route, rate = self._rate_for(path)
+        allowed, remaining, retry_after, reset_after = await self._hit(f"{route}|{key_basis}" if route else key_basis, rate)
+        reset_epoch = str(int(time.time() + reset_after))
+        if not allowed:
             try:
-                metrics.rate_limit_drops_total.labels(path=path).inc()
+                # Routing has not run yet: label by the matched limit rule, not the raw path
+                metrics.rate_limit_drops_total.labels(path=route or 'default').inc()
             except Exception:
                 pass
-            resp = Response(status_code=429, content='Too Many Requests')
-            resp.headers['X-RateLimit-Limit'] = str(self.max_requests)
-            resp.headers['X-RateLimit-Remaining'] = '0'
-            # Reset = seconds until current window ends (epoch seconds)
-            window_end = int(now - (now % self.window_seconds) + self.window_seconds)
-            resp.headers['X-RateLimit-Reset'] = str(window_end)
-            # Compute dynamic retry-after (seconds until earliest event exits)
-            retry_after = 60
-            if dq:
-                oldest_age = now - dq[0]
-                retry_after = max(1, int(60 - oldest_age))
-            resp.headers['Retry-After'] = str(retry_after)
-            return resp
-        dq.append(now)
-    # counting now done in dedicated timing middleware; keep minimal compatibility
-        response = await call_next(request)
-        # Add headers (best-effort)
-        try:
-            response.headers['X-RateLimit-Limit'] = str(self.max_requests)
-            used = len(dq)
-            rem = max(0, self.max_requests - used)
-            response.headers['X-RateLimit-Remaining'] = str(rem)
-            window_end = int(now - (now % self.window_seconds) + self.window_seconds)
-            response.headers['X-RateLimit-Reset'] = str(window_end)
-            if path not in getattr(self, '_bypass_set', set()):
-                response.headers['X-RateLimit-Bypass'] = 'false'
-        except Exception:
-            pass
-        return response
-
-class RedisRateLimiter(BaseHTTPMiddleware):  # pragma: no cover - requires redis runtime
-    def __init__(self, app):  # type: ignore[no-untyped-def]
+            resp = Response(status_code=429, content='Too Many Requests', headers={
+                'X-RateLimit-Limit': str(rate.limit),
+                'X-RateLimit-Remaining': '0',
+                'X-RateLimit-Reset': reset_epoch,
+                'Retry-After': str(max(1, math.ceil(retry_after))),
+            })
+            await resp(scope, receive, send)
+            return
+        await self.app(scope, receive, _with_headers(send, {
+            'X-RateLimit-Limit': str(rate.limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': reset_epoch,
+            'X-RateLimit-Bypass': 'false',
+        }))
+
+
+def _with_headers(send: Send, extra: dict[str, str]) -> Send:
+    async def send_wrapper(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            for name, value in extra.items():
+                headers[name] = value
+        await send(message)
+    return send_wrapper
+
+
+# GCRA in Redis. KEYS[1] = bucket key, ARGV = limit, period_ms. Uses the Redis clock so
+# all workers agree on "now"; the TAT key expires once the bucket is full again.
+# Reply: {allowed, remaining, retry_after_ms, reset_after_ms}
+GCRA_LUA = """
+if redis.replicate_commands then redis.replicate_commands() end
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local interval = period / limit
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if now < allow_at then
+  return {0, 0, math.ceil(allow_at - now), math.ceil(tat - now)}
+end
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+local remaining = math.floor((period - (new_tat - now)) / interval + 1e-9)
+return {1, remaining, 0, math.ceil(new_tat - now)}
+"""
+
+
+class RedisRateLimiter(InMemoryRateLimiter):
+    """Cluster-wide limiter; the inherited local engine is the fallback while Redis is down."""
+
+    def __init__(self, app: ASGIApp, client: Any = None) -> None:
         super().__init__(app)
-        if not settings.redis_url:
-            raise RuntimeError("REDIS_URL not configured")
-        if redis is None:
-            raise RuntimeError("redis-py not installed; add 'redis' to requirements.txt")
-        self.r = redis.Redis.from_url(settings.redis_url, decode_responses=True)
-        self.window_seconds = 60
-        self.max_requests = settings.rate_limit_requests_per_minute
+        if client is None:
+            if not settings.redis_url:
+                raise RuntimeError("REDIS_URL not configured")
+            if aioredis is None:
+                raise RuntimeError("redis-py not installed; pip install -r requirements-redis.txt")
+            timeout = settings.rate_limit_redis_timeout_ms / 1000.0
+            client = aioredis.Redis.from_url(settings.redis_url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.r = client
+        self.script = client.register_script(GCRA_LUA)
+        # monotonic time until which Redis is skipped after a failure (circuit open)
+        self._redis_down_until = 0.0
 
-    async def dispatch(self, request: Request, call_next):  # type: ignore[no-untyped-def]
-        client_ip = request.client.host if request.client else 'unknown'
-        key = f"rl:{client_ip}:{int(time.time() // self.window_seconds)}"
-        # Use pipeline for atomicity
-        pipe = self.r.pipeline()
-        pipe.incr(key, 1)
-        pipe.expire(key, self.window_seconds)
-        current, _ = pipe.execute()
-        current_i = int(current)
-        if current_i > self.max_requests:
+    async def _hit(self, key: str, rate: Rate) -> Decision:
+        if time.monotonic() >= self._redis_down_until:
             try:
-                metrics.rate_limit_drops_total.labels(path=request.url.path).inc()
-            except Exception:
-                pass
-            resp = Response(status_code=429, content='Too Many Requests')
-            resp.headers['X-RateLimit-Limit'] = str(self.max_requests)
-            resp.headers['X-RateLimit-Remaining'] = '0'
-            resp.headers['Retry-After'] = '60'
-            return resp
-    # request counting handled centrally
-        response = await call_next(request)
-        try:
-            response.headers['X-RateLimit-Limit'] = str(self.max_requests)
-            rem = max(0, self.max_requests - current_i)
-            response.headers['X-RateLimit-Remaining'] = str(rem)
-        except Exception:  # pragma: no cover
-            pass
-        return response
+                allowed, remaining, retry_ms, reset_ms = await self.script(keys=[f"rl:{key}"], args=[rate.limit, int(rate.period * 1000)])
+                return (bool(int(allowed)), int(remaining), int(retry_ms) / 1000.0, int(reset_ms) / 1000.0)
+            except Exception as exc:
+                self._redis_down_until = time.monotonic() + settings.rate_limit_redis_retry_seconds
+                log.warning("rate_limit_redis_unavailable", extra={"error": str(exc)[:200]})
+                try:
+                    metrics.rate_limit_redis_fallback_total.inc()
+                except Exception:
+                    pass
+        return self.engine.hit(key, rate)
 
 
 def select_rate_limiter():  # returns class
     if os.getenv('BB_TESTING') == '1':  # disable limiting in test runs
         return NoOpRateLimiter
     if settings.redis_url:
-        if redis is not None:
+        if aioredis is not None:
             return RedisRateLimiter
     return InMemoryRateLimiter
 
 
-class NoOpRateLimiter(BaseHTTPMiddleware):  # pragma: no cover - trivial
-    async def dispatch(self, request, call_next):  # type: ignore[no-untyped-def]
-        return await call_next(request)
+class NoOpRateLimiter:  # pragma: no cover - trivial
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
 
-__all__ = ['InMemoryRateLimiter', 'RedisRateLimiter', 'select_rate_limiter', 'current_rate_limiter', 'NoOpRateLimiter']
+__all__ = ['InMemoryRateLimiter', 'RedisRateLimiter', 'select_rate_limiter', 'current_rate_limiter', 'NoOpRateLimiter', 'rate_limit_key', 'GCRA_LUA']
@@ -1,9 +1,9 @@
 import uuid
 import contextvars
 from typing import Optional
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core import timing
 
 _request_id_ctx: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
     "request_id", default=None
@@ -14,20 +14,37 @@ def get_request_id() -> Optional[str]:
     return _request_id_ctx.get()
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Middleware, die pro Request eine UUID setzt und als Header zurückgibt."""
+class RequestIDMiddleware:
+    """Middleware, die pro Request eine UUID setzt und als Header zurückgibt (raw ASGI).
 
-    def __init__(self, app, header_name: str = "X-Request-ID") -> None:  # type: ignore[override]
-        super().__init__(app)
+    Öffnet außerdem den Span-Collector (app.core.timing) für den Request und liefert
+    die Stage-Zeiten als ``Server-Timing`` Header aus.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Request-ID") -> None:
+        self.app = app
         self.header_name = header_name
 
-    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         rid = uuid.uuid4().hex
         token = _request_id_ctx.set(rid)
-        request.state.request_id = rid
+        scope.setdefault("state", {})["request_id"] = rid  # request.state.request_id
+        timings_token = timing.begin(rid)
+        timings = timing.current()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers[self.header_name] = rid
+                # Stages finished before the body starts; streamed work is not included
+                headers["Server-Timing"] = timings.server_timing()  # type: ignore[union-attr]
+            await send(message)
+
         try:
-            response: Response = await call_next(request)
-            response.headers[self.header_name] = rid
-            return response
+            await self.app(scope, receive, send_wrapper)
         finally:
+            timing.end(timings_token)
             _request_id_ctx.reset(token)
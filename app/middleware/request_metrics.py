@@ -1,36 +1,60 @@
 from __future__ import annotations
 import time
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from app.core.metrics import http_requests_total, http_request_duration_seconds
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import http_requests_in_progress, http_requests_total, http_request_duration_seconds
 
-class RequestMetricsMiddleware(BaseHTTPMiddleware):
-    """Collect per-request Prometheus metrics.
+UNMATCHED = "unmatched"
+_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "PROPFIND", "MKCOL"})
+
+
+def route_label(scope: Scope) -> str:
+    """Route template set on the scope by the router during dispatch, else ``unmatched``."""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED
+    return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED)
+
+
+class RequestMetricsMiddleware:
+    """Collect per-request Prometheus metrics (raw ASGI).
 
     Records:
       - http_requests_total{method,path,status}
       - http_request_duration_seconds histogram
+      - http_requests_in_progress gauge
+    ``path`` is the matched route template (``/api/v1/entries/{entry_id}``), never the
+    raw URL, so label cardinality is bounded by the number of routes; requests that match
+    no route (404s, scanners) share the ``unmatched`` series.
     Excludes /metrics to avoid self-scrape noise.
     """
-    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
-        path = request.url.path
-        if path == '/metrics':
-            return await call_next(request)
-        method = request.method
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == '/metrics':
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"] if scope["method"] in _METHODS else "OTHER"
         start = time.time()
         status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
         try:
-            response: Response = await call_next(request)
-            status_code = response.status_code
-            return response
+            await self.app(scope, receive, send_wrapper)
         finally:
+            http_requests_in_progress.dec()
             dur = time.time() - start
-            label_path = path if len(path) < 100 else path[:97] + '...'
+            label_path = route_label(scope)
             try:
                 http_requests_total.labels(method=method, path=label_path, status=str(status_code)).inc()
                 http_request_duration_seconds.labels(method=method, path=label_path).observe(dur)
             except Exception:
                 pass
 
-__all__ = ["RequestMetricsMiddleware"]
+__all__ = ["RequestMetricsMiddleware", "route_label", "UNMATCHED"]
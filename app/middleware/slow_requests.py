@@ -0,0 +1,38 @@
+from __future__ import annotations
+"""Registers in-flight requests with the slow-request recorder (raw ASGI).
+
+Must run inside RequestIDMiddleware: entries are keyed by ``scope["state"]["request_id"]``.
+"""
+from typing import Dict
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.profiler import SlowRequestRecorder
+
+
+class SlowRequestMiddleware:
+    def __init__(self, app: ASGIApp, recorder: SlowRequestRecorder) -> None:
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        rid = (scope.get("state") or {}).get("request_id")
+        if scope["type"] != "http" or rid is None:
+            await self.app(scope, receive, send)
+            return
+        status_holder: Dict[str, int] = {}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_holder["status"] = int(message.get("status", 0))
+            await send(message)
+
+        self.recorder.begin(rid, scope.get("method", ""), scope["path"])
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_holder.setdefault("status", 500)
+            raise
+        finally:
+            self.recorder.end(rid, status_holder.get("status", 0))
+
+
+__all__ = ["SlowRequestMiddleware"]
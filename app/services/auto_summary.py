@@ -0,0 +1,151 @@
+from __future__ import annotations
+"""Bounded executor for background auto-summaries.
+
+A fixed pool of worker threads takes jobs from a keyed queue (one key per file):
+
+* the queue holds at most ``max_queue`` pending jobs; submissions beyond that are
+  rejected and counted, the write that triggered them still succeeds;
+* a file rewritten while its summary is still pending replaces the pending job
+  (latest content wins) instead of queueing a second LLM call;
+* jobs of the same key never run concurrently, so an older summary cannot finish
+  after (and overwrite) a newer one;
+* ``drain`` stops intake and waits for queued and running jobs, used by the lifespan
+  teardown.
+
+Jobs are plain callables; callers pass ``timing.bind(fn)`` so spans keep the request id.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Set
+
+from app.core import metrics
+from app.core.config import get_settings
+
+log = logging.getLogger("app.auto_summary")
+
+
+class _Job(NamedTuple):
+    fn: Callable[..., Any]
+    args: tuple
+    queued_at: float
+
+
+class AutoSummaryExecutor:
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self._pending: "OrderedDict[str, _Job]" = OrderedDict()
+        self._running: Set[str] = set()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._closed = False
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any) -> str:
+        """Queue ``fn(*args)`` for ``key``; returns ``queued``, ``coalesced`` or ``rejected``."""
+        with self._cond:
+            if self._closed:
+                result = "rejected"
+            elif key in self._pending:
+                queued_at = self._pending[key].queued_at  # keep its place in line
+                self._pending[key] = _Job(fn, args, queued_at)
+                result = "coalesced"
+            elif len(self._pending) >= self.max_queue:
+                result = "rejected"
+            else:
+                self._pending[key] = _Job(fn, args, time.perf_counter())
+                result = "queued"
+                if len(self._threads) < self.workers:
+                    t = threading.Thread(target=self._run, name=f"auto-summary-{len(self._threads)}", daemon=True)
+                    self._threads.append(t)
+                    t.start()
+                self._cond.notify()
+            depth = len(self._pending)
+        try:
+            metrics.auto_summary_submissions_total.labels(result=result).inc()
+            metrics.auto_summary_queue_depth.set(depth)
+        except Exception:  # pragma: no cover
+            pass
+        if result == "rejected":
+            log.warning("auto_summary_rejected", extra={"key": key, "queue_depth": depth})
+        return result
+
+    def _next(self) -> Optional[tuple[str, _Job]]:
+        # Caller holds the lock. Oldest pending job whose key is not running right now.
+        for key in self._pending:
+            if key not in self._running:
+                return key, self._pending.pop(key)
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                item = self._next()
+                while item is None:
+                    if self._closed and not self._pending:
+                        return
+                    self._cond.wait()
+                    item = self._next()
+                key, job = item
+                self._running.add(key)
+                depth = len(self._pending)
+            try:
+                metrics.auto_summary_queue_depth.set(depth)
+                metrics.auto_summary_queue_wait_seconds.observe(time.perf_counter() - job.queued_at)
+            except Exception:  # pragma: no cover
+                pass
+            try:
+                job.fn(*job.args)
+            except Exception:  # pragma: no cover - jobs log their own failures
+                log.exception("auto_summary_job_failed", extra={"key": key})
+            finally:
+                with self._cond:
+                    self._running.discard(key)
+                    self._cond.notify_all()  # a pending job of this key may run now; drain may finish
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"pending": len(self._pending), "running": len(self._running), "workers": len(self._threads)}
+
+    def drain(self, timeout: float) -> bool:
+        """Stop intake, wait up to ``timeout`` for queued and running jobs. True if all finished."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            while self._pending or self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not self._threads:  # nothing will ever run them
+                    break
+                self._cond.wait(remaining)
+            left = len(self._pending) + len(self._running)
+        if left:
+            log.warning("auto_summary_drain_timeout", extra={"unfinished": left})
+        return left == 0
+
+
+_executor: Optional[AutoSummaryExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> AutoSummaryExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            settings = get_settings()
+            _executor = AutoSummaryExecutor(settings.auto_summary_workers, settings.auto_summary_queue_max)
+        return _executor
+
+
+def shutdown(timeout: float) -> bool:
+    """Drain the shared executor (lifespan teardown); the next submit starts a fresh one."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    return executor.drain(timeout) if executor is not None else True
+
+
+__all__ = ["AutoSummaryExecutor", "get_executor", "shutdown"]
@@ -0,0 +1,142 @@
+from __future__ import annotations
+"""Content-addressable dedup index.
+
+``content_hashes`` maps sha256 -> canonical file id (+ size); the first file stored with
+some content stays canonical. Upload, public write, auto-ingest and the manual-upload
+worker all check and fill it, so the same bytes are not stored or processed twice.
+A file rewritten with other content, or moved away, gives up its entry (``release``,
+``record_path_content``); ``lookup`` also
+re-checks ``files.sha256`` so a missed release cannot report content that is gone.
+Rows without a file id (content auto-ingest copied into entries) cannot be re-checked:
+callers only treat rows with a file id as "already stored".
+
+Remote files are identified without downloading them where possible:
+
+1. the server checksum (``oc:checksums`` SHA256, present for files uploaded with
+   ``OC-Checksum``; ``DavEntry.sha256`` from ``list_dir_info``),
+2. the ETag of a file version hashed before (``content_hash_etags``),
+3. otherwise the file is stream-hashed (``get_file_sha256``, body not kept in memory).
+"""
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import exists, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database.models import ContentHashEtagORM, ContentHashORM, FileORM
+from app.services.webdav_client import DavEntry, get_file_sha256
+
+_hashes = ContentHashORM.__table__
+_etags = ContentHashEtagORM.__table__
+
+
+def _insert_ignore(session: Session, table: Any, values: dict[str, Any]) -> None:
+    # Concurrent writers may register the same content: the first row wins, no IntegrityError
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert  # type: ignore[assignment]
+    else:  # pragma: no cover
+        pk = list(table.primary_key.columns)[0]
+        if session.execute(select(pk).where(pk == values[pk.name])).first() is None:
+            session.execute(insert(table).values(**values))
+        return
+    session.execute(dialect_insert(table).values(**values).on_conflict_do_nothing())
+
+
+def lookup(session: Session, sha256: str) -> Optional[ContentHashORM]:
+    """Index entry of ``sha256``; an entry whose file was rewritten since is repaired first."""
+    row = session.get(ContentHashORM, sha256)
+    if row is not None and row.file_id is not None:
+        current = session.execute(select(FileORM.sha256).where(FileORM.id == row.file_id)).first()
+        if current is not None and current[0] != sha256:
+            return _repoint(session, row)
+    return row
+
+
+def _repoint(session: Session, row: ContentHashORM) -> Optional[ContentHashORM]:
+    # Another file that still holds the content becomes canonical; none left: drop the entry
+    other = session.execute(
+        select(func.min(FileORM.id)).where(FileORM.sha256 == row.sha256, FileORM.id != row.file_id)
+    ).scalar()
+    if other is None:
+        session.delete(row)
+        session.flush()
+        return None
+    row.file_id = other
+    return row
+
+
+def release(session: Session, sha256: str, file_id: int) -> None:
+    """``file_id`` no longer holds ``sha256`` (rewritten): repoint or drop its index entry."""
+    row = session.get(ContentHashORM, sha256)
+    if row is not None and row.file_id == file_id:
+        _repoint(session, row)
+
+
+def record_path_content(session: Session, storage_path: str, sha256: Optional[str],
+                        size: Optional[int] = None) -> Optional[int]:
+    """The file at ``storage_path`` was rewritten or moved away (``sha256`` None): keep its
+    ``files`` row and the index current. Returns the file id, None without a row."""
+    row = session.execute(select(FileORM).where(FileORM.storage_path == storage_path)).scalars().first()
+    if row is None:
+        return None
+    if row.sha256 and row.sha256 != sha256:
+        release(session, row.sha256, row.id)
+    row.sha256 = sha256
+    if sha256:
+        row.size_bytes = size
+    session.flush()  # no autoflush: lookups in this session must see the new hash
+    if sha256:
+        register(session, sha256, row.id, size)
+    return row.id
+
+
+def register(session: Session, sha256: str, file_id: Optional[int] = None, size: Optional[int] = None,
+             etag: Optional[str] = None) -> None:
+    """Record content (keeps an existing canonical file; fills a missing file id)."""
+    _insert_ignore(session, _hashes, {"sha256": sha256, "file_id": file_id, "size_bytes": size})
+    if file_id is not None:
+        row = session.get(ContentHashORM, sha256)
+        if row is not None and row.file_id is None:
+            row.file_id = file_id
+    if etag:
+        remember_etag(session, etag, sha256)
+
+
+def remember_etag(session: Session, etag: str, sha256: str) -> None:
+    _insert_ignore(session, _etags, {"etag": etag, "sha256": sha256})
+
+
+def known_sha256(session: Session, entry: DavEntry) -> Optional[str]:
+    """sha256 of a listed remote file without downloading it, if the server or the index knows it."""
+    if entry.sha256:
+        return entry.sha256
+    if entry.etag:
+        return session.execute(select(ContentHashEtagORM.sha256).where(ContentHashEtagORM.etag == entry.etag)).scalar_one_or_none()
+    return None
+
+
+def remote_sha256(session: Session, entry: DavEntry) -> Tuple[str, Optional[int], bool]:
+    """(sha256, size, downloaded) of a remote file; stream-hashes only when nothing is known."""
+    sha = known_sha256(session, entry)
+    if sha:
+        return sha, entry.size, False
+    sha, size = get_file_sha256(entry.path)
+    if entry.etag:
+        remember_etag(session, entry.etag, sha)
+    return sha, size, True
+
+
+def backfill(connection: Any) -> int:
+    """Index files that have a sha256 but no entry yet (lowest id per hash is canonical)."""
+    first = select(func.min(FileORM.id)).where(FileORM.sha256.isnot(None)).group_by(FileORM.sha256)
+    src = (
+        select(FileORM.sha256, FileORM.id, FileORM.size_bytes, func.current_timestamp())
+        .where(FileORM.id.in_(first), ~exists().where(_hashes.c.sha256 == FileORM.sha256))
+    )
+    res = connection.execute(insert(_hashes).from_select(["sha256", "file_id", "size_bytes", "created_at"], src))
+    return res.rowcount or 0
+
+
+__all__ = ["lookup", "register", "release", "record_path_content", "remember_etag", "known_sha256", "remote_sha256", "backfill"]
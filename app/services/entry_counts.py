@@ -0,0 +1,78 @@
+from __future__ import annotations
+"""Cached totals for the entries and files tables.
+
+COUNT(*) over entries or files is a full scan and the value barely changes between list
+calls. The cache is keyed per database URL and table, invalidated by ORM insert/delete
+events in this process and bounded by a short TTL so writes from other processes
+(worker.py) show up.
+"""
+import threading
+import time
+from typing import Any, Dict, Tuple
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.database.models import EntryORM, FileORM
+
+_lock = threading.Lock()
+_counts: Dict[Tuple[str, str], Tuple[float, int]] = {}  # (db url, table) -> (computed_at, total)
+
+
+def _db_key(session: Session) -> str:
+    return str(session.get_bind().url)
+
+
+def invalidate_entry_count() -> None:
+    with _lock:
+        _counts.clear()
+
+
+def _fresh(key: Tuple[str, str]) -> int | None:
+    ttl = settings.entries_count_cache_ttl_seconds
+    with _lock:
+        hit = _counts.get(key)
+    if hit is not None and ttl > 0 and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+    return None
+
+
+def _store(key: Tuple[str, str], total: int) -> int:
+    with _lock:
+        _counts[key] = (time.monotonic(), total)
+    return total
+
+
+def cached_entry_count(session: Session) -> int:
+    key = (_db_key(session), EntryORM.__tablename__)
+    hit = _fresh(key)
+    if hit is not None:
+        return hit
+    return _store(key, int(session.execute(select(func.count(EntryORM.id))).scalar() or 0))
+
+
+async def _cached_count_async(session: AsyncSession, model: Any) -> int:
+    key = (str(session.bind.url), model.__tablename__)
+    hit = _fresh(key)
+    if hit is not None:
+        return hit
+    return _store(key, int((await session.execute(select(func.count(model.id)))).scalar() or 0))
+
+
+async def cached_entry_count_async(session: AsyncSession) -> int:
+    return await _cached_count_async(session, EntryORM)
+
+
+async def cached_file_count_async(session: AsyncSession) -> int:
+    return await _cached_count_async(session, FileORM)
+
+
+@event.listens_for(EntryORM, "after_insert")
+@event.listens_for(EntryORM, "after_delete")
+@event.listens_for(FileORM, "after_insert")
+@event.listens_for(FileORM, "after_delete")
+def _entry_changed(mapper, connection, target) -> None:  # type: ignore[no-untyped-def]
+    invalidate_entry_count()
+
+
+__all__ = ["cached_entry_count", "cached_entry_count_async", "cached_file_count_async", "invalidate_entry_count"]
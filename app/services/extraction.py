@@ -0,0 +1,206 @@
+from __future__ import annotations
+"""Text extraction for ingested documents.
+
+Extractors are registered per file extension and MIME type (``@extractor``) and turn raw
+bytes into text: plain text, Markdown, HTML (tags, scripts and styles removed) and PDF
+via pdfminer.six (optional; PDFs fail with ExtractionError if it is missing).
+
+``extract`` runs the extractor in a process pool (INGEST_EXTRACT_WORKERS processes) so
+parsing does not hold the GIL of the API process. Each document gets
+EXTRACT_TIMEOUT_SECONDS; on timeout the pool is torn down (a running task cannot be
+cancelled otherwise) and recreated for the next call. PDFs are limited to
+PDF_MAX_PAGES pages. Results are cached by sha256 of the content, so a file that
+reappears under another name or in another folder is not parsed again.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from html.parser import HTMLParser
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+try:  # optional dependency
+    from pdfminer.high_level import extract_text as _pdf_extract_text  # type: ignore
+except Exception:  # pragma: no cover
+    _pdf_extract_text = None
+
+log = logging.getLogger("app.extraction")
+
+Extractor = Callable[[bytes, int], str]
+
+
+class ExtractionError(Exception):
+    """Document could not be turned into text (unsupported, broken, timeout)."""
+
+
+_BY_EXT: Dict[str, Tuple[str, Extractor]] = {}
+_BY_MIME: Dict[str, Tuple[str, Extractor]] = {}
+
+
+def extractor(kind: str, extensions: Tuple[str, ...], mime_types: Tuple[str, ...] = ()) -> Callable[[Extractor], Extractor]:
+    """Register ``fn(data, max_pages) -> str`` for the given extensions (with dot) / MIME types."""
+    def wrap(fn: Extractor) -> Extractor:
+        for ext in extensions:
+            _BY_EXT[ext.lower()] = (kind, fn)
+        for mime in mime_types:
+            _BY_MIME[mime.lower()] = (kind, fn)
+        return fn
+    return wrap
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8-sig", errors="replace")
+
+
+@extractor("text", (".txt", ".text", ".log", ".csv"), ("text/plain", "text/csv"))
+def _extract_plain(data: bytes, max_pages: int) -> str:
+    return _decode(data)
+
+
+@extractor("markdown", (".md", ".markdown"), ("text/markdown",))
+def _extract_markdown(data: bytes, max_pages: int) -> str:
+    # Markdown is kept as is: summaries and entries are Markdown themselves
+    return _decode(data)
+
+
+class _HTMLText(HTMLParser):
+    _SKIP = {"script", "style", "noscript", "template"}
+    _BLOCK = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "pre", "blockquote"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):  # type: ignore[no-untyped-def]
+        if tag in self._SKIP:
+            self._skip += 1
+        elif tag in self._BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):  # type: ignore[no-untyped-def]
+        if tag in self._SKIP and self._skip:
+            self._skip -= 1
+        elif tag in self._BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):  # type: ignore[no-untyped-def]
+        if not self._skip:
+            self.parts.append(data)
+
+
+@extractor("html", (".html", ".htm"), ("text/html", "application/xhtml+xml"))
+def _extract_html(data: bytes, max_pages: int) -> str:
+    parser = _HTMLText()
+    parser.feed(_decode(data))
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+@extractor("pdf", (".pdf",), ("application/pdf",))
+def _extract_pdf(data: bytes, max_pages: int) -> str:
+    if _pdf_extract_text is None:
+        raise ExtractionError("pdfminer.six not installed")
+    import io
+    return _pdf_extract_text(io.BytesIO(data), maxpages=max(0, max_pages))
+
+
+def resolve(name: str, mime_type: Optional[str] = None) -> Tuple[str, Extractor]:
+    """(kind, extractor) for a file; MIME type wins over the extension."""
+    if mime_type:
+        found = _BY_MIME.get(mime_type.split(";", 1)[0].strip().lower())
+        if found:
+            return found
+    ext = os.path.splitext(name)[1].lower()
+    found = _BY_EXT.get(ext)
+    if found is None:
+        raise ExtractionError(f"no extractor for {name!r} ({mime_type or ext or 'no extension'})")
+    return found
+
+
+def extract_text_local(name: str, data: bytes, mime_type: Optional[str] = None, max_pages: Optional[int] = None) -> str:
+    """Run the extractor in this process (also the entry point of the pool workers)."""
+    _, fn = resolve(name, mime_type)
+    try:
+        return fn(data, settings.pdf_max_pages if max_pages is None else max_pages)
+    except ExtractionError:
+        raise
+    except Exception as exc:
+        raise ExtractionError(f"{name}: {exc}") from exc
+
+
+_cache: TTLCache[str, str] = TTLCache(settings.extract_cache_max_entries, settings.extract_cache_ttl_seconds)
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # forkserver: workers are not forked from this (multi-threaded) process
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=max(1, settings.ingest_extract_workers), mp_context=ctx)
+        return _pool
+
+
+def _reset_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    # A stuck extractor only stops when its process does; other in-flight documents fail too
+    for proc in list(getattr(pool, "_processes", {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def extract(name: str, data: bytes, mime_type: Optional[str] = None, timeout: Optional[float] = None) -> str:
+    """Text of a document, parsed in the process pool; cached by content hash."""
+    kind, _ = resolve(name, mime_type)  # unsupported types fail here, without a round trip
+    key = f"{kind}:{settings.pdf_max_pages}:{hashlib.sha256(data).hexdigest()}"
+    cached = _cache.get(key)
+    if cached is not None:
+        metrics.extract_total.labels(kind=kind, result="cached").inc()
+        return cached
+    pool = _get_pool()
+    timeout = settings.extract_timeout_seconds if timeout is None else timeout
+    with metrics.extract_duration_seconds.labels(kind=kind).time():
+        future = pool.submit(extract_text_local, name, data, mime_type, settings.pdf_max_pages)
+        try:
+            text = future.result(timeout=timeout)
+        except FutureTimeout:
+            metrics.extract_total.labels(kind=kind, result="timeout").inc()
+            log.warning("extract_timeout", extra={"file": name, "timeout": timeout})
+            _reset_pool(pool)
+            raise ExtractionError(f"{name}: extraction timed out after {timeout}s")
+        except ExtractionError:
+            metrics.extract_total.labels(kind=kind, result="error").inc()
+            raise
+        except Exception as exc:  # BrokenProcessPool, pickling errors, ...
+            metrics.extract_total.labels(kind=kind, result="error").inc()
+            if getattr(pool, "_broken", False):
+                _reset_pool(pool)
+            raise ExtractionError(f"{name}: {exc}") from exc
+    metrics.extract_total.labels(kind=kind, result="ok").inc()
+    _cache.set(key, text)
+    return text
+
+
+__all__ = ["ExtractionError", "extractor", "resolve", "extract", "extract_text_local", "shutdown"]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+"""Staged pipeline with bounded queues (used by the auto-ingest scan).
+
+Each stage has its own worker threads and a bounded input queue; a stage's output is
+the next stage's input. A full queue blocks the producer, so a slow stage throttles
+the ones before it instead of buffering the whole backlog in memory. An exception in
+a stage drops that item and is reported in its result; the other items continue.
+Raising ``Skip`` drops an item on purpose (duplicate, nothing to do), not as a failure.
+
+Per stage: ``bb_ingest_stage_items_total{stage,result}`` (throughput),
+``bb_ingest_stage_duration_seconds{stage}``, ``bb_ingest_stage_busy{stage}`` (workers
+inside the stage function) and ``bb_ingest_stage_queue_depth{stage}``.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core import metrics
+from app.core.timing import bind
+
+log = logging.getLogger("app.ingest.pipeline")
+
+_DONE = object()
+
+
+class Skip(Exception):
+    """Raised by a stage function to drop an item without counting it as failed."""
+
+
+class Stage(NamedTuple):
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int
+
+
+class PipelineResult(NamedTuple):
+    ok: bool
+    stage: str  # last stage that ran (the failing one if not ok)
+    value: Any  # output of the last stage, or the exception
+
+
+class StagedPipeline:
+    def __init__(self, stages: Sequence[Stage], queue_size: int = 64) -> None:
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+
+    def run(self, items: Iterable[Tuple[Hashable, Any]]) -> Dict[Hashable, PipelineResult]:
+        """Push ``(key, payload)`` items through all stages; blocks until every item is done."""
+        queues: List["queue.Queue[Any]"] = [queue.Queue(self.queue_size) for _ in self.stages]
+        results: Dict[Hashable, PipelineResult] = {}
+        lock = threading.Lock()
+        remaining = [max(1, s.workers) for s in self.stages]
+        threads: List[threading.Thread] = []
+
+        def worker(idx: int) -> None:
+            stage = self.stages[idx]
+            inbox = queues[idx]
+            outbox = queues[idx + 1] if idx + 1 < len(queues) else None
+            while True:
+                item = inbox.get()
+                _gauge(metrics.ingest_stage_queue_depth, stage.name, inbox.qsize())
+                if item is _DONE:
+                    break
+                key, payload = item
+                t0 = time.perf_counter()
+                metrics.ingest_stage_busy.labels(stage=stage.name).inc()
+                try:
+                    out = stage.fn(payload)
+                except Exception as exc:
+                    skipped = isinstance(exc, Skip)
+                    metrics.ingest_stage_items_total.labels(stage=stage.name, result="skipped" if skipped else "error").inc()
+                    if not skipped:
+                        log.warning("ingest_stage_failed", extra={"stage": stage.name, "key": str(key), "error": str(exc)})
+                    with lock:
+                        results[key] = PipelineResult(False, stage.name, exc)
+                    continue
+                finally:
+                    metrics.ingest_stage_busy.labels(stage=stage.name).dec()
+                    metrics.ingest_stage_duration_seconds.labels(stage=stage.name).observe(time.perf_counter() - t0)
+                metrics.ingest_stage_items_total.labels(stage=stage.name, result="ok").inc()
+                if outbox is not None:
+                    outbox.put((key, out))  # blocks while the next stage is behind
+                else:
+                    with lock:
+                        results[key] = PipelineResult(True, stage.name, out)
+            with lock:
+                remaining[idx] -= 1
+                last = remaining[idx] == 0
+            if last and outbox is not None:  # this stage is drained: close the next one
+                for _ in range(max(1, self.stages[idx + 1].workers)):
+                    outbox.put(_DONE)
+
+        for idx, stage in enumerate(self.stages):
+            for n in range(max(1, stage.workers)):
+                t = threading.Thread(target=bind(worker), args=(idx,), name=f"ingest-{stage.name}-{n}", daemon=True)
+                threads.append(t)
+                t.start()
+        first = queues[0]
+        try:
+            for item in items:
+                first.put(item)
+        finally:
+            for _ in range(max(1, self.stages[0].workers)):
+                first.put(_DONE)
+        for t in threads:
+            t.join()
+        return results
+
+
+def _gauge(gauge: Any, stage: str, value: float) -> None:
+    try:
+        gauge.labels(stage=stage).set(value)
+    except Exception:  # pragma: no cover
+        pass
+
+
+__all__ = ["Skip", "Stage", "StagedPipeline", "PipelineResult"]
@@ -6,20 +6,48 @@ text into the system by creating entry files (re-upload into entries path) to tr
 summary pipeline.
 
 Design:
- - Stateless functions; scheduling handled in app startup loop.
- - Uses WebDAV listing; avoids DB dependency. Deduplication by presence of corresponding
-   summary artifact or an existing .ingested marker locally (fallback mode).
- - PDF extraction: naive text pull using pdfminer.six (optional, skip if lib missing).
+ - Functions; scheduling handled in app startup loop.
+ - Incremental: PROPFIND metadata (etag, size, last-modified) of every file seen is kept
+   in ``ingest_scan_state`` together with the last action. A cycle first probes each
+   drop directory (Depth 0); if its ETag equals the stored one nothing below it changed
+   and the directory is skipped. Otherwise the Depth 1 listing is diffed against the
+   stored rows and only new or changed files (and earlier errors) are processed.
+ - A directory's ETag is stored only once all of its candidates were handled without
+   error, so files beyond the per-cycle cap are picked up by the next cycle.
+ - Files without state (first scan) that already have a summary artifact
+   ``<name>.summary.md`` in summaries_dir are recorded, not ingested again.
+ - Content already stored as a file (content hash index entry with a file id, see
+   app.services.content_hash_index) is recorded as duplicate; the server checksum or a
+   known ETag avoids the download. Entries written by auto-ingest have no files row, so
+   their index rows cannot be checked and never block a later copy: a document dropped
+   again after its entry was deleted or rewritten is ingested again.
+ - Candidates go through a staged pipeline (app.services.ingest_pipeline): concurrent
+   fetchers, extraction workers and concurrent writers connected by bounded queues.
+ - Text extraction by file type (PDF via pdfminer.six, HTML, Markdown, plain text) in a
+   process pool, see app.services.extraction; the MIME type from PROPFIND picks the
+   extractor. Text and Markdown keep their name in the entries dir, other types are
+   written as ``<name>.txt`` (``report.pdf`` -> ``report.pdf.txt``).
 
 Security / Safeguards:
  - Only processes allowed extensions (configurable).
- - Size limit inherited from write-file (caller ensures not oversized).
+ - Files above INGEST_MAX_FILE_BYTES are not downloaded (recorded as too_large).
  - Max files per cycle to bound latency / cost.
 """
+import hashlib
 import logging
-from typing import List, Tuple
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.services.webdav_client import list_dir, get_file_content, write_file_content
+from app.core.response_cache import file_tag, response_cache
+from app.database.database import get_session
+from app.database.models import IngestScanStateORM
+from app.services import content_hash_index
+from app.services.ingest_pipeline import Skip, Stage, StagedPipeline
+from app.services import extraction
+from app.services.webdav_client import DavEntry, list_dir, list_dir_info, get_file_bytes, write_file_content
 from app.core import metrics
 
 logger = logging.getLogger("app.ingest")
@@ -28,86 +56,303 @@ def _allowed(name: str) -> bool:
     exts = {e.strip().lower() for e in settings.ingest_allowed_extensions.split(',') if e.strip()}
     return any(name.lower().endswith(ext) for ext in exts)
 
-def discover_candidates() -> List[Tuple[str, str]]:
-    """Return list of (source_dir, filename) for allowed files that appear not summarized yet.
 
-    Heuristic: if a sibling summary file <name>.summary.md exists in summaries_dir -> skip.
+class Candidate(NamedTuple):
+    dir: str
+    entry: DavEntry
+    new: bool  # no scanner state yet (as opposed to changed / retried)
+
+
+def _dir_token(entry: DavEntry) -> Optional[str]:
+    # Plain WebDAV servers without collection ETags: the mtime changes on add/remove
+    return entry.etag or entry.last_modified
+
+
+def _diff_dir(session: Session, d: str, prune: bool = True) -> Tuple[List[Candidate], Optional[str]]:
+    """Candidates of one drop directory and its current token (None when it was skipped).
+
+    ``prune`` deletes the state rows of files gone from the directory; without it the
+    session is only read.
     """
-    dirs = {settings.inbox_dir, settings.manual_uploads_dir}
-    out: List[Tuple[str, str]] = []
-    try:
-        summaries = set(list_dir(settings.summaries_dir))
-    except Exception:
-        summaries: set[str] = set()
-    for d in dirs:
+    key = d.strip('/')
+    probe = list_dir_info(d, depth=0)
+    token = _dir_token(probe[0]) if probe else None
+    stored = session.get(IngestScanStateORM, key)
+    if token and stored is not None and stored.etag == token:
+        metrics.auto_ingest_dirs_total.labels(result="unchanged").inc()
+        return [], None
+    metrics.auto_ingest_dirs_total.labels(result="listed").inc()
+    listing = list_dir_info(d, depth=1)
+    if listing and listing[0].path == key:
+        token = _dir_token(listing[0]) or token
+    known = {row.path: row for row in session.scalars(
+        select(IngestScanStateORM).where(IngestScanStateORM.dir == key, IngestScanStateORM.is_dir.is_(False))
+    )}
+    out: List[Candidate] = []
+    for entry in listing:
+        if entry.is_dir or entry.path == key or not _allowed(entry.name):
+            continue
+        row = known.pop(entry.path, None)
+        if row is None:
+            result = "new"
+        elif (row.etag, row.size_bytes, row.last_modified) != (entry.etag, entry.size, entry.last_modified):
+            result = "changed"
+        elif row.last_action == "error":
+            result = "retry"
+        else:
+            metrics.auto_ingest_files_diffed_total.labels(result="unchanged").inc()
+            continue
+        metrics.auto_ingest_files_diffed_total.labels(result=result).inc()
+        out.append(Candidate(d, entry, row is None))
+    for row in known.values() if prune else ():  # gone from the directory
+        session.delete(row)
+        metrics.auto_ingest_files_diffed_total.labels(result="deleted").inc()
+    return out, token
+
+
+def _discover(session: Session, prune: bool = True) -> Tuple[List[Candidate], Dict[str, str]]:
+    candidates: List[Candidate] = []
+    tokens: Dict[str, str] = {}
+    for d in sorted({settings.inbox_dir, settings.manual_uploads_dir}):
         try:
-            names = list_dir(d)
+            found, token = _diff_dir(session, d, prune)
+        except FileNotFoundError:
+            continue
         except Exception as exc:  # pragma: no cover
+            metrics.auto_ingest_dirs_total.labels(result="error").inc()
             logger.warning("ingest_list_dir_fail", extra={"dir": d, "error": str(exc)})
             continue
-        for name in names:
-            if not _allowed(name):
-                continue
-            if f"{name}.summary.md" in summaries:
-                continue
-            out.append((d, name))
-    return out
+        candidates.extend(found)
+        if token:
+            tokens[d] = token
+    return candidates, tokens
 
-def ingest_file(source_dir: str, name: str) -> bool:
-    """Ingest one file by copying content into entries dir (if not already there).
 
-    Returns True if an entry was written (ingested) else False (skipped).
-    """
+def discover_candidates() -> List[Tuple[str, str]]:
+    """Return list of (source_dir, filename) for allowed files that are new or changed
+    since they were last processed (see module docstring). Read-only: scan state is
+    left for the next cycle."""
+    with get_session() as s:
+        candidates, _ = _discover(s, prune=False)
+    return [(c.dir, c.entry.name) for c in candidates]
+
+
+class _Doc(NamedTuple):
+    cand: Candidate
+    data: bytes
+    sha256: str
+    text: str = ""
+
+
+class DuplicateContent(Skip):
+    """Content already in the content hash index: nothing to ingest."""
+
+
+class TooLarge(Skip):
+    """File above INGEST_MAX_FILE_BYTES: not downloaded, retried only when it changes."""
+
+
+def _entry_name(name: str, mime_type: Optional[str] = None) -> str:
+    """Name of the entry written for ``name``: extracted text never keeps a binary extension."""
+    try:
+        kind = extraction.resolve(name, mime_type)[0]
+    except extraction.ExtractionError:
+        kind = None
+    return name if kind in ("text", "markdown") else f"{name}.txt"
+
+
+def _stored(session: Session, sha256: str) -> bool:
+    # Only rows with a file are verifiable (lookup re-checks files.sha256); see module docstring
+    known = content_hash_index.lookup(session, sha256)
+    return known is not None and known.file_id is not None
+
+
+# Pipeline stages (also used one after another by ingest_file). Items travel as
+# Candidate -> _Doc; exceptions mark the item as failed, DuplicateContent as duplicate.
+def _fetch(cand: Candidate) -> _Doc:
     from app.core.config import settings as live_settings
+    entry = cand.entry
+    cap = live_settings.ingest_max_file_bytes
+    if entry.size is not None and entry.size > cap:
+        raise TooLarge(entry.path)
+    with get_session() as s:  # server checksum or known ETag: dedup without a download
+        known = content_hash_index.known_sha256(s, entry)
+        if known and _stored(s, known):
+            raise DuplicateContent(entry.path)
+    try:  # fetchers and the queues hold whole files: bound each one
+        data = get_file_bytes(entry.path, max_bytes=cap)
+    except ValueError:
+        raise TooLarge(entry.path)
+    sha = hashlib.sha256(data).hexdigest()
+    with get_session() as s:
+        if entry.etag:
+            content_hash_index.remember_etag(s, entry.etag, sha)
+        duplicate = _stored(s, sha)
+    if duplicate:
+        raise DuplicateContent(entry.path)
+    return _Doc(cand, data, sha)
+
+
+def _extract(doc: _Doc) -> _Doc:
+    # Parsing runs in the extraction process pool; this stage's threads only wait on it
+    entry = doc.cand.entry
+    return doc._replace(text=extraction.extract(entry.name, doc.data, mime_type=entry.content_type))
+
+
+def _write(doc: _Doc) -> str:
+    from app.core.config import settings as live_settings
+    name = _entry_name(doc.cand.entry.name, doc.cand.entry.content_type)
+    write_file_content(f"{live_settings.inbox_dir}/{name}".lstrip('/'), doc.text)
+    response_cache.invalidate("entries", file_tag("entries", name))
+    with get_session() as s:
+        content_hash_index.register(s, doc.sha256, size=len(doc.data), etag=doc.cand.entry.etag)
+    logger.info("auto_ingest_written", extra={"file": name, "source": doc.cand.dir})
+    return name
+
+
+def _ingest(source_dir: str, name: str) -> str:
+    """Copy one file into the entries dir; returns the action (ingested|skipped|duplicate|too_large|error)."""
+    from app.core.config import settings as live_settings
+    if source_dir == live_settings.inbox_dir:  # already an entry: nothing to copy
+        metrics.auto_ingest_files_total.labels(action="skipped").inc()
+        return "skipped"
+    path = f"{source_dir}/{name}".lstrip('/')
+    cand = Candidate(source_dir, DavEntry(path, name, None, None, None, False), True)
     try:
-        rel_path = f"{source_dir}/{name}".lstrip('/')
-        text = get_file_content(rel_path)
+        doc = _extract(_fetch(cand))
+    except DuplicateContent:
+        metrics.auto_ingest_files_total.labels(action="duplicate").inc()
+        return "duplicate"
+    except TooLarge:
+        metrics.auto_ingest_files_total.labels(action="too_large").inc()
+        return "too_large"
     except Exception as exc:
         metrics.auto_ingest_files_total.labels(action="error").inc()
         logger.warning("ingest_read_fail", extra={"file": name, "dir": source_dir, "error": str(exc)})
-        return False
-
-    if source_dir == live_settings.inbox_dir:
-        metrics.auto_ingest_files_total.labels(action="skipped").inc()
-        return False
-
-    dest_rel = f"{live_settings.inbox_dir}/{name}".lstrip('/')
+        return "error"
     try:
-        write_file_content(dest_rel, text)
+        _write(doc)
         metrics.auto_ingest_files_total.labels(action="ingested").inc()
-        logger.info("auto_ingest_written", extra={"file": name, "source": source_dir})
-        return True
+        return "ingested"
     except Exception as exc:
         metrics.auto_ingest_files_total.labels(action="error").inc()
         logger.warning("auto_ingest_write_fail", extra={"file": name, "error": str(exc)})
-        return False
+        return "error"
+
+
+def _pipeline() -> StagedPipeline:
+    from app.core.config import settings as live_settings
+    return StagedPipeline([
+        Stage("fetch", _fetch, live_settings.ingest_fetch_concurrency),
+        Stage("extract", _extract, live_settings.ingest_extract_workers),
+        Stage("write", _write, live_settings.ingest_write_concurrency),
+    ], queue_size=live_settings.ingest_queue_size)
+
+
+def ingest_file(source_dir: str, name: str) -> bool:
+    """Ingest one file by copying content into entries dir (if not already there).
+
+    Returns True if an entry was written (ingested) else False (skipped).
+    """
+    return _ingest(source_dir, name) == "ingested"
+
+
+def _record(session: Session, done: List[Tuple[Candidate, str]], tokens: Dict[str, str]) -> None:
+    for cand, action in done:
+        e = cand.entry
+        session.merge(IngestScanStateORM(
+            path=e.path, dir=cand.dir.strip('/'), is_dir=False, etag=e.etag,
+            size_bytes=e.size, last_modified=e.last_modified, last_action=action,
+        ))
+    for d, token in tokens.items():
+        session.merge(IngestScanStateORM(path=d.strip('/'), dir=d.strip('/'), is_dir=True, etag=token, last_action="scanned"))
+
+
+# One cycle at a time: the background loop and POST /ingest/scan-now would otherwise
+# download and write the same candidates twice
+_scan_lock = threading.Lock()
 
-from typing import Dict, Any
 
 def run_scan_cycle() -> Dict[str, Any]:
     """Execute one scan cycle.
 
-    Returns dict with counts for logging / endpoint response.
+    Returns dict with counts for logging / endpoint response; ``{"busy": True, ...}``
+    without scanning when another cycle is still running.
     """
+    if not _scan_lock.acquire(blocking=False):
+        metrics.auto_ingest_scan_total.labels(result="busy").inc()
+        return {"busy": True, "candidates": 0, "ingested": 0}
+    try:
+        return _scan_cycle()
+    finally:
+        _scan_lock.release()
+
+
+def _scan_cycle() -> Dict[str, Any]:
+    t0 = time.perf_counter()
     try:
-        candidates = discover_candidates()
+        with get_session() as s:
+            candidates, tokens = _discover(s)
         if not candidates:
+            with get_session() as s:
+                _record(s, [], tokens)
             metrics.auto_ingest_scan_total.labels(result="ok").inc()
             return {"candidates": 0, "ingested": 0}
         from app.core.config import settings as live_settings
-        limit = max(1, live_settings.auto_ingest_max_files_per_cycle)
-        ingested = 0
-        for (src, name) in candidates[:limit]:
-            if ingest_file(src, name):
-                ingested += 1
+        # The cap bounds downloads/uploads; recording inbox files and known summaries is free
+        budget = max(1, live_settings.auto_ingest_max_files_per_cycle)
+        summaries: Optional[Set[str]] = None
+        done: List[Tuple[Candidate, str]] = []
+        unfinished: Set[str] = set()  # dirs with leftovers or errors keep their old token
+        work: List[Candidate] = []
+        for cand in candidates:
+            if cand.new:
+                if summaries is None:
+                    try:
+                        summaries = set(list_dir(live_settings.summaries_dir))
+                    except Exception:
+                        summaries = set()
+                if {f"{cand.entry.name}.summary.md", f"{_entry_name(cand.entry.name, cand.entry.content_type)}.summary.md"} & summaries:
+                    done.append((cand, "summarized"))
+                    continue
+            if cand.dir == live_settings.inbox_dir:  # already an entry: nothing to copy
+                metrics.auto_ingest_files_total.labels(action="skipped").inc()
+                done.append((cand, "skipped"))
+            elif budget <= 0:
+                unfinished.add(cand.dir)
+            else:
+                budget -= 1
+                work.append(cand)
+        # fetch -> extract -> write, each stage with its own workers and bounded queue
+        results = _pipeline().run((c, c) for c in work)
+        for cand in work:
+            res = results.get(cand)
+            if res is not None and res.ok:
+                action = "ingested"
+            elif res is not None and isinstance(res.value, DuplicateContent):
+                action = "duplicate"
+            elif res is not None and isinstance(res.value, TooLarge):
+                action = "too_large"
+            else:
+                action = "error"
+            metrics.auto_ingest_files_total.labels(action=action).inc()
+            if action == "error":
+                unfinished.add(cand.dir)
+            done.append((cand, action))
+        with get_session() as s:
+            _record(s, done, {d: t for d, t in tokens.items() if d not in unfinished})
+        ingested = sum(1 for _, action in done if action == "ingested")
         metrics.auto_ingest_scan_total.labels(result="ok").inc()
         return {"candidates": len(candidates), "ingested": ingested}
     except Exception as exc:  # pragma: no cover
         metrics.auto_ingest_scan_total.labels(result="error").inc()
         logger.exception("auto_ingest_scan_fail")
         return {"error": str(exc)}
+    finally:
+        metrics.auto_ingest_scan_duration_seconds.observe(time.perf_counter() - t0)
 
 __all__ = [
+    "Candidate",
     "discover_candidates",
     "ingest_file",
     "run_scan_cycle",
@@ -0,0 +1,33 @@
+from __future__ import annotations
+"""Keyset (cursor) pagination helpers.
+
+Cursors are opaque to clients: URL-safe base64 of a compact JSON object holding the
+last seen primary key. Clients must pass them back unchanged via ?cursor=.
+"""
+import base64
+import json
+from typing import Any
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplied cursor cannot be decoded."""
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": int(last_id)}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data: Any = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = data["id"]
+        if not isinstance(last_id, int) or isinstance(last_id, bool):
+            raise TypeError("id must be int")
+        return last_id
+    except Exception as exc:
+        raise InvalidCursor(str(exc)) from exc
+
+
+__all__ = ["InvalidCursor", "encode_cursor", "decode_cursor"]
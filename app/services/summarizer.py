@@ -14,119 +14,21 @@ from sqlalchemy.orm import Session
 from app.database.database import SessionLocal
 from app.database.models import SummarizerUsageORM
 
-from app.core.config import settings, get_summary_cache_enabled, get_summary_cache_dir
-from app.services.webdav_client import write_file_content, get_file_content
-import os
+from app.core.config import settings
+from app.core.timing import timed
+from app.services import summary_store
 
-def _atomic_write(path: str, content: str):
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        f.write(content)
-    os.replace(tmp, path)
+# Summary artifacts are named ``<stem>.summary.md``; storage is app.services.summary_store
+def write_summary_dual(stem: str, content: str) -> str:
+    """Write summary to the local cache now and to Nextcloud (source of truth) via write-behind."""
+    return summary_store.write(summary_store.summary_name(stem), content)
 
-def write_summary_dual(stem: str, content: str):
-    """Write summary to Nextcloud (source of truth) and to local cache."""
-    # Nextcloud-Write
-    nc_path = f"BACKBRAIN5.2/summaries/{stem}.summary.md"
-    write_file_content(nc_path, content)
-    # Cache-Write
-    if get_summary_cache_enabled():
-        try:
-            fname = f"{stem}.summary.md"
-            cache_path = os.path.join(get_summary_cache_dir(), fname)
-            _atomic_write(cache_path, content)
-            try:
-                from app.core import metrics
-                metrics.inc_labeled("bb_summary_cache_write_total", status="ok")
-            except Exception:
-                pass
-        except Exception as e:
-            logging.getLogger("app.summarizer").warning(f"cache_write_failed for {stem}: {e}")
-            try:
-                from app.core import metrics
-                metrics.inc_labeled("bb_summary_cache_write_total", status="fail")
-            except Exception:
-                pass
-
-def read_summary_preferring_cache(stem: str) -> str | None:
-    fname = f"{stem}.summary.md"
-    if get_summary_cache_enabled():
-        p = os.path.join(get_summary_cache_dir(), fname)
-        try:
-            with open(p, "r", encoding="utf-8") as f:
-                try:
-                    from app.core import metrics
-                    metrics.inc_labeled("bb_summary_cache_read_total", source="cache")
-                except Exception:
-                    pass
-                return f.read()
-        except FileNotFoundError:
-            pass
-    # Fallback: Nextcloud
-    nc_path = f"BACKBRAIN5.2/summaries/{stem}.summary.md"
-    try:
-        from app.core import metrics
-        metrics.inc_labeled("bb_summary_cache_read_total", source="nextcloud")
-    except Exception:
-        pass
-    return get_file_content(nc_path)
-
-def _atomic_write(path: str, content: str):
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        f.write(content)
-    os.replace(tmp, path)
-
-def write_summary_dual(stem: str, content: str):
-    """Write summary to Nextcloud (source of truth) and to local cache."""
-    # Nextcloud-Write
-    nc_path = f"BACKBRAIN5.2/summaries/{stem}.summary.md"
-    write_file_content(nc_path, content)
-    # Cache-Write
-    if get_summary_cache_enabled():
-        try:
-            fname = f"{stem}.summary.md"
-            cache_path = os.path.join(get_summary_cache_dir(), fname)
-            _atomic_write(cache_path, content)
-            try:
-                from app.core import metrics
-                metrics.inc_labeled("bb_summary_cache_write_total", status="ok")
-            except Exception:
-                pass
-        except Exception as e:
-            logging.getLogger("app.summarizer").warning(f"cache_write_failed for {stem}: {e}")
-            try:
-                from app.core import metrics
-                metrics.inc_labeled("bb_summary_cache_write_total", status="fail")
-            except Exception:
-                pass
-                from app.core import metrics
-                metrics.inc("bb_summary_cache_write_total", labels={"status": "fail"})
-            except Exception:
-                pass
+def read_cached_summary(stem: str, max_chars: int | None = None) -> str | None:
+    """Local summary cache only (never WebDAV); ``max_chars`` reads just the leading text."""
+    return summary_store.read_cached(summary_store.summary_name(stem), max_chars)
 
 def read_summary_preferring_cache(stem: str) -> str | None:
-    fname = f"{stem}.summary.md"
-    if get_summary_cache_enabled():
-        p = os.path.join(get_summary_cache_dir(), fname)
-        try:
-            with open(p, "r", encoding="utf-8") as f:
-                try:
-                    from app.core import metrics
-                    metrics.inc("bb_summary_cache_read_total", labels={"source": "cache"})
-                except Exception:
-                    pass
-                return f.read()
-        except FileNotFoundError:
-            pass
-    # Fallback: Nextcloud
-    try:
-        from app.core import metrics
-        metrics.inc("bb_summary_cache_read_total", labels={"source": "nextcloud"})
-    except Exception:
-        pass
-    nc_path = f"BACKBRAIN5.2/summaries/{stem}.summary.md"
-    return get_file_content(nc_path)
+    return summary_store.read(summary_store.summary_name(stem))
 
 logger = logging.getLogger("app.summarizer")
 
@@ -166,6 +68,7 @@ def _record_usage(**kw: Any) -> None:
                 pass
 
 
+@timed("llm")
 def _openai_call(content: str) -> SummaryResult:
     """Call OpenAI (or compatible) chat completion API to summarize content.
 
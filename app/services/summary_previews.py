@@ -0,0 +1,132 @@
+from __future__ import annotations
+"""summary_previews read model.
+
+One row per summary with the display name (file original_name or ``summary_<id>``) and
+the first PREVIEW_CHARS characters. ORM events keep it in sync inside the writing
+transaction: summary insert/update/delete and file rename/delete. They are installed by
+``register`` (init_db() and create_app()), not on import. Bulk Core statements against
+``summaries`` bypass the events; run ``backfill`` after those.
+
+Committed changes drop the ``summaries`` tag of the public response cache.
+"""
+from typing import Any, Sequence
+
+from sqlalchemy import String, cast, delete, event, exists, func, insert, inspect, literal, select, update
+from sqlalchemy.orm import Session, object_session
+
+from app.core.response_cache import response_cache
+from app.database.models import FileORM, SummaryORM, SummaryPreviewORM
+
+PREVIEW_CHARS = 300
+_CHANGED = "bb_summary_previews_changed"
+_previews = SummaryPreviewORM.__table__
+
+
+def _mark_changed(target: Any) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info[_CHANGED] = True
+
+
+def _file_name(connection: Any, file_id: int | None) -> str | None:
+    if file_id is None:
+        return None
+    return connection.execute(select(FileORM.original_name).where(FileORM.id == file_id)).scalar_one_or_none()
+
+
+def _values(connection: Any, summary: SummaryORM) -> dict[str, Any]:
+    return {
+        "file_id": summary.file_id,
+        "name": _file_name(connection, summary.file_id) or f"summary_{summary.id}",
+        "preview": (summary.summary_text or "")[:PREVIEW_CHARS],
+        "created_at": summary.created_at,
+    }
+
+
+def _summary_inserted(mapper, connection, target) -> None:  # type: ignore[no-untyped-def]
+    connection.execute(insert(_previews).values(summary_id=target.id, **_values(connection, target)))
+    _mark_changed(target)
+
+
+def _summary_updated(mapper, connection, target) -> None:  # type: ignore[no-untyped-def]
+    values = _values(connection, target)
+    res = connection.execute(update(_previews).where(_previews.c.summary_id == target.id).values(**values))
+    if res.rowcount == 0:  # written before the table existed and not backfilled yet
+        connection.execute(insert(_previews).values(summary_id=target.id, **values))
+    _mark_changed(target)
+
+
+def _summary_deleted(mapper, connection, target) -> None:  # type: ignore[no-untyped-def]
+    connection.execute(delete(_previews).where(_previews.c.summary_id == target.id))
+    _mark_changed(target)
+
+
+def _file_renamed(mapper, connection, target) -> None:  # type: ignore[no-untyped-def]
+    if not inspect(target).attrs.original_name.history.has_changes():
+        return
+    connection.execute(update(_previews).where(_previews.c.file_id == target.id).values(name=target.original_name))
+    _mark_changed(target)
+
+
+def _file_deleted(mapper, connection, target) -> None:  # type: ignore[no-untyped-def]
+    connection.execute(
+        update(_previews).where(_previews.c.file_id == target.id)
+        .values(name=literal("summary_") + cast(_previews.c.summary_id, String))
+    )
+    _mark_changed(target)
+
+
+def _invalidate_after_commit(session: Session) -> None:
+    # After commit, not at flush: a reader racing the transaction must not re-cache old rows
+    if session.info.pop(_CHANGED, False):
+        response_cache.invalidate("summaries")
+
+
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED, None)
+
+
+_LISTENERS = (
+    (SummaryORM, "after_insert", _summary_inserted),
+    (SummaryORM, "after_update", _summary_updated),
+    (SummaryORM, "after_delete", _summary_deleted),
+    (FileORM, "after_update", _file_renamed),
+    (FileORM, "after_delete", _file_deleted),
+    (Session, "after_commit", _invalidate_after_commit),
+    (Session, "after_rollback", _discard_after_rollback),
+)
+
+
+def register() -> None:
+    """Install the ORM and session events (idempotent)."""
+    for target, name, fn in _LISTENERS:
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
+
+
+def list_previews(session: Session, limit: int) -> Sequence[Any]:
+    """Newest first: rows with ``name`` and ``preview``."""
+    stmt = select(SummaryPreviewORM.name, SummaryPreviewORM.preview).order_by(SummaryPreviewORM.summary_id.desc()).limit(limit)
+    return session.execute(stmt).all()
+
+
+def backfill(connection: Any) -> int:
+    """Insert previews for summaries that have none; returns the number of rows added."""
+    missing = ~exists().where(_previews.c.summary_id == SummaryORM.id)
+    src = (
+        select(
+            SummaryORM.id,
+            SummaryORM.file_id,
+            func.coalesce(FileORM.original_name, literal("summary_") + cast(SummaryORM.id, String)),
+            func.substr(SummaryORM.summary_text, 1, PREVIEW_CHARS),
+            SummaryORM.created_at,
+        )
+        .select_from(SummaryORM)
+        .outerjoin(FileORM, FileORM.id == SummaryORM.file_id)
+        .where(missing)
+    )
+    res = connection.execute(insert(_previews).from_select(["summary_id", "file_id", "name", "preview", "created_at"], src))
+    return res.rowcount or 0
+
+
+__all__ = ["PREVIEW_CHARS", "register", "list_previews", "backfill"]
@@ -0,0 +1,383 @@
+from __future__ import annotations
+"""Summary store: the one read/write path for summary artifacts.
+
+Every producer (summarizer endpoints, background auto-summaries, public write-file) and
+every reader (``/query`` via iter_cached_summaries, previews, read-file) goes through
+this module, so the local summary cache (SUMMARY_CACHE_DIR) is always current:
+
+* ``write`` stores the text in the local cache synchronously (temp file + rename) and
+  queues the Nextcloud upload (summaries_dir) for a background writer;
+* uploads are keyed by file name: a summary rewritten before its upload ran replaces
+  the queued text (one PUT, latest text wins), and uploads of the same file never run
+  concurrently;
+* failed uploads are retried with exponential backoff (SUMMARY_WRITEBACK_RETRIES,
+  SUMMARY_WRITEBACK_RETRY_SECONDS); after the last attempt the summary is only in the
+  cache and the failure is logged;
+* the queue is bounded (SUMMARY_WRITEBACK_QUEUE_MAX). When it is full, or the cache is
+  disabled or not writable, ``write`` uploads synchronously and raises on failure;
+* reads are cache first; a Nextcloud hit fills the cache for the next reader.
+
+The upload queue lives in memory: uploads pending at a crash or redeploy, and uploads
+given up after the last retry, exist only in the cache. ``reconcile`` (run in the
+background at startup) compares the cache with the Nextcloud listing and queues every
+cached summary that is missing there or older there; a summary changed in Nextcloud
+after it was cached drops its cache copy instead.
+"""
+import contextlib
+import email.utils
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, Set, Tuple
+
+from app.core import metrics
+from app.core.config import get_settings, get_summary_cache_dir, get_summary_cache_enabled
+from app.core.response_cache import file_tag, response_cache
+from app.services.webdav_client import DavEntry, get_file_content, list_dir_info, write_file_content
+
+log = logging.getLogger("app.summary_store")
+
+SUFFIX = ".summary.md"
+
+
+def summary_name(stem: str) -> str:
+    return f"{stem}{SUFFIX}"
+
+
+def remote_path(name: str) -> str:
+    base = get_settings().summaries_dir
+    return f"{base}/{name}".lstrip('/') if base else name
+
+
+def _cache_path(name: str) -> Optional[str]:
+    # Flat directory: nested names are not cached (they still reach Nextcloud)
+    if not get_summary_cache_enabled() or not name or name in (".", "..") or "/" in name or "\\" in name:
+        return None
+    return os.path.join(get_summary_cache_dir(), name)
+
+
+def _atomic_write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # concurrent writers never share a temp file
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+class _Upload(NamedTuple):
+    content: str
+    attempts: int  # failed attempts so far
+    due: float  # monotonic time of the next attempt
+
+
+class WriteBehind:
+    """Keyed, bounded upload queue with retries; ``upload(name, content)`` does the PUT."""
+
+    def __init__(self, upload: Callable[[str, str], None], workers: int, max_queue: int,
+                 retries: int, retry_seconds: float) -> None:
+        self.upload = upload
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.retries = max(1, retries)
+        self.retry_seconds = max(0.0, retry_seconds)
+        self._pending: "OrderedDict[str, _Upload]" = OrderedDict()
+        self._running: Set[str] = set()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._closed = False
+
+    def submit(self, name: str, content: str) -> str:
+        """Queue the upload of ``name``; returns ``queued``, ``coalesced`` or ``rejected``."""
+        with self._cond:
+            if self._closed:
+                result = "rejected"
+            elif name in self._pending:
+                # keep its place and backoff; a retry of the new text starts from scratch
+                self._pending[name] = self._pending[name]._replace(content=content, attempts=0)
+                result = "coalesced"
+            elif len(self._pending) >= self.max_queue:
+                result = "rejected"
+            else:
+                self._pending[name] = _Upload(content, 0, time.monotonic())
+                result = "queued"
+                if len(self._threads) < self.workers:
+                    t = threading.Thread(target=self._run, name=f"summary-writeback-{len(self._threads)}", daemon=True)
+                    self._threads.append(t)
+                    t.start()
+                self._cond.notify()
+            depth = len(self._pending) + len(self._running)
+        _set_depth(depth)
+        return result
+
+    def is_pending(self, name: str) -> bool:
+        with self._cond:
+            return name in self._pending or name in self._running
+
+    def _next(self) -> Tuple[Optional[Tuple[str, _Upload]], Optional[float]]:
+        # Caller holds the lock. Oldest due upload whose name is not running, else the wait.
+        now = time.monotonic()
+        wait: Optional[float] = None
+        for name, job in self._pending.items():
+            if name in self._running:
+                continue
+            if self._closed or job.due <= now:  # drain does not wait out backoffs
+                del self._pending[name]
+                return (name, job), None
+            wait = job.due - now if wait is None else min(wait, job.due - now)
+        return None, wait
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                item, wait = self._next()
+                while item is None:
+                    if self._closed and not self._pending:
+                        return
+                    self._cond.wait(wait)
+                    item, wait = self._next()
+                name, job = item
+                self._running.add(name)
+            try:
+                self.upload(name, job.content)
+            except Exception as exc:
+                attempts = job.attempts + 1
+                with self._cond:
+                    retry = attempts < self.retries and name not in self._pending  # newer text supersedes
+                    if retry:
+                        self._pending[name] = _Upload(job.content, attempts, time.monotonic() + self.retry_seconds * 2 ** job.attempts)
+                if retry:
+                    metrics.summary_writeback_total.labels(result="retry").inc()
+                else:
+                    metrics.summary_writeback_total.labels(result="failed").inc()
+                    log.warning("summary_writeback_failed", extra={"file": name, "attempts": attempts, "error": str(exc)})
+            else:
+                metrics.summary_writeback_total.labels(result="ok").inc()
+            finally:
+                with self._cond:
+                    self._running.discard(name)
+                    depth = len(self._pending) + len(self._running)
+                    self._cond.notify_all()  # a queued upload of this name may run now; drain may finish
+                _set_depth(depth)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"pending": len(self._pending), "running": len(self._running), "workers": len(self._threads)}
+
+    def drain(self, timeout: float) -> bool:
+        """Stop intake, wait up to ``timeout`` for queued and running uploads. True if all finished."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            while self._pending or self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._threads:
+                    break
+                self._cond.wait(remaining)
+            left = len(self._pending) + len(self._running)
+        if left:
+            log.warning("summary_writeback_drain_timeout", extra={"unfinished": left})
+        return left == 0
+
+
+def _set_depth(depth: int) -> None:
+    try:
+        metrics.summary_writeback_queue_depth.set(depth)
+    except Exception:  # pragma: no cover
+        pass
+
+
+def _upload(name: str, content: str) -> None:
+    # The checksum lets public write-file dedup against the server without a download
+    write_file_content(remote_path(name), content, sha256=hashlib.sha256(content.encode("utf-8")).hexdigest())
+    response_cache.invalidate("summaries")  # the Nextcloud listing changed
+
+
+_writer: Optional[WriteBehind] = None
+_writer_lock = threading.Lock()
+# Cache file and upload queue see the writes of one name in the same order
+_write_lock = threading.RLock()
+
+
+def get_writer() -> WriteBehind:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            settings = get_settings()
+            _writer = WriteBehind(_upload, settings.summary_writeback_workers, settings.summary_writeback_queue_max,
+                                  settings.summary_writeback_retries, settings.summary_writeback_retry_seconds)
+        return _writer
+
+
+def shutdown(timeout: float) -> bool:
+    """Drain pending uploads (lifespan teardown); the next write starts a fresh writer."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    return writer.drain(timeout) if writer is not None else True
+
+
+def cache_put(name: str, content: str) -> bool:
+    """Store ``content`` in the local cache only; False if the cache is disabled or failed."""
+    path = _cache_path(name)
+    if path is None:
+        return False
+    try:
+        with _write_lock:
+            _atomic_write(path, content)
+        return True
+    except Exception as exc:
+        log.warning("summary_cache_write_failed", extra={"file": name, "error": str(exc)})
+        return False
+
+
+def write(name: str, content: str) -> str:
+    """Store a summary: local cache now, Nextcloud in the background.
+
+    Returns ``queued`` / ``coalesced`` (upload pending) or ``sync`` (uploaded before
+    returning; upload errors propagate).
+    """
+    with _write_lock:
+        result = get_writer().submit(name, content) if cache_put(name, content) else "rejected"
+    response_cache.invalidate("summaries", file_tag("summaries", name))
+    if result == "rejected":
+        _upload(name, content)
+        result = "sync"
+    metrics.summary_store_writes_total.labels(result=result).inc()
+    return result
+
+
+def upload_pending(name: str) -> bool:
+    """True while Nextcloud has not caught up with the cached text of ``name``."""
+    writer = _writer
+    return writer is not None and writer.is_pending(name)
+
+
+def read_cached(name: str, max_chars: Optional[int] = None) -> Optional[str]:
+    """Local cache only (never WebDAV); ``max_chars`` reads just the leading text."""
+    path = _cache_path(name)
+    if path is None:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read() if max_chars is None else f.read(max_chars)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    metrics.summary_store_reads_total.labels(source="cache").inc()
+    return text
+
+
+def read(name: str) -> str:
+    """Full summary text, cache first; falls back to Nextcloud (errors as get_file_content)."""
+    cached = read_cached(name)
+    if cached is not None:
+        return cached
+    content = get_file_content(remote_path(name))
+    metrics.summary_store_reads_total.labels(source="webdav").inc()
+    path = _cache_path(name)
+    if path is not None:
+        with _write_lock:
+            # A write that landed meanwhile is newer than what we downloaded
+            if not os.path.exists(path) and not upload_pending(name):
+                cache_put(name, content)
+    return content
+
+
+def list_cached(suffix: str = SUFFIX) -> list[str]:
+    """Sorted summary file names in the local cache (``suffix=""``: every stored name)."""
+    if not get_summary_cache_enabled():
+        return []
+    try:
+        return sorted(n for n in os.listdir(get_summary_cache_dir()) if n.endswith(suffix) and not n.endswith(".tmp"))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def iter_cached(limit_files: int = 500) -> Iterator[Tuple[str, str]]:
+    """(name, text) of cached summaries, sorted by name."""
+    base = get_summary_cache_dir()
+    for name in list_cached()[:limit_files]:
+        try:
+            with open(os.path.join(base, name), "r", encoding="utf-8") as f:
+                yield name, f.read()
+        except Exception:
+            continue
+
+
+def _remote_mtime(entry: DavEntry) -> float:
+    try:
+        return email.utils.parsedate_to_datetime(entry.last_modified).timestamp() if entry.last_modified else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def reconcile() -> Dict[str, int]:
+    """Queue cached summaries that Nextcloud lacks or has an older version of.
+
+    Returns counts: ``queued``, ``current`` (same content on Nextcloud), ``dropped``
+    (Nextcloud changed later: cache copy removed, the next read refills it) and
+    ``rejected`` (upload queue full; picked up by the next run).
+    """
+    counts = {"queued": 0, "current": 0, "dropped": 0, "rejected": 0}
+    names = list_cached("")  # public write-file stores summaries under any name
+    if not names:
+        return counts
+    try:
+        listing = list_dir_info(get_settings().summaries_dir, depth=1)
+    except FileNotFoundError:
+        listing = []
+    remote = {e.name: e for e in listing if not e.is_dir}
+    for name in names:
+        path = _cache_path(name)
+        if path is None:
+            continue
+        with _write_lock:  # a concurrent write must not be overtaken by the older file content
+            if upload_pending(name):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            entry = remote.get(name)
+            if entry is not None and (entry.sha256 == hashlib.sha256(data).hexdigest()
+                                      or (entry.sha256 is None and entry.size == len(data))):
+                counts["current"] += 1
+                continue
+            if entry is not None and _remote_mtime(entry) >= mtime:
+                with contextlib.suppress(OSError):
+                    os.unlink(path)
+                response_cache.invalidate("summaries", file_tag("summaries", name))
+                counts["dropped"] += 1
+                continue
+            result = get_writer().submit(name, data.decode("utf-8", errors="replace"))
+        counts["rejected" if result == "rejected" else "queued"] += 1
+    log.info("summary_reconcile", extra=counts)
+    return counts
+
+
+__all__ = [
+    "SUFFIX",
+    "WriteBehind",
+    "summary_name",
+    "remote_path",
+    "get_writer",
+    "shutdown",
+    "cache_put",
+    "write",
+    "upload_pending",
+    "read_cached",
+    "read",
+    "list_cached",
+    "iter_cached",
+    "reconcile",
+]
@@ -19,11 +19,17 @@ Functions:
 """
 from __future__ import annotations
 
+import hashlib
 import os
-from typing import Tuple, List, Sequence, Any
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+from urllib.parse import unquote, urlparse
+from xml.etree import ElementTree
 import requests
 from dotenv import load_dotenv
 from webdav3.client import Client
+from app.core.timing import timed
 
 _loaded = False
 
@@ -58,6 +64,7 @@ def get_webdav_client() -> Client:
     return Client(options)
 
 
+@timed("webdav")
 def list_dir(path: str) -> List[str]:
     """List directory entries at given relative path (relative to WebDAV root)."""
     client = get_webdav_client()
@@ -78,6 +85,7 @@ def _sanitize_path(path: str) -> str:
     return '/'.join(parts)
 
 
+@timed("webdav")
 def get_file_content(path: str) -> str:
     """Download file content as UTF-8 (replacement chars on decode errors).
 
@@ -102,30 +110,252 @@ def get_file_content(path: str) -> str:
 __all__.append("get_file_content")
 
 
-def write_file_content(path: str, content: str) -> None:
+@timed("webdav")
+def get_file_bytes(path: str, max_bytes: int | None = None) -> bytes:
+    """Download a file as raw bytes (binary documents: PDF, ...).
+
+    With ``max_bytes`` the download is streamed and aborted with ValueError once the
+    file turns out larger. Raises FileNotFoundError if the file does not exist.
+    """
+    rel = _sanitize_path(path)
+    if not rel:
+        raise FileNotFoundError("Empty path")
+    url, user, password = load_webdav_config()
+    with requests.get(f"{url}/{rel}", auth=(user, password), stream=max_bytes is not None) as resp:
+        if resp.status_code == 404:
+            raise FileNotFoundError(rel)
+        if resp.status_code >= 400:
+            raise RuntimeError(f"HTTP {resp.status_code} while fetching {rel}")
+        if max_bytes is None:
+            return resp.content
+        buf = bytearray()
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            buf.extend(chunk)
+            if len(buf) > max_bytes:
+                raise ValueError(f"{rel} exceeds {max_bytes} bytes")
+        return bytes(buf)
+
+__all__.append("get_file_bytes")
+
+
+@timed("webdav")
+def get_file_sha256(path: str) -> Tuple[str, int]:
+    """(sha256 hex, size) of a remote file, hashed while streaming (body not kept in memory).
+
+    Raises FileNotFoundError if the file does not exist.
+    """
+    rel = _sanitize_path(path)
+    if not rel:
+        raise FileNotFoundError("Empty path")
+    url, user, password = load_webdav_config()
+    digest = hashlib.sha256()
+    size = 0
+    with requests.get(f"{url}/{rel}", auth=(user, password), stream=True) as resp:
+        if resp.status_code == 404:
+            raise FileNotFoundError(rel)
+        if resp.status_code >= 400:
+            raise RuntimeError(f"HTTP {resp.status_code} while fetching {rel}")
+        for chunk in resp.iter_content(chunk_size=256 * 1024):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+__all__.append("get_file_sha256")
+
+
+@timed("webdav")
+def get_file_head(path: str, max_bytes: int, timeout: float | None = None) -> str:
+    """Download only the first ``max_bytes`` of a file (HTTP Range) as UTF-8.
+
+    Servers that ignore Range (200 instead of 206) are read streaming and cut off, so at
+    most ``max_bytes`` are transferred either way. A multi-byte character split at the
+    cut is dropped. Raises FileNotFoundError if the file does not exist.
+    """
+    rel = _sanitize_path(path)
+    if not rel:
+        raise FileNotFoundError("Empty path")
+    url, user, password = load_webdav_config()
+    headers = {"Range": f"bytes=0-{max(1, max_bytes) - 1}"}
+    with requests.get(f"{url}/{rel}", auth=(user, password), headers=headers, stream=True, timeout=timeout) as resp:
+        if resp.status_code == 404:
+            raise FileNotFoundError(rel)
+        if resp.status_code == 416:  # empty file: nothing satisfies the range
+            return ""
+        if resp.status_code >= 400:
+            raise RuntimeError(f"HTTP {resp.status_code} while fetching {rel}")
+        buf = bytearray()
+        for chunk in resp.iter_content(chunk_size=min(max_bytes, 64 * 1024) or 1):
+            buf.extend(chunk)
+            if len(buf) >= max_bytes:
+                break
+    text = bytes(buf[:max_bytes]).decode("utf-8", errors="replace")
+    return text.rstrip("\ufffd") if len(buf) >= max_bytes else text
+
+__all__.append("get_file_head")
+
+
+@timed("webdav")
+def write_file_content(path: str, content: str, sha256: str | None = None) -> None:
     """Write (upload) text content to the given relative path.
 
     Creates intermediate directories implicitly via WebDAV client if supported.
+    With ``sha256`` the digest is sent as ``OC-Checksum`` so Nextcloud stores it and
+    ``get_file_checksum`` can later dedup without downloading the body.
     """
     rel = _sanitize_path(path)
     if not rel:
         raise ValueError("Empty path")
     url, user, password = load_webdav_config()
     file_url = f"{url}/{rel}"
-    resp = requests.put(file_url, data=content.encode('utf-8'), auth=(user, password))
+    headers = {"OC-Checksum": f"SHA256:{sha256}"} if sha256 else None
+    resp = requests.put(file_url, data=content.encode('utf-8'), auth=(user, password), headers=headers)
+    if resp.status_code == 409:  # parent collection missing: it was removed behind our back
+        _forget_dirs(rel.rsplit('/', 1)[0] if '/' in rel else '')
     if resp.status_code >= 400:
         raise RuntimeError(f"HTTP {resp.status_code} while writing {rel}")
 
 __all__.append("write_file_content")
 
 
+_CHECKSUM_PROPFIND = (
+    '<?xml version="1.0"?>'
+    '<d:propfind xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns">'
+    '<d:prop><oc:checksums/></d:prop></d:propfind>'
+)
+_SHA256_RE = re.compile(r"SHA256:([0-9a-fA-F]{64})")
+
+
+@timed("webdav")
+def get_file_checksum(path: str) -> str | None:
+    """SHA256 hex digest the server stored for ``path`` (``oc:checksums``), body not transferred.
+
+    Returns None if the file does not exist or the server has no SHA256 checksum for it
+    (uploaded without ``OC-Checksum`` or a server that does not keep checksums).
+    """
+    rel = _sanitize_path(path)
+    if not rel:
+        return None
+    url, user, password = load_webdav_config()
+    resp = requests.request("PROPFIND", f"{url}/{rel}", auth=(user, password),
+                            headers={"Depth": "0", "Content-Type": "application/xml"}, data=_CHECKSUM_PROPFIND)
+    if resp.status_code == 404:
+        return None
+    if resp.status_code >= 400:
+        raise RuntimeError(f"HTTP {resp.status_code} while reading checksum of {rel}")
+    match = _SHA256_RE.search(resp.text or "")
+    return match.group(1).lower() if match else None
+
+__all__.append("get_file_checksum")
+
+
+class DavEntry(NamedTuple):
+    """PROPFIND metadata of one resource; ``path`` is relative to the WebDAV root."""
+    path: str
+    name: str
+    etag: str | None
+    size: int | None
+    last_modified: str | None
+    is_dir: bool
+    sha256: str | None = None  # from oc:checksums when the uploader sent OC-Checksum
+    content_type: str | None = None  # getcontenttype (MIME type the server detected)
+
+
+_INFO_PROPFIND = (
+    '<?xml version="1.0"?>'
+    '<d:propfind xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns"><d:prop>'
+    '<d:getetag/><d:getcontentlength/><d:getlastmodified/><d:getcontenttype/><d:resourcetype/><oc:checksums/>'
+    '</d:prop></d:propfind>'
+)
+_DAV = "{DAV:}"
+_OC = "{http://owncloud.org/ns}"
+
+
+@timed("webdav")
+def list_dir_info(path: str, depth: int = 1) -> List[DavEntry]:
+    """PROPFIND ``path`` with metadata (etag, size, last-modified, MIME type), no file bodies.
+
+    ``depth=1``: the directory itself first, then its children. ``depth=0``: only the
+    directory, a cheap probe whose ETag changes whenever anything below it changes
+    (Nextcloud). Raises FileNotFoundError if ``path`` does not exist.
+    """
+    rel = _sanitize_path(path)
+    url, user, password = load_webdav_config()
+    resp = requests.request("PROPFIND", f"{url}/{rel}/" if rel else f"{url}/", auth=(user, password),
+                            headers={"Depth": str(depth), "Content-Type": "application/xml"}, data=_INFO_PROPFIND)
+    if resp.status_code == 404:
+        raise FileNotFoundError(rel)
+    if resp.status_code >= 400:
+        raise RuntimeError(f"HTTP {resp.status_code} while listing {rel}")
+    root_path = unquote(urlparse(url).path).rstrip('/')
+    out: List[DavEntry] = []
+    for node in ElementTree.fromstring(resp.content).iter(f"{_DAV}response"):
+        href = unquote(urlparse(node.findtext(f"{_DAV}href") or "").path)
+        if href.startswith(root_path):
+            href = href[len(root_path):]
+        entry_path = href.strip('/')
+        props: Dict[str, Any] = {}
+        for propstat in node.iter(f"{_DAV}propstat"):
+            if " 200 " not in f"{propstat.findtext(f'{_DAV}status') or ''} ":
+                continue
+            prop = propstat.find(f"{_DAV}prop")
+            if prop is not None:
+                for child in prop:
+                    props[child.tag] = child
+        rtype = props.get(f"{_DAV}resourcetype")
+        is_dir = rtype is not None and rtype.find(f"{_DAV}collection") is not None
+        length = props.get(f"{_DAV}getcontentlength")
+        etag = props.get(f"{_DAV}getetag")
+        mtime = props.get(f"{_DAV}getlastmodified")
+        ctype = props.get(f"{_DAV}getcontenttype")
+        checksums = props.get(f"{_OC}checksums")
+        checksum = _SHA256_RE.search("".join(checksums.itertext())) if checksums is not None else None
+        out.append(DavEntry(
+            path=entry_path,
+            name=entry_path.rsplit('/', 1)[-1],
+            etag=((etag.text or "").strip('"') or None) if etag is not None else None,
+            size=int(length.text) if length is not None and (length.text or "").isdigit() else None,
+            last_modified=mtime.text if mtime is not None else None,
+            is_dir=is_dir,
+            sha256=checksum.group(1).lower() if checksum else None,
+            content_type=((ctype.text or "").strip() or None) if ctype is not None else None,
+        ))
+    # The requested collection is listed first by convention; do not rely on it
+    out.sort(key=lambda e: e.path != rel)
+    return out
+
+__all__ += ["DavEntry", "list_dir_info"]
+
+
+# Directories known to exist (created or probed by this process); mkdirs skips them so a
+# write into a known folder is a single PUT instead of one PROPFIND per path segment.
+_known_dirs: set[str] = set()
+_known_dirs_lock = threading.Lock()  # request threads add and forget concurrently
+_KNOWN_DIRS_MAX = 4096
+
+
+def _forget_dirs(path: str) -> None:
+    norm = _sanitize_path(path)
+    with _known_dirs_lock:
+        for known in [d for d in _known_dirs if d == norm or d.startswith(norm + '/') or not norm]:
+            _known_dirs.discard(known)
+
+
+def _remember_dir(path: str) -> None:
+    with _known_dirs_lock:
+        if len(_known_dirs) >= _KNOWN_DIRS_MAX:
+            _known_dirs.clear()
+        _known_dirs.add(path)
+
+
+@timed("webdav")
 def mkdirs(path: str) -> bool:
     """Create directory path recursively (best-effort). Returns True if created new leaf.
 
-    WebDAV MKCOL only creates a single level; we iterate segments.
+    WebDAV MKCOL only creates a single level; we iterate segments. Segments already
+    seen by this process are not probed again.
     """
     norm = _sanitize_path(path)
-    if not norm:
+    if not norm or norm in _known_dirs:
         return False
     url, user, password = load_webdav_config()
     base = url.rstrip('/')
@@ -134,6 +364,8 @@ def mkdirs(path: str) -> bool:
     for segment in norm.split('/'):
         current.append(segment)
         partial = '/'.join(current)
+        if partial in _known_dirs:
+            continue
         dir_url = f"{base}/{partial}".rstrip('/')
         # Probe existence via PROPFIND depth 0 (fast)
         head = requests.request("PROPFIND", dir_url + '/', auth=(user, password), headers={"Depth": "0"})
@@ -142,6 +374,9 @@ def mkdirs(path: str) -> bool:
             if mk.status_code not in (201, 405):  # 405 = already exists race
                 raise RuntimeError(f"MKCOL failed for {partial}: {mk.status_code}")
             created_any = True
+        elif head.status_code >= 400:
+            continue  # unknown state: probe again next time
+        _remember_dir(partial)
     return created_any
 
 __all__.append("mkdirs")
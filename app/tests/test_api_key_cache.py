@@ -0,0 +1,56 @@
+from sqlalchemy import event
+from app.core import api_keys
+from app.core.api_keys import create_api_key, last_used_flusher, revoke_api_key, verify_api_key_cached
+from app.database import database as db
+from app.database.models import APIKeyORM
+
+
+def _count_selects():  # type: ignore[no-untyped-def]
+    seen: list[str] = []
+
+    def _before(conn, cursor, statement, params, context, executemany):  # type: ignore[no-untyped-def]
+        if "api_keys" in statement:
+            seen.append(statement.split()[0].upper())
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    return seen, lambda: event.remove(db.engine, "before_cursor_execute", _before)
+
+
+def test_verified_key_is_cached_and_revocation_invalidates(client):
+    api_keys._key_cache.clear()
+    with db.get_session() as s:
+        raw = create_api_key(s, "ci")
+    seen, stop = _count_selects()
+    try:
+        first = verify_api_key_cached(raw)
+        second = verify_api_key_cached(raw)
+        assert first is not None and second is first
+        assert seen == ["SELECT"]  # second call served from cache, no last_used_at UPDATE inline
+        assert verify_api_key_cached("nope") is None
+        assert verify_api_key_cached("nope") is None
+        assert seen == ["SELECT", "SELECT"]  # negative result cached too
+        with db.get_session() as s:
+            assert revoke_api_key(s, first.id)
+        assert verify_api_key_cached(raw) is None
+    finally:
+        stop()
+        last_used_flusher.stop()
+
+
+def test_last_used_at_is_coalesced_into_one_batched_update(client):
+    api_keys._key_cache.clear()
+    last_used_flusher.stop()
+    with db.get_session() as s:
+        raws = [create_api_key(s, f"k{i}") for i in range(3)]
+    for raw in raws * 5:
+        verify_api_key_cached(raw)
+    seen, stop = _count_selects()
+    try:
+        assert last_used_flusher.flush() == 3
+        assert seen == ["UPDATE"]
+        assert last_used_flusher.flush() == 0
+    finally:
+        stop()
+        last_used_flusher.stop()
+    with db.get_session() as s:
+        assert all(k.last_used_at is not None for k in s.query(APIKeyORM).all())
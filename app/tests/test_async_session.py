@@ -0,0 +1,25 @@
+import asyncio
+from sqlalchemy import select
+from app.database import database as db
+from app.database.models import EntryORM
+
+
+def test_async_url_mapping():
+    assert db._async_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    assert db._async_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert db._async_url("postgres://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+
+def test_async_session_shares_database_with_sync(client):
+    with db.get_session() as s:
+        s.add(EntryORM(text="from sync"))
+
+    async def roundtrip() -> list[str]:
+        async with db.get_async_session() as s:
+            s.add(EntryORM(text="from async"))
+        async with db.get_async_session() as s:
+            return list((await s.execute(select(EntryORM.text).order_by(EntryORM.id))).scalars())
+
+    assert asyncio.run(roundtrip()) == ["from sync", "from async"]
+    with db.get_session() as s:
+        assert s.query(EntryORM).count() == 2
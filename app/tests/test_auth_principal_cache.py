@@ -0,0 +1,26 @@
+from sqlalchemy import event
+from app.core import security
+from app.database import database as db
+from app.database.models import UserORM
+
+
+def test_principal_cached_until_user_changes(client, auth_headers):
+    security.invalidate_principal()
+    user_queries: list[str] = []
+
+    def _before(conn, cursor, statement, params, context, executemany):  # type: ignore[no-untyped-def]
+        if "FROM users" in statement:
+            user_queries.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        for _ in range(3):
+            assert client.get("/api/v1/jobs/999/status", headers=auth_headers).status_code == 404
+        assert len(user_queries) == 1
+        with db.get_session() as s:
+            s.query(UserORM).filter(UserORM.username == "tester").one().username = "renamed"
+        # update event evicted the cached principal; the token's subject no longer exists
+        assert client.get("/api/v1/jobs/999/status", headers=auth_headers).status_code == 401
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+        security.invalidate_principal()
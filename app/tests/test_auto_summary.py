@@ -0,0 +1,59 @@
+import threading
+import time
+from app.services.auto_summary import AutoSummaryExecutor
+
+
+def test_queue_is_bounded_and_coalesces_per_file():
+    gate = threading.Event()
+    done: list[tuple[str, str]] = []
+    ex = AutoSummaryExecutor(workers=1, max_queue=2)
+
+    def job(key: str, content: str) -> None:
+        gate.wait(5)
+        done.append((key, content))
+
+    assert ex.submit("a", job, "a", "a1") == "queued"
+    time.sleep(0.05)  # worker is now blocked inside a1
+    assert ex.submit("a", job, "a", "a2") == "queued"  # a is running: a new job, not merged into it
+    assert ex.submit("b", job, "b", "b1") == "queued"
+    assert ex.submit("b", job, "b", "b2") == "coalesced"
+    assert ex.submit("c", job, "c", "c1") == "rejected"
+    assert ex.stats() == {"pending": 2, "running": 1, "workers": 1}
+    gate.set()
+    assert ex.drain(5)
+    assert done == [("a", "a1"), ("a", "a2"), ("b", "b2")]
+    assert ex.submit("d", job, "d", "d1") == "rejected"  # closed after drain
+
+
+def test_same_file_never_runs_concurrently():
+    active: dict[str, int] = {}
+    overlap: list[str] = []
+    lock = threading.Lock()
+    ex = AutoSummaryExecutor(workers=4, max_queue=10)
+
+    def job(key: str) -> None:
+        with lock:
+            active[key] = active.get(key, 0) + 1
+            if active[key] > 1:
+                overlap.append(key)
+        time.sleep(0.05)
+        with lock:
+            active[key] -= 1
+
+    for _ in range(3):
+        ex.submit("same", job, "same")
+        time.sleep(0.01)
+    for i in range(3):
+        ex.submit(f"other{i}", job, f"other{i}")
+    assert ex.drain(5)
+    assert overlap == []
+
+
+def test_drain_times_out_on_stuck_job():
+    gate = threading.Event()
+    ex = AutoSummaryExecutor(workers=1, max_queue=5)
+    ex.submit("x", gate.wait, 5)
+    t0 = time.perf_counter()
+    assert ex.drain(0.1) is False
+    assert time.perf_counter() - t0 < 1
+    gate.set()
@@ -0,0 +1,95 @@
+import hashlib
+import pytest
+import app.core.config as cfg
+from app.database.database import get_session, init_db
+from app.database.models import ContentHashORM, FileORM
+from app.services import content_hash_index as chi
+from app.services.webdav_client import DavEntry
+
+
+@pytest.fixture()
+def db(tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    monkeypatch.setenv("BB_DB_URL", f"sqlite:///{tmp_path / 'chi.db'}")
+    monkeypatch.setenv("BB_TESTING", "1")
+    cfg.reload_settings_for_tests()
+    init_db()
+    yield
+    monkeypatch.undo()
+    cfg.reload_settings_for_tests()
+
+
+def test_register_keeps_canonical_file_and_backfill(db):
+    sha = hashlib.sha256(b"x").hexdigest()
+    with get_session() as s:
+        chi.register(s, sha, None, 1)  # seen by ingest first, no file row
+        chi.register(s, sha, 7, 1)
+        chi.register(s, sha, 9, 1)
+    with get_session() as s:
+        assert chi.lookup(s, sha).file_id == 7
+        s.add_all([FileORM(original_name="a", storage_path="p/a", sha256="h1"), FileORM(original_name="b", storage_path="p/b", sha256="h1")])
+    with get_session() as s:
+        assert chi.backfill(s.connection()) == 1
+        assert chi.backfill(s.connection()) == 0
+        first = s.query(FileORM.id).filter(FileORM.storage_path == "p/a").scalar()
+        assert s.get(ContentHashORM, "h1").file_id == first
+
+
+def test_remote_hash_avoids_download_when_known(db, monkeypatch):
+    downloads: list[str] = []
+
+    def stream_hash(path):
+        downloads.append(path)
+        return hashlib.sha256(b"body").hexdigest(), 4
+
+    monkeypatch.setattr(chi, "get_file_sha256", stream_hash)
+    entry = DavEntry("drop/a.pdf", "a.pdf", "etag-1", 4, None, False)
+    with get_session() as s:
+        assert chi.remote_sha256(s, entry) == (hashlib.sha256(b"body").hexdigest(), 4, True)
+    with get_session() as s:  # same version again: ETag memo
+        assert chi.remote_sha256(s, entry)[2] is False
+        # server-side checksum: no lookup, no download
+        assert chi.remote_sha256(s, entry._replace(etag="etag-2", sha256="ab" * 32)) == ("ab" * 32, 4, False)
+    assert downloads == ["drop/a.pdf"]
+
+
+def test_rewritten_file_gives_up_old_content(db):
+    x, y = hashlib.sha256(b"X").hexdigest(), hashlib.sha256(b"Y").hexdigest()
+    with get_session() as s:
+        f = FileORM(original_name="e.md", storage_path="in/e.md", sha256=x)
+        s.add(f)
+        s.flush()
+        chi.register(s, x, f.id, 1)
+        # rewrite e.md as "Y"
+        chi.release(s, x, f.id)
+        f.sha256 = y
+        chi.register(s, y, f.id, 1)
+    with get_session() as s:
+        assert chi.lookup(s, x) is None  # "X" is new content again
+        assert chi.lookup(s, y).file_id == f.id
+
+
+def test_lookup_repairs_stale_entry(db):
+    x, y = hashlib.sha256(b"X").hexdigest(), hashlib.sha256(b"Y").hexdigest()
+    with get_session() as s:
+        a = FileORM(original_name="a", storage_path="in/a", sha256=y)  # held X once, rewritten without release
+        b = FileORM(original_name="b", storage_path="in/b", sha256=x)
+        s.add_all([a, b])
+        s.flush()
+        chi.register(s, x, a.id, 1)
+    with get_session() as s:
+        assert chi.lookup(s, x).file_id == b.id  # repointed to the file that still holds X
+        s.query(FileORM).filter(FileORM.id == b.id).update({"sha256": y})
+        assert chi.lookup(s, x) is None
+
+
+def test_record_path_content_follows_overwrite_and_move(db):
+    with get_session() as s:
+        f = FileORM(original_name="e", storage_path="inbox/e.md", sha256="old")
+        s.add(f)
+        s.flush()
+        chi.register(s, "old", f.id, 3)
+        assert chi.record_path_content(s, "inbox/e.md", "new", 3) == f.id  # overwritten via /webdav/put
+        assert chi.lookup(s, "old") is None and chi.lookup(s, "new").file_id == f.id
+        chi.record_path_content(s, "inbox/e.md", None)  # archived: the path is empty
+        assert chi.lookup(s, "new") is None and f.sha256 is None
+        assert chi.record_path_content(s, "inbox/untracked.md", "x") is None
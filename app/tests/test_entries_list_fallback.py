@@ -19,6 +19,6 @@ def test_entries_list_uses_webdav(monkeypatch):
     monkeypatch.setattr(pa, "list_dir", lambda base: [f"{pa.get_settings().inbox_dir}/x.md", f"{pa.get_settings().inbox_dir}/y.md"])  # type: ignore[attr-defined]
     monkeypatch.setattr(pa, "mkdirs", lambda base: True)  # type: ignore[attr-defined]
 
-    resp = pa.public_list_files(kind="entries")
+    resp = pa.list_files(kind="entries")
     assert resp.kind == "entries"
     assert sorted(resp.files) == ["x.md", "y.md"]
@@ -0,0 +1,51 @@
+import pytest
+from app.services import extraction
+from app.services.extraction import ExtractionError
+
+
+def _pdf(text: str) -> bytes:
+    """Smallest useful single-page PDF with a correct xref table."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def test_extractors_by_extension_and_mime():
+    html = b"<html><head><style>p{}</style><script>var x=1;</script></head><body><h1>Title</h1><p>Hello &amp; <b>bye</b></p></body></html>"
+    assert extraction.extract_text_local("page.htm", html) == "Title\nHello & bye"
+    assert extraction.extract_text_local("upload.bin", html, mime_type="text/html; charset=utf-8") == "Title\nHello & bye"
+    assert extraction.extract_text_local("a.md", "﻿# Ü".encode()) == "# Ü"
+    assert "Hello PDF" in extraction.extract_text_local("doc.pdf", _pdf("Hello PDF"))
+    with pytest.raises(ExtractionError):
+        extraction.extract_text_local("image.png", b"\x89PNG")
+    with pytest.raises(ExtractionError):
+        extraction.extract_text_local("broken.pdf", b"not a pdf")
+
+
+def test_process_pool_timeout_recovery_and_cache(monkeypatch):
+    monkeypatch.setattr(extraction, "_cache", extraction.TTLCache(16, 60))
+    data = _pdf("Pooled text")
+    try:
+        with pytest.raises(ExtractionError, match="timed out"):
+            extraction.extract("slow.pdf", data, timeout=0.001)  # worker start-up alone takes longer
+        assert "Pooled text" in extraction.extract("doc.pdf", data, timeout=60)
+        pool = extraction._pool
+        assert "Pooled text" in extraction.extract("copy.pdf", data)  # same content: served from the cache
+        assert extraction._pool is pool
+    finally:
+        extraction.shutdown()
@@ -0,0 +1,51 @@
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1 import files
+from app.core.security import get_current_user
+from app.database.database import get_session
+from app.database.models import FileORM
+
+
+def _files_client() -> TestClient:
+    app = FastAPI()
+    app.include_router(files.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: None
+    return TestClient(app)
+
+
+def _seed(n: int) -> None:
+    with get_session() as s:
+        for i in range(n):
+            s.add(FileORM(original_name=f"f{i}.txt", storage_path=f"inbox/f{i}.txt", size_bytes=i, sha256=f"h{i}"))
+
+
+def test_list_files_cursor_and_projection(client):
+    _seed(5)
+    c = _files_client()
+    r = c.get("/api/v1/files/?limit=2&fields=original_name")
+    assert r.status_code == 200
+    page = r.json()
+    assert page["total"] == 5  # all files, not the page size
+    assert [i["original_name"] for i in page["items"]] == ["f4.txt", "f3.txt"]
+    assert set(page["items"][0]) == {"id", "original_name"}
+    names = [i["original_name"] for i in page["items"]]
+    while page["next_cursor"]:
+        page = c.get(f"/api/v1/files/?limit=2&fields=original_name&cursor={page['next_cursor']}").json()
+        names.extend(i["original_name"] for i in page["items"])
+    assert names == [f"f{i}.txt" for i in range(4, -1, -1)]
+
+    bad = c.get("/api/v1/files/?fields=password")
+    assert bad.status_code == 400
+    assert bad.json()["detail"]["error"]["code"] == "UNKNOWN_FIELD"
+
+
+def test_list_files_ndjson_stream(client):
+    _seed(3)
+    c = _files_client()
+    r = c.get("/api/v1/files/?format=ndjson&fields=storage_path,size_bytes")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["storage_path"] for row in rows] == ["inbox/f2.txt", "inbox/f1.txt", "inbox/f0.txt"]
+    assert set(rows[0]) == {"id", "storage_path", "size_bytes"}
@@ -0,0 +1,48 @@
+import pytest
+from app.core.gcra import GCRALimiter, Rate, parse_rate, parse_route_limits
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_then_steady_refill():
+    clock = FakeClock()
+    lim = GCRALimiter(clock=clock)
+    rate = Rate(5, 60.0)
+    remaining = [lim.hit("a", rate)[1] for _ in range(5)]
+    assert remaining == [4, 3, 2, 1, 0]
+    allowed, _, retry_after, _ = lim.hit("a", rate)
+    assert not allowed
+    assert retry_after == pytest.approx(12.0)
+    clock.now += 12.0  # one emission interval later exactly one request is admitted
+    assert lim.hit("a", rate)[0]
+    assert not lim.hit("a", rate)[0]
+    assert lim.hit("b", rate)[0]  # keys are independent
+
+
+def test_key_table_is_bounded_and_idle_keys_are_swept():
+    clock = FakeClock()
+    lim = GCRALimiter(max_keys=100, clock=clock)
+    rate = Rate(10, 60.0)
+    for i in range(1000):
+        lim.hit(f"ip{i}", rate)
+    assert len(lim) == 100
+    assert lim.evicted == 900
+    clock.now += 61.0  # every key is idle now and carries no state
+    for i in range(60):
+        lim.hit(f"new{i}", rate)
+    assert len(lim) <= 100 and lim.evicted == 900
+
+
+def test_parse_rates_and_route_rules():
+    assert parse_rate("30/min") == Rate(30, 60.0)
+    assert parse_rate("5/s") == Rate(5, 1.0)
+    with pytest.raises(ValueError):
+        parse_rate("abc/min")
+    rules = parse_route_limits("/api/v1=100/min, /api/v1/auth/token=10/min,broken")
+    assert [p for p, _ in rules] == ["/api/v1/auth/token", "/api/v1"]
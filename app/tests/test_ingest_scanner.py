@@ -0,0 +1,238 @@
+import hashlib
+import pytest
+import app.core.config as cfg
+from app.database.database import get_session, init_db
+from app.database.models import IngestScanStateORM
+from app.services.webdav_client import DavEntry
+
+INBOX = "BACKBRAIN5.2/01_inbox"
+DROP = "BACKBRAIN5.2/manual_uploads"
+
+
+class FakeDav:
+    """Two drop dirs whose ETag changes with every modification below them."""
+
+    def __init__(self) -> None:
+        self.files: dict[str, dict[str, str]] = {INBOX: {}, DROP: {}}
+        self.version = {INBOX: 0, DROP: 0}
+        self.calls: list[tuple[str, str]] = []
+
+    def put(self, d: str, name: str, etag: str) -> None:
+        self.files[d][name] = etag
+        self.version[d] += 1
+
+    def list_dir_info(self, path: str, depth: int = 1) -> list[DavEntry]:
+        self.calls.append((f"PROPFIND{depth}", path))
+        out = [DavEntry(path, path.rsplit("/", 1)[-1], f"dir-{self.version[path]}", None, None, True)]
+        if depth:
+            out += [DavEntry(f"{path}/{n}", n, e, 10, "Sun, 19 Oct 2025 10:00:00 GMT", False) for n, e in self.files[path].items()]
+        return out
+
+    def get_file_bytes(self, path: str, max_bytes: int | None = None) -> bytes:
+        self.calls.append(("GET", path))
+        d, name = path.rsplit("/", 1)
+        data = f"text of {path} {self.files[d][name]}".encode()
+        if max_bytes is not None and len(data) > max_bytes:
+            raise ValueError(f"{path} exceeds {max_bytes} bytes")
+        return data
+
+    def write_file_content(self, path: str, text: str) -> None:
+        self.calls.append(("PUT", path))
+        d, name = path.rsplit("/", 1)
+        self.put(d, name, "copied")
+
+
+@pytest.fixture()
+def dav(tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    from app.services import ingest_service as ing
+    monkeypatch.setenv("BB_DB_URL", f"sqlite:///{tmp_path / 'scan.db'}")
+    monkeypatch.setenv("BB_TESTING", "1")
+    cfg.reload_settings_for_tests()
+    init_db()
+    fake = FakeDav()
+    monkeypatch.setattr(ing, "settings", cfg.settings)
+    monkeypatch.setattr(ing, "list_dir_info", fake.list_dir_info)
+    monkeypatch.setattr(ing, "get_file_bytes", fake.get_file_bytes)
+    local = ing.extraction.extract_text_local
+    monkeypatch.setattr(ing.extraction, "extract", lambda name, data, mime_type=None: local(name, data, mime_type))  # no worker processes
+    monkeypatch.setattr(ing, "write_file_content", fake.write_file_content)
+    monkeypatch.setattr(ing, "list_dir", lambda d: ["old.md.summary.md"])
+    yield ing, fake
+    monkeypatch.undo()
+    cfg.reload_settings_for_tests()
+
+
+def test_scan_processes_only_new_and_changed_files(dav):
+    ing, fake = dav
+    fake.put(DROP, "a.md", "e1")
+    fake.put(DROP, "old.md", "e-old")  # summarized before the scanner kept state
+    fake.put(DROP, "skip.bin", "e-bin")
+    ing.response_cache.put("/list-files?kind=entries", b"[]", ("entries",))
+    assert ing.run_scan_cycle() == {"candidates": 2, "ingested": 1}
+    assert ing.response_cache.get("/list-files?kind=entries") is None  # the new entry is listed at once
+    assert ("GET", f"{DROP}/a.md") in fake.calls and ("GET", f"{DROP}/old.md") not in fake.calls
+
+    # Second cycle: the copied entry shows up in the inbox once, nothing is downloaded
+    fake.calls.clear()
+    assert ing.run_scan_cycle() == {"candidates": 1, "ingested": 0}
+    assert not [c for c in fake.calls if c[0] == "GET"]
+
+    # Nothing changed: both directories are skipped after the Depth 0 probe
+    fake.calls.clear()
+    assert ing.run_scan_cycle() == {"candidates": 0, "ingested": 0}
+    assert fake.calls == [("PROPFIND0", INBOX), ("PROPFIND0", DROP)]
+
+    # One changed file: only it is fetched again; deleted files drop their state
+    fake.put(DROP, "a.md", "e2")
+    del fake.files[DROP]["old.md"]
+    fake.calls.clear()
+    assert ing.run_scan_cycle()["candidates"] == 1
+    assert [c for c in fake.calls if c[0] == "GET"] == [("GET", f"{DROP}/a.md")]
+    with get_session() as s:
+        paths = {r.path: r.last_action for r in s.query(IngestScanStateORM).filter(IngestScanStateORM.is_dir.is_(False))}
+    assert paths == {f"{DROP}/a.md": "ingested", f"{INBOX}/a.md": "skipped"}
+
+
+def test_directory_not_marked_scanned_while_candidates_remain(dav, monkeypatch):
+    ing, fake = dav
+    monkeypatch.setattr(ing.settings, "auto_ingest_max_files_per_cycle", 2)
+    for i in range(3):
+        fake.put(DROP, f"f{i}.md", f"e-f{i}")
+    assert ing.run_scan_cycle()["ingested"] == 2
+    assert ing.run_scan_cycle()["ingested"] == 1  # the leftover is still found
+    with get_session() as s:
+        assert s.get(IngestScanStateORM, DROP).etag == f"dir-{fake.version[DROP]}"
+
+
+def test_list_dir_info_parses_propfind(monkeypatch):
+    from app.services import webdav_client as wc
+    monkeypatch.setattr(wc, "load_webdav_config", lambda: ("https://dav.example/remote.php/dav/files/u", "u", "p"))
+    xml = b"""<?xml version="1.0"?>
+<d:multistatus xmlns:d="DAV:">
+ <d:response><d:href>/remote.php/dav/files/u/drop/</d:href>
+  <d:propstat><d:prop><d:getetag>"dir1"</d:getetag><d:resourcetype><d:collection/></d:resourcetype></d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat>
+  <d:propstat><d:prop><d:getcontentlength/></d:prop><d:status>HTTP/1.1 404 Not Found</d:status></d:propstat>
+ </d:response>
+ <d:response><d:href>/remote.php/dav/files/u/drop/a%20b.md</d:href>
+  <d:propstat><d:prop><d:getetag>"f1"</d:getetag><d:getcontentlength>42</d:getcontentlength>
+   <d:getlastmodified>Sun, 19 Oct 2025 10:00:00 GMT</d:getlastmodified><d:getcontenttype>text/markdown</d:getcontenttype><d:resourcetype/></d:prop>
+   <d:status>HTTP/1.1 200 OK</d:status></d:propstat>
+ </d:response>
+</d:multistatus>"""
+
+    class Resp:
+        status_code = 207
+        content = xml
+
+    seen: dict = {}
+    monkeypatch.setattr(wc.requests, "request", lambda method, url, **kw: seen.update(kw, method=method, url=url) or Resp())
+    root, child = wc.list_dir_info("/drop")
+    assert seen["method"] == "PROPFIND" and seen["headers"]["Depth"] == "1"
+    assert root == wc.DavEntry("drop", "drop", "dir1", None, None, True)
+    assert child == wc.DavEntry("drop/a b.md", "a b.md", "f1", 42, "Sun, 19 Oct 2025 10:00:00 GMT", False, content_type="text/markdown")
+
+
+def test_known_content_is_not_ingested_twice(dav, monkeypatch):
+    from app.database.models import FileORM
+    ing, fake = dav
+    sha = hashlib.sha256(b"uploaded").hexdigest()
+    with get_session() as s:  # stored before, e.g. via /files/upload
+        f = FileORM(original_name="one.md", storage_path=f"{INBOX}/one.md", sha256=sha)
+        s.add(f)
+        s.flush()
+        ing.content_hash_index.register(s, sha, f.id)
+    # Same bytes under another name, announced by the server checksum: no download
+    listing = fake.list_dir_info
+
+    def with_checksum(path, depth=1):
+        return [e._replace(sha256=sha) if e.name == "copy.md" else e for e in listing(path, depth)]
+
+    monkeypatch.setattr(ing, "list_dir_info", with_checksum)
+    fake.put(DROP, "copy.md", "e-copy")
+    fake.calls.clear()
+    assert ing.run_scan_cycle()["ingested"] == 0
+    assert ("GET", f"{DROP}/copy.md") not in fake.calls
+    with get_session() as s:
+        assert s.get(IngestScanStateORM, f"{DROP}/copy.md").last_action == "duplicate"
+
+
+def test_document_is_ingested_again_after_its_entry_is_gone(dav, monkeypatch):
+    ing, fake = dav
+    monkeypatch.setattr(ing, "get_file_bytes", lambda path, max_bytes=None: b"same document")
+    fake.put(DROP, "doc.md", "e1")
+    assert ing.run_scan_cycle()["ingested"] == 1
+    # The generated entry is deleted in Nextcloud and the same bytes dropped again: the
+    # index row of the first copy has no file to check and must not block the new copy
+    del fake.files[INBOX]["doc.md"]
+    fake.version[INBOX] += 1
+    fake.put(DROP, "doc.md", "e2")
+    fake.calls.clear()
+    assert ing.run_scan_cycle()["ingested"] == 1
+    assert ("PUT", f"{INBOX}/doc.md") in fake.calls
+
+
+def test_extracted_text_is_written_as_txt_and_size_capped(dav, monkeypatch):
+    ing, fake = dav
+    written: dict[str, str] = {}
+    put = fake.write_file_content
+
+    def capture(path: str, text: str) -> None:
+        written[path] = text
+        put(path, text)
+
+    monkeypatch.setattr(ing, "write_file_content", capture)
+    listing = fake.list_dir_info
+
+    def typed(path, depth=1):  # the server's MIME type picks the extractor, not the extension
+        return [e._replace(content_type="text/html") if e.name == "page.dat" else e for e in listing(path, depth)]
+
+    monkeypatch.setattr(ing, "list_dir_info", typed)
+    monkeypatch.setattr(ing.settings, "ingest_max_file_bytes", 60)
+    monkeypatch.setattr(ing.settings, "ingest_allowed_extensions", ".md,.dat")
+    fake.put(DROP, "page.dat", "e-page")
+    fake.put(DROP, "note.md", "e-note")
+    fake.put(DROP, "huge-" + "x" * 80 + ".md", "e-huge")  # body above the cap
+    assert ing.run_scan_cycle()["ingested"] == 2
+    assert sorted(written) == [f"{INBOX}/note.md", f"{INBOX}/page.dat.txt"]
+    with get_session() as s:
+        actions = {r.path.rsplit("/", 1)[-1][:5]: r.last_action for r in s.query(IngestScanStateORM).filter(IngestScanStateORM.dir == DROP, IngestScanStateORM.is_dir.is_(False))}
+    assert actions == {"page.": "ingested", "note.": "ingested", "huge-": "too_large"}
+
+
+def test_concurrent_scan_cycle_reports_busy(dav, monkeypatch):
+    import threading
+    ing, fake = dav
+    fake.put(DROP, "a.md", "e1")
+    entered, release = threading.Event(), threading.Event()
+    list_dir_info = fake.list_dir_info
+
+    def slow_list(path, depth=1):
+        entered.set()
+        release.wait(5)
+        return list_dir_info(path, depth)
+
+    monkeypatch.setattr(ing, "list_dir_info", slow_list)
+    result: dict = {}
+    t = threading.Thread(target=lambda: result.update(ing.run_scan_cycle()))
+    t.start()
+    assert entered.wait(5)
+    assert ing.run_scan_cycle() == {"busy": True, "candidates": 0, "ingested": 0}  # e.g. POST /ingest/scan-now
+    release.set()
+    t.join(5)
+    assert result == {"candidates": 1, "ingested": 1}
+    assert fake.calls.count(("GET", f"{DROP}/a.md")) == 1
+
+
+def test_discover_candidates_does_not_touch_scan_state(dav):
+    ing, fake = dav
+    fake.put(DROP, "a.md", "e1")
+    fake.put(DROP, "b.md", "e2")
+    ing.run_scan_cycle()
+    del fake.files[DROP]["b.md"]
+    fake.put(DROP, "c.md", "e3")
+    assert [c for c in ing.discover_candidates() if c[0] == DROP] == [(DROP, "c.md")]
+    with get_session() as s:
+        assert s.get(IngestScanStateORM, f"{DROP}/b.md") is not None  # GET /ingest/candidates is a preview
+    ing.run_scan_cycle()
+    with get_session() as s:
+        assert s.get(IngestScanStateORM, f"{DROP}/b.md") is None
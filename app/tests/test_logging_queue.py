@@ -0,0 +1,54 @@
+import json
+import logging
+import queue
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.logging_config import DroppingQueueHandler, JSONLineFormatter
+from app.middleware.access_log import AccessLogMiddleware, parse_sample_rates
+
+
+def _record(msg: str, *args, **extra) -> logging.LogRecord:  # type: ignore[no-untyped-def]
+    rec = logging.LogRecord("t", logging.INFO, __file__, 1, msg, args, None)
+    rec.__dict__.update(extra)
+    return rec
+
+
+def test_queue_handler_drops_when_full_without_formatting():
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=2)
+    handler = DroppingQueueHandler(q)
+    for i in range(5):
+        handler.emit(_record("n=%d", i))
+    assert q.qsize() == 2 and handler.dropped == 3
+    first = q.get_nowait()
+    # %-args are merged but the record is not rendered to text on the calling thread
+    assert first.msg == "n=0" and first.args is None and not hasattr(first, "message")
+    line = json.loads(JSONLineFormatter().format(first))
+    assert line["message"] == "n=0" and line["request_id"] == "-" and line["level"] == "INFO"
+
+
+def test_formatter_emits_extra_fields():
+    line = json.loads(JSONLineFormatter().format(_record("access", path="/x", status=200)))
+    assert line["path"] == "/x" and line["status"] == 200
+
+
+def test_access_log_sampling(caplog):
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():  # type: ignore[no-untyped-def]
+        return {"ok": True}
+
+    @app.get("/boom")
+    def boom():  # type: ignore[no-untyped-def]
+        raise RuntimeError("x")
+
+    app.add_middleware(AccessLogMiddleware, sample_rates=parse_sample_rates("/health=0,/boom=0"))
+    client = TestClient(app, raise_server_exceptions=False)
+    with caplog.at_level(logging.INFO, logger="access"):
+        for _ in range(20):
+            client.get("/health")
+        client.get("/boom")
+        client.get("/other")
+    records = [r for r in caplog.records if r.name == "access"]
+    assert [(r.path, r.status) for r in records] == [("/boom", 500), ("/other", 404)]  # type: ignore[attr-defined]
+    assert records[1].getMessage().startswith("GET /other 404 ") and records[1].getMessage().endswith("ms")
@@ -0,0 +1,27 @@
+import uuid
+from fastapi.testclient import TestClient
+from app.core.metrics import http_requests_total
+
+
+def _series() -> set[tuple[str, str]]:
+    out: set[tuple[str, str]] = set()
+    for metric in http_requests_total.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_total"):
+                out.add((sample.labels["method"], sample.labels["path"]))
+    return out
+
+
+def test_request_metrics_label_by_route_template(client: TestClient):
+    c = client  # BB_TESTING app: no-op rate limiter
+    before = _series()
+    for _ in range(50):
+        c.get(f"/no/such/{uuid.uuid4().hex}")
+        c.get(f"/api/v1/jobs/{uuid.uuid4().int % 10**6}/status")
+        c.request("BREW", f"/{uuid.uuid4().hex}")
+    added = _series() - before
+    paths = {p for _, p in _series()}
+    assert "unmatched" in paths
+    assert "/api/v1/jobs/{job_id}/status" in paths
+    assert not any(p.startswith("/no/such/") for p in paths)
+    assert len(added) <= 3  # GET unmatched, GET job status template, OTHER unmatched
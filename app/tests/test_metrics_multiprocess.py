@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+WORKER = """
+import app.core.metrics as m
+m.write_file_total.inc({n})
+m.http_requests_in_progress.inc()
+m.http_request_duration_seconds.labels(method="GET", path="/x").observe(0.01)
+"""
+
+SCRAPE = """
+import app.core.metrics as m
+print("DEAD", m.cleanup_dead_workers())
+print(m.render_prometheus())
+"""
+
+
+def _run(code: str, mp_dir: Path) -> str:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(mp_dir)}
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    return out.stdout
+
+
+def _value(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + " ") or line.startswith(name + "{"):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} missing in:\n{text}")
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path):
+    mp_dir = tmp_path / "prom"
+    workers = [subprocess.Popen([sys.executable, "-c", WORKER.format(n=n)], cwd=ROOT,
+                                env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(mp_dir)})
+               for n in (1, 2, 3)]
+    assert all(p.wait(timeout=60) == 0 for p in workers)
+    assert list(mp_dir.glob("gauge_livesum_*.db"))
+
+    text = _run(SCRAPE, mp_dir)
+    assert _value(text, "write_file_total") == 6.0
+    assert _value(text, "http_request_duration_seconds_count") == 3.0
+    # All writers exited: their live gauges are dropped, counters are kept
+    dead_line = text.splitlines()[0]
+    assert sorted(int(x) for x in dead_line[len("DEAD ["):-1].split(",")) == sorted(p.pid for p in workers)
+    left = {f.name for f in mp_dir.glob("gauge_livesum_*.db")}
+    assert not left & {f"gauge_livesum_{p.pid}.db" for p in workers}
+    assert _value(_run(SCRAPE, mp_dir), "write_file_total") == 6.0
@@ -60,3 +60,34 @@ def test_pagination_basic(client, auth_headers):
     assert r7.status_code == 422
     j7 = r7.json()
     assert j7["error"]["code"] == "VALIDATION_ERROR"
+
+
+def test_pagination_keyset_cursor(client, auth_headers):
+    for i in range(7):
+        r = client.post("/api/v1/entries/", json={"text": f"Item {i}"}, headers=auth_headers)
+        assert r.status_code == 202
+        process_once()
+
+    seen = []
+    r = client.get("/api/v1/entries/?limit=3", headers=auth_headers)
+    assert r.status_code == 200
+    page = r.json()
+    assert page["total"] == 7
+    seen.extend(item["text"] for item in page["items"])
+    while page["next_cursor"]:
+        r = client.get(f"/api/v1/entries/?limit=3&cursor={page['next_cursor']}", headers=auth_headers)
+        assert r.status_code == 200
+        page = r.json()
+        seen.extend(item["text"] for item in page["items"])
+    assert seen == [f"Item {i}" for i in range(7)]
+    assert len(page["items"]) == 1
+
+    # total cache is invalidated by deletes in this process
+    first_id = client.get("/api/v1/entries/?limit=1", headers=auth_headers).json()["items"][0]["id"]
+    assert client.delete(f"/api/v1/entries/{first_id}", headers=auth_headers).status_code == 204
+    assert client.get("/api/v1/entries/", headers=auth_headers).json()["total"] == 6
+
+    # malformed cursor -> 400
+    bad = client.get("/api/v1/entries/?cursor=not-a-cursor", headers=auth_headers)
+    assert bad.status_code == 400
+    assert bad.json()["error"]["code"] == "INVALID_CURSOR"
@@ -0,0 +1,98 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+import app.core.config as cfg
+from app.core.profiler import SamplingProfiler, SlowRequestRecorder
+from app.main import create_app
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_collapses_hot_stack():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,))
+    worker.start()
+    prof = SamplingProfiler()
+    try:
+        assert prof.start(0.3, 0.005)
+        assert not prof.start(1.0)  # one run at a time
+        time.sleep(0.1)
+        prof.stop()
+    finally:
+        stop.set()
+        worker.join()
+    assert not prof.running and prof.samples > 0
+    lines = prof.collapsed().splitlines()
+    hot = [line for line in lines if "test_profiler:_spin" in line]
+    assert hot and hot[0].rsplit(" ", 1)[1].isdigit()
+
+
+def test_slow_request_ring_buffer_is_bounded():
+    rec = SlowRequestRecorder(threshold=0.0, capacity=2, poll=60)
+    for rid in ("a", "b", "c"):
+        rec.begin(rid, "GET", "/x")
+    assert rec.capture() == 3
+    for rid in ("a", "b", "c"):
+        rec.end(rid, 200)
+    assert rec.get("a") is None
+    assert [e["request_id"] for e in rec.list()] == ["c", "b"]
+    assert rec.get("c")["status"] == 200 and rec.get("c")["stacks"]
+    watchdog = rec._thread
+    assert watchdog is not None and watchdog.is_alive()
+    rec.stop()
+    assert not watchdog.is_alive()
+
+
+def test_replacing_the_recorder_stops_its_watchdog():
+    from app.core import profiler
+    old = profiler.configure_slow_requests(50, 10)
+    old.begin("r", "GET", "/x")
+    profiler.configure_slow_requests(0, 10)
+    assert not old._thread.is_alive()
+
+
+@pytest.fixture()
+def diag_client(client, auth_headers, monkeypatch):  # type: ignore[no-untyped-def]
+    monkeypatch.setenv("PROFILER_ENABLED", "1")
+    monkeypatch.setenv("SLOW_REQUEST_THRESHOLD_MS", "50")
+    cfg.reload_settings_for_tests()
+    test_app = create_app()
+
+    @test_app.get("/slow-for-test")
+    def _slow_handler() -> dict:
+        time.sleep(0.3)
+        return {"ok": True}
+
+    yield TestClient(test_app)
+    monkeypatch.undo()
+    cfg.reload_settings_for_tests()
+
+
+def test_slow_request_is_captured_by_request_id(diag_client: TestClient, auth_headers):
+    assert diag_client.get("/diag/slow-requests").status_code == 401
+    r = diag_client.get("/slow-for-test")
+    rid = r.headers["X-Request-ID"]
+    fast = diag_client.get("/health").headers["X-Request-ID"]
+    listing = diag_client.get("/diag/slow-requests", headers=auth_headers).json()
+    assert rid in [e["request_id"] for e in listing["items"]]
+    assert fast not in [e["request_id"] for e in listing["items"]]
+    entry = diag_client.get(f"/diag/slow-requests/{rid}", headers=auth_headers).json()
+    assert entry["duration_ms"] >= 300 and entry["status"] == 200
+    assert any("_slow_handler" in stack for stack in entry["stacks"].values())
+    assert diag_client.get("/diag/slow-requests/nope", headers=auth_headers).status_code == 404
+
+
+def test_profile_endpoints(diag_client: TestClient, auth_headers):
+    r = diag_client.post("/diag/profile/start", params={"seconds": 0.2, "interval_ms": 5}, headers=auth_headers)
+    assert r.status_code == 202, r.text
+    assert diag_client.post("/diag/profile/start", headers=auth_headers).status_code == 409
+    r = diag_client.get("/diag/profile", params={"wait": True, "format": "json"}, headers=auth_headers)
+    body = r.json()
+    assert body["running"] is False and body["samples"] > 0
+    r = diag_client.post("/diag/profile/stop", headers=auth_headers)
+    assert r.headers["content-type"].startswith("text/plain")
+    assert diag_client.post("/diag/profile/start", params={"seconds": 10_000}, headers=auth_headers).status_code == 400
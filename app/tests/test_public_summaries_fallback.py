@@ -1,24 +1,39 @@
 from __future__ import annotations
+import threading
+import time
+import pytest
 
-def test_public_get_all_summaries_webdav_fallback(monkeypatch):
-    """If DB access fails, endpoint should fall back to WebDAV and still return 200 structure."""
-    from app.api import public_alias as pa
 
-    # Force DB path to raise when context manager used
-    class BrokenCtx:
-        def __enter__(self):  # pragma: no cover
-            raise RuntimeError("DB down")
-        def __exit__(self, exc_type, exc, tb):  # pragma: no cover
-            return False
+class BrokenCtx:
+    def __enter__(self):  # pragma: no cover
+        raise RuntimeError("DB down")
+    def __exit__(self, exc_type, exc, tb):  # pragma: no cover
+        return False
 
-    monkeypatch.setattr(pa, "get_session", lambda: BrokenCtx())
 
+@pytest.fixture()
+def pa(monkeypatch, tmp_path):
+    from app.api import public_alias as pa
+    # Force DB path to raise when context manager used
+    monkeypatch.setattr(pa, "get_session", lambda: BrokenCtx())
+    monkeypatch.setenv("SUMMARY_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "cache").mkdir()
     pa.get_settings().summaries_dir = "BACKBRAIN5.2/summaries"
-
-    monkeypatch.setattr(pa, "get_file_content", lambda rel: "Summary content for " + rel)
     # Provide list_dir + mkdirs if imported inside function
     monkeypatch.setattr(pa, "list_dir", lambda base: [f"{base}/a.md", f"{base}/b.md"])  # type: ignore[attr-defined]
     monkeypatch.setattr(pa, "mkdirs", lambda base: True)  # type: ignore[attr-defined]
+    return pa
+
+
+def test_public_get_all_summaries_webdav_fallback(pa, monkeypatch):
+    """If DB access fails, endpoint should fall back to WebDAV and still return 200 structure."""
+    requested: list[int] = []
+
+    def head(rel, max_bytes, timeout=None):
+        requested.append(max_bytes)
+        return "Summary content for " + rel
+
+    monkeypatch.setattr(pa, "get_file_head", head)
 
     resp = pa.public_get_all_summaries()
     assert hasattr(resp, "summaries")
@@ -27,3 +42,76 @@ def test_public_get_all_summaries_webdav_fallback(monkeypatch):
     assert names == ["a.md", "b.md"]
     for item in resp.summaries:
         assert item.content.startswith("Summary content for")
+    # Only the leading bytes of each file are requested
+    assert requested == [pa.SUMMARY_PREVIEW_CHARS * 4] * 2
+
+
+def test_fallback_prefers_local_cache(pa, monkeypatch, tmp_path):
+    (tmp_path / "cache" / "x.summary.md").write_text("cached " + "y" * 500, encoding="utf-8")
+    monkeypatch.setattr(pa, "list_dir", lambda base: [f"{base}/x.summary.md", f"{base}/b.md"])
+    fetched: list[str] = []
+    monkeypatch.setattr(pa, "get_file_head", lambda rel, n, timeout=None: fetched.append(rel) or "remote")
+    resp = pa.public_get_all_summaries()
+    assert [(s.name, s.content[:7]) for s in resp.summaries] == [("b.md", "remote"), ("x.summary.md", "cached ")]
+    assert len(resp.summaries[1].content) == pa.SUMMARY_PREVIEW_CHARS
+    assert fetched == ["BACKBRAIN5.2/summaries/b.md"]
+
+    # Listing unavailable: serve straight from the cache directory
+    monkeypatch.setattr(pa, "list_dir", lambda base: (_ for _ in ()).throw(RuntimeError("down")))
+    assert [s.name for s in pa.public_get_all_summaries().summaries] == ["x.summary.md"]
+
+
+def test_fallback_is_concurrent_bounded_and_deadlined(pa, monkeypatch):
+    names = [f"f{i}.md" for i in range(12)]
+    monkeypatch.setattr(pa, "list_dir", lambda base: [f"{base}/{n}" for n in names])
+    settings = pa.get_settings()
+    monkeypatch.setattr(settings, "summaries_fallback_concurrency", 4)
+    monkeypatch.setattr(settings, "summaries_fallback_deadline_seconds", 0.5)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def head(rel, max_bytes, timeout=None):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(2.0 if rel.endswith("f11.md") else 0.05)
+        with lock:
+            active -= 1
+        return "text " + rel
+
+    monkeypatch.setattr(pa, "get_file_head", head)
+    t0 = time.perf_counter()
+    resp = pa.public_get_all_summaries()
+    assert time.perf_counter() - t0 < 1.5
+    got = [s.name for s in resp.summaries]
+    assert got == sorted(n for n in names if n != "f11.md")  # the straggler missed the deadline, order is kept
+    assert 1 < peak <= 4
+
+
+def test_get_file_head_sends_range_and_caps_bytes(monkeypatch):
+    from app.services import webdav_client as wc
+    monkeypatch.setattr(wc, "load_webdav_config", lambda: ("https://dav.example", "u", "p"))
+    seen: dict = {}
+
+    class Resp:
+        status_code = 200  # server ignored the Range header
+
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+        def iter_content(self, chunk_size):
+            body = ("ä" * 100).encode("utf-8")
+            for i in range(0, len(body), chunk_size):
+                yield body[i:i + chunk_size]
+
+    def fake_get(url, **kw):
+        seen.update(kw, url=url)
+        return Resp()
+
+    monkeypatch.setattr(wc.requests, "get", fake_get)
+    text = wc.get_file_head("/dir/x.md", 11)
+    assert seen["headers"]["Range"] == "bytes=0-10" and seen["stream"] is True
+    assert text == "ä" * 5  # the split 2-byte char at the cut is dropped
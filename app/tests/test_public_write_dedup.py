@@ -0,0 +1,196 @@
+import pytest
+from fastapi.testclient import TestClient
+import app.core.config as cfg
+from app.database.database import init_db
+from app.main import create_app
+
+
+@pytest.fixture()
+def dav(tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    from app.api import public_alias as pa
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BB_DB_URL", f"sqlite:///{tmp_path / 'dedup.db'}")
+    monkeypatch.setenv("ENABLE_PUBLIC_ALIAS", "true")
+    monkeypatch.setenv("PUBLIC_WRITEFILE_LIMIT_PER_MINUTE", "0")
+    cfg.reload_settings_for_tests()
+    init_db()
+    calls: list[tuple] = []
+    checksums: dict[str, str] = {}
+
+    def put(path, content, sha256=None):
+        calls.append(("PUT", path))
+        if sha256:
+            checksums[path] = sha256
+
+    def body_get(path):  # pragma: no cover - must not be reached
+        raise AssertionError(f"body downloaded for dedup: {path}")
+
+    def checksum(path):
+        calls.append(("PROPFIND", path))
+        return checksums.get(path)
+
+    monkeypatch.setattr(pa, "write_file_content", put)
+    monkeypatch.setattr(pa.summary_store, "write_file_content", put)  # summaries go through the store
+    monkeypatch.setenv("SUMMARY_CACHE_DIR", str(tmp_path / "summary_cache"))
+    monkeypatch.setattr(pa, "get_file_content", body_get)
+    monkeypatch.setattr(pa, "get_file_checksum", checksum)
+    monkeypatch.setattr(pa, "mkdirs", lambda base: False)
+    monkeypatch.setattr(pa, "bind", lambda fn: lambda *args: None)  # no background summaries
+    client = TestClient(create_app())
+    client.checksums = checksums  # type: ignore[attr-defined]
+    yield client, calls
+    monkeypatch.undo()
+    cfg.reload_settings_for_tests()
+
+
+def test_entry_dedup_uses_stored_hash(dav):
+    client, calls = dav
+    r = client.post("/write-file", json={"name": "e.md", "kind": "entries", "content": "v1"})
+    assert r.status_code == 200 and r.headers["x-deduplicated"] == "false"
+    r = client.post("/write-file", json={"name": "e.md", "kind": "entries", "content": "v1"})
+    assert r.headers["x-deduplicated"] == "true"
+    r = client.post("/write-file", json={"name": "e.md", "kind": "entries", "content": "v2"})
+    assert r.headers["x-deduplicated"] == "false"
+    r = client.post("/write-file", json={"name": "e.md", "kind": "entries", "content": "v2"})
+    assert r.headers["x-deduplicated"] == "true"
+    # One round trip per write: unchanged content is confirmed by checksum, not downloaded
+    assert [c[0] for c in calls] == ["PUT", "PROPFIND", "PUT", "PROPFIND"]
+
+
+def test_archive_then_rewrite_same_content(dav, monkeypatch):
+    import requests
+    from fastapi import FastAPI
+    from app.api.v1 import files
+    from app.core.security import get_current_user
+    client, calls = dav
+    api = FastAPI()
+    api.include_router(files.router, prefix="/api/v1")
+    api.dependency_overrides[get_current_user] = lambda: None
+    assert client.post("/write-file", json={"name": "a.md", "kind": "entries", "content": "A"}).headers["x-deduplicated"] == "false"
+    monkeypatch.setattr(files, "get_file_content", lambda path: "A")
+    monkeypatch.setattr(files, "load_webdav_config", lambda: ("https://dav.example", "u", "p"))
+    moved: list[str] = []
+    monkeypatch.setattr(requests, "request", lambda method, url, **kw: moved.append(method) or type("R", (), {"status_code": 201})())
+    assert TestClient(api).post("/api/v1/files/archive", json={"name": "a.md"}).status_code == 200
+    assert "MOVE" in moved
+    calls.clear()
+    # The inbox path is empty now: the same content must be written again, not deduplicated
+    r = client.post("/write-file", json={"name": "a.md", "kind": "entries", "content": "A"})
+    assert r.headers["x-deduplicated"] == "false"
+    assert calls[-1][0] == "PUT"
+
+
+def test_entry_deleted_in_nextcloud_is_written_again(dav):
+    client, calls = dav
+    client.post("/write-file", json={"name": "d.md", "kind": "entries", "content": "D"})
+    client.checksums.clear()  # removed in Nextcloud; its files row still has the hash
+    r = client.post("/write-file", json={"name": "d.md", "kind": "entries", "content": "D"})
+    assert r.headers["x-deduplicated"] == "false"
+    assert [c[0] for c in calls] == ["PUT", "PROPFIND", "PUT"]
+
+
+def test_summary_dedup_uses_server_checksum(dav):
+    from app.api import public_alias as pa
+    client, calls = dav
+    for content, dedup in (("s1", "false"), ("s1", "true"), ("s2", "false")):
+        r = client.post("/write-file", json={"name": "s.md", "kind": "summaries", "content": content})
+        assert r.headers["x-deduplicated"] == dedup
+        assert pa.summary_store.shutdown(5)  # write-behind upload done: the server has the checksum
+    assert [c[0] for c in calls] == ["PROPFIND", "PUT", "PROPFIND", "PROPFIND", "PUT"]
+
+
+def test_mkdirs_probes_each_directory_once(monkeypatch):
+    from app.services import webdav_client as wc
+    monkeypatch.setattr(wc, "load_webdav_config", lambda: ("https://dav.example", "u", "p"))
+    monkeypatch.setattr(wc, "_known_dirs", set())
+    seen: list[tuple[str, str]] = []
+
+    class Resp:
+        def __init__(self, status_code: int) -> None:
+            self.status_code = status_code
+
+    def fake_request(method, url, **kw):
+        seen.append((method, url))
+        return Resp(404 if method == "PROPFIND" and url.endswith("/new/") else 201 if method == "MKCOL" else 207)
+
+    monkeypatch.setattr(wc.requests, "request", fake_request)
+    assert wc.mkdirs("root/new") is True
+    assert seen == [("PROPFIND", "https://dav.example/root/"), ("PROPFIND", "https://dav.example/root/new/"),
+                    ("MKCOL", "https://dav.example/root/new")]
+    assert wc.mkdirs("root/new") is False
+    wc.mkdirs("root/other")
+    assert seen[3:] == [("PROPFIND", "https://dav.example/root/other/")]
+
+
+def test_known_dirs_survive_concurrent_forget(monkeypatch):
+    import sys
+    import threading
+    from app.services import webdav_client as wc
+    monkeypatch.setattr(wc, "load_webdav_config", lambda: ("https://dav.example", "u", "p"))
+    monkeypatch.setattr(wc.requests, "request", lambda method, url, **kw: type("R", (), {"status_code": 207})())
+    monkeypatch.setattr(wc, "_known_dirs", {f"root/x{i}" for i in range(2000)})
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often enough to hit the race
+    errors: list[BaseException] = []
+    done = threading.Event()
+
+    def create() -> None:
+        i = 0
+        while not done.is_set():
+            wc.mkdirs(f"root/d{i}")
+            i += 1
+
+    def forget() -> None:
+        try:
+            for _ in range(300):
+                wc._forget_dirs("root/x")  # iterates the set while mkdirs adds to it
+        except RuntimeError as exc:
+            errors.append(exc)
+        finally:
+            done.set()
+
+    threads = [threading.Thread(target=create), threading.Thread(target=forget)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+
+
+def test_rewrite_releases_old_content_hash(dav):
+    import hashlib
+    from app.database.database import get_session
+    from app.services import content_hash_index
+    client, _ = dav
+    client.post("/write-file", json={"name": "e.md", "kind": "entries", "content": "X"})
+    client.post("/write-file", json={"name": "e.md", "kind": "entries", "content": "Y"})
+    with get_session() as s:
+        # "X" is no longer stored anywhere: uploads of it must not be dropped as duplicates
+        assert content_hash_index.lookup(s, hashlib.sha256(b"X").hexdigest()) is None
+        assert content_hash_index.lookup(s, hashlib.sha256(b"Y").hexdigest()) is not None
+
+
+def test_public_summary_write_lands_after_running_upload(dav, monkeypatch):
+    import threading
+    from app.api import public_alias as pa
+    client, _ = dav
+    gate, started = threading.Event(), threading.Event()
+    remote: list[str] = []
+
+    def slow_put(path, content, sha256=None):
+        started.set()
+        gate.wait(5)
+        remote.append(content)
+
+    monkeypatch.setattr(pa.summary_store, "write_file_content", slow_put)
+    pa.summary_store.write("r.md", "old")
+    assert started.wait(5)  # the upload of the old text is running
+    r = client.post("/write-file", json={"name": "r.md", "kind": "summaries", "content": "new"})
+    assert r.status_code == 200 and r.headers["x-storage"] == "cache"
+    gate.set()
+    assert pa.summary_store.shutdown(5)
+    assert remote == ["old", "new"]  # Nextcloud ends with the newer text
+    assert pa.summary_store.read_cached("r.md") == "new"
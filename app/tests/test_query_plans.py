@@ -0,0 +1,73 @@
+"""Query plan regression checks for hot queries.
+
+Each hot query is run through EXPLAIN QUERY PLAN (SQLite) and must not degrade to a
+full table scan. Set BB_TEST_PG_URL=postgresql://... to run the same checks with
+EXPLAIN against Postgres (sequential scans disabled so the planner reports whether an
+index path exists at all; empty tables would otherwise always seq scan).
+"""
+from __future__ import annotations
+import os
+import re
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Engine
+from app.database.database import Base, prefix_filter
+from app.database import models  # noqa: F401 register tables
+from app.database.models import APIKeyORM, FileORM, JobORM, JobStatus, SummaryORM
+
+
+def _hot_queries(dialect: str):
+    return {
+        "file_dedup_by_sha256": select(FileORM).where(FileORM.sha256 == "abc").limit(1),
+        "file_by_storage_path": select(FileORM).where(FileORM.storage_path == "inbox/a.txt").limit(1),
+        "worker_job_poll": select(JobORM.id).where(JobORM.status.in_([JobStatus.pending, JobStatus.failed])).limit(5),
+        "latest_summary": select(SummaryORM).where(SummaryORM.file_id == 1).order_by(SummaryORM.created_at.desc()).limit(1),
+        "list_files_inbox_prefix": select(FileORM).where(prefix_filter(FileORM.storage_path, "BACKBRAIN5.2/01_inbox/", dialect)).order_by(FileORM.id.desc()).limit(500),
+        "active_api_key": select(APIKeyORM).where(APIKeyORM.key_hash == "h", APIKeyORM.revoked_at.is_(None)).limit(1),
+    }
+
+
+_SQLITE_FULL_SCAN = re.compile(r"\bSCAN (\w+)")
+
+
+def _sqlite_full_scans(engine: Engine, stmt) -> list[str]:  # type: ignore[no-untyped-def]
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    # "SCAN t" / "SCAN t USING INDEX ..." both read every row; only SEARCH is acceptable
+    return [line for line in plan if _SQLITE_FULL_SCAN.search(line) and "CONSTANT ROW" not in line]
+
+
+def _pg_full_scans(engine: Engine, stmt) -> list[str]:  # type: ignore[no-untyped-def]
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        plan = [row[0] for row in conn.exec_driver_sql("EXPLAIN " + sql)]
+    return [line for line in plan if "Seq Scan" in line]
+
+
+@pytest.fixture()
+def sqlite_engine(tmp_path):  # type: ignore[no-untyped-def]
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", sorted(_hot_queries("sqlite")))
+def test_sqlite_hot_query_uses_index(sqlite_engine: Engine, name: str):
+    stmt = _hot_queries("sqlite")[name]
+    scans = _sqlite_full_scans(sqlite_engine, stmt)
+    assert not scans, f"{name} degraded to full scan: {scans}"
+
+
+@pytest.mark.skipif(not os.getenv("BB_TEST_PG_URL"), reason="BB_TEST_PG_URL not set")
+@pytest.mark.parametrize("name", sorted(_hot_queries("postgresql")))
+def test_postgres_hot_query_uses_index(name: str):
+    engine = create_engine(os.environ["BB_TEST_PG_URL"])
+    try:
+        Base.metadata.create_all(engine)
+        scans = _pg_full_scans(engine, _hot_queries("postgresql")[name])
+        assert not scans, f"{name} degraded to full scan: {scans}"
+    finally:
+        engine.dispose()
@@ -56,8 +56,8 @@ def test_rate_limit_window_resets():
         assert client.get("/ready").status_code in (200, 503)  # readiness may degrade but still counts
     blocked = client.get("/ready")
     assert blocked.status_code == 429
-    # Simulate window reset by clearing bucket for client host key (testserver)
-    limiter.buckets['testclient'].clear()
+    # Simulate window reset by dropping the client's state (testclient host key)
+    limiter.buckets.pop('testclient', None)
     r2 = client.get("/ready")
     assert r2.status_code in (200, 503)
 
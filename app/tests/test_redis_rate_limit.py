@@ -0,0 +1,140 @@
+"""RedisRateLimiter against an in-process fake Redis (no server needed).
+
+The fake evaluates the same GCRA contract as GCRA_LUA (keys/args in, 4-int reply out)
+on a controllable millisecond clock. The script itself runs against a real server in
+``test_gcra_lua_on_redis`` (REDIS_URL, or fakeredis[lua] when installed).
+"""
+import asyncio
+import os
+import uuid
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.middleware import rate_limit
+from app.middleware.rate_limit import GCRA_LUA, RedisRateLimiter
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.now_ms = 1_000_000
+        self.store: dict[str, float] = {}
+        self.calls = 0
+        self.fail = False
+
+    def register_script(self, lua: str):  # type: ignore[no-untyped-def]
+        assert lua == GCRA_LUA
+
+        async def run(keys, args):  # type: ignore[no-untyped-def]
+            self.calls += 1
+            if self.fail:
+                raise ConnectionError("redis down")
+            limit, period = int(args[0]), int(args[1])
+            interval = period / limit
+            now = self.now_ms
+            tat = max(self.store.get(keys[0], now), now)
+            new_tat = tat + interval
+            if now < new_tat - period:
+                return [0, 0, int(new_tat - period - now + 0.999), int(tat - now)]
+            self.store[keys[0]] = new_tat
+            return [1, int((period - (new_tat - now)) / interval + 1e-9), 0, int(new_tat - now)]
+
+        return run
+
+
+class FakeApiKey:
+    def __init__(self, app):  # type: ignore[no-untyped-def]
+        self.app = app
+
+    async def __call__(self, scope, receive, send):  # type: ignore[no-untyped-def]
+        for name, value in scope.get("headers", []):
+            if name == b"x-api-key":
+                scope.setdefault("state", {})["api_key_id"] = value.decode()
+        await self.app(scope, receive, send)
+
+
+def _client(fake: FakeRedis, limit: int) -> tuple[TestClient, RedisRateLimiter]:
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():  # type: ignore[no-untyped-def]
+        return {"ok": True}
+
+    app.add_middleware(RedisRateLimiter, client=fake)
+    app.add_middleware(FakeApiKey)
+    client = TestClient(app)
+    client.get("/version")  # build middleware stack (bypass path, no limiter call)
+    limiter = app.middleware_stack
+    while not isinstance(limiter, RedisRateLimiter):
+        limiter = limiter.app  # type: ignore[union-attr]
+    limiter.max_requests = limit
+    return client, limiter
+
+
+def test_exact_remaining_and_reset_from_script():
+    fake = FakeRedis()
+    client, _ = _client(fake, 3)
+    assert [client.get("/ping").headers["X-RateLimit-Remaining"] for _ in range(3)] == ["2", "1", "0"]
+    blocked = client.get("/ping")
+    assert blocked.status_code == 429
+    assert blocked.headers["Retry-After"] == "20"  # one emission interval (60s / 3)
+    fake.now_ms += 20_000
+    assert client.get("/ping").status_code == 200
+    assert list(fake.store) == ["rl:testclient"]
+
+
+def test_apikey_strategy_keys_on_api_key(monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_key_strategy", "apikey")
+    fake = FakeRedis()
+    client, _ = _client(fake, 1)
+    assert client.get("/ping", headers={"X-API-Key": "a"}).status_code == 200
+    assert client.get("/ping", headers={"X-API-Key": "a"}).status_code == 429
+    assert client.get("/ping", headers={"X-API-Key": "b"}).status_code == 200
+    assert sorted(fake.store) == ["rl:api_key:a", "rl:api_key:b"]
+
+
+def test_falls_back_to_local_engine_when_redis_fails(monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_redis_retry_seconds", 60.0)
+    fake = FakeRedis()
+    fake.fail = True
+    client, limiter = _client(fake, 2)
+    assert [client.get("/ping").status_code for _ in range(3)] == [200, 200, 429]
+    # circuit open: only the first request tried Redis
+    assert fake.calls == 1
+    assert "testclient" in limiter.buckets
+    limiter._redis_down_until = 0.0
+    fake.fail = False
+    assert client.get("/ping").status_code == 200
+    assert fake.calls == 2
+
+
+def _redis_client():  # type: ignore[no-untyped-def]
+    """Real server from REDIS_URL, else fakeredis with its Lua runtime (fakeredis[lua])."""
+    if os.getenv("REDIS_URL"):
+        aioredis = pytest.importorskip("redis.asyncio")
+        return aioredis.Redis.from_url(os.environ["REDIS_URL"])
+    fakeredis = pytest.importorskip("fakeredis", reason="set REDIS_URL or install fakeredis[lua]")
+    pytest.importorskip("lupa", reason="fakeredis needs lupa to run Lua scripts")
+    return fakeredis.FakeAsyncRedis()
+
+
+def test_gcra_lua_on_redis():
+    async def scenario() -> list[list[int]]:
+        client = _redis_client()
+        key = f"rl:test:{uuid.uuid4().hex}"
+        script = client.register_script(GCRA_LUA)
+        try:
+            replies = [[int(v) for v in await script(keys=[key], args=[3, 60_000])] for _ in range(4)]
+            ttl = await client.pttl(key)
+        finally:
+            await client.delete(key)
+            await client.aclose()
+        replies.append([ttl])
+        return replies
+
+    *replies, (ttl,) = asyncio.run(scenario())
+    assert [r[:2] for r in replies] == [[1, 2], [1, 1], [1, 0], [0, 0]]
+    assert [r[2] for r in replies[:3]] == [0, 0, 0]
+    # blocked for about one emission interval (60s / 3); server clock moves between calls
+    assert 19_000 <= replies[3][2] <= 20_000
+    assert 59_000 <= replies[2][3] <= 60_000  # bucket full: reset after one period
+    assert 0 < ttl <= 60_000  # state expires with the bucket
@@ -14,3 +14,16 @@ def test_request_id_header(tmp_path, monkeypatch):
     rid = r.headers.get("X-Request-ID")
     assert rid is not None
     assert len(rid) == 32  # uuid4 hex
+
+
+def test_middleware_stack_is_pure_asgi():
+    from starlette.middleware.base import BaseHTTPMiddleware
+    client = TestClient(app)
+    r = client.get("/health")
+    assert r.headers.get("x-machine-id") and r.headers.get("x-app-version")
+    layer = app.middleware_stack
+    while layer is not None:
+        assert not isinstance(layer, BaseHTTPMiddleware), type(layer).__name__
+        layer = getattr(layer, "app", None)
+        if layer is app.router:
+            break
@@ -0,0 +1,125 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+import app.core.config as cfg
+from app.core.response_cache import ResponseCache, etag_matches, request_key, response_cache
+from app.database.database import init_db
+from app.main import create_app
+
+
+def _request(path: str, query: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []})
+
+
+def test_request_key_normalizes_path_and_query():
+    assert request_key(_request("/read-file/", "name=a&kind=entries")) == request_key(_request("/read-file", "kind=entries&name=a"))
+    assert request_key(_request("/list-files", "kind=entries&cb=123")) == "/list-files?kind=entries"
+    assert etag_matches('W/"abc", "def"', '"abc"') and etag_matches("*", '"x"')
+    assert not etag_matches(None, '"x"') and not etag_matches('"abd"', '"abc"')
+
+
+def test_put_skipped_when_invalidated_while_building():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    gen = cache.generation
+    cache.invalidate("entries")  # a write committed meanwhile
+    cache.put("/k", b"{}", ("entries",), generation=gen)
+    assert cache.get("/k") is None
+    cache.put("/k", b"{}", ("entries",), generation=cache.generation)
+    assert cache.get("/k") is not None
+    cache.invalidate("summaries")
+    assert cache.get("/k") is not None
+    cache.invalidate("entries")
+    assert cache.get("/k") is None
+
+
+def test_put_skips_bodies_over_the_byte_limit():
+    cache = ResponseCache(maxsize=10, ttl=60, max_body_bytes=8)
+    assert cache.put("/big", b"0123456789", ("entries",)).body == b"0123456789"  # still served
+    assert cache.get("/big") is None
+    cache.put("/small", b"{}", ("entries",))
+    assert cache.get("/small") is not None
+
+
+@pytest.fixture()
+def public_client(tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    monkeypatch.chdir(tmp_path)  # local-fallback storage lands in ./public_fallback
+    monkeypatch.setenv("BB_DB_URL", f"sqlite:///{tmp_path / 'rc.db'}")
+    monkeypatch.setenv("BB_TESTING", "1")
+    monkeypatch.setenv("ENABLE_PUBLIC_ALIAS", "true")
+    monkeypatch.setenv("WEBDAV_DISABLED", "1")
+    monkeypatch.setenv("PUBLIC_WRITEFILE_LIMIT_PER_MINUTE", "0")
+    cfg.reload_settings_for_tests()
+    init_db()
+    response_cache.clear()
+    yield TestClient(create_app())
+    monkeypatch.undo()
+    cfg.reload_settings_for_tests()
+
+
+def test_read_file_etag_304_and_write_invalidation(public_client: TestClient):
+    c = public_client
+    assert c.post("/write-file", json={"name": "n.md", "kind": "summaries", "content": "v1"}).status_code == 200
+    r1 = c.get("/read-file", params={"name": "n.md", "kind": "summaries"})
+    assert r1.status_code == 200 and r1.json()["content"] == "v1"
+    etag = r1.headers["etag"]
+    assert r1.headers["x-cache"] == "MISS"
+    r2 = c.get("/read-file/", params={"kind": "summaries", "name": "n.md"}, headers={"If-None-Match": etag})
+    assert r2.status_code == 304 and r2.headers["x-cache"] == "HIT"
+    bust = c.get("/read-file", params={"name": "n.md", "kind": "summaries", "cb": "1"}, headers={"If-None-Match": etag})
+    assert bust.status_code == 200 and bust.headers["x-cache"] == "BYPASS"
+
+    listing = c.get("/list-files", params={"kind": "summaries"})
+    assert "n.md" in listing.json()["files"]
+
+    assert c.post("/write-file", json={"name": "n.md", "kind": "summaries", "content": "v2"}).status_code == 200
+    r3 = c.get("/read-file", params={"name": "n.md", "kind": "summaries"}, headers={"If-None-Match": etag})
+    assert r3.status_code == 200 and r3.json()["content"] == "v2" and r3.headers["etag"] != etag
+    assert c.get("/list-files", params={"kind": "summaries"}).headers["x-cache"] == "MISS"
+
+    missing = c.get("/read-file", params={"name": "nope.md", "kind": "summaries"})
+    assert missing.status_code == 502  # errors are not cached
+    assert c.get("/read-file", params={"name": "nope.md", "kind": "summaries"}).status_code == 502
+
+
+def test_private_entry_writes_invalidate_public_reads(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from app.api.v1 import files, webdav
+    from app.core.response_cache import file_tag
+    from app.core.security import get_current_user
+    monkeypatch.setenv("BB_DB_URL", f"sqlite:///{tmp_path / 'rc2.db'}")
+    monkeypatch.setenv("BB_TESTING", "1")
+    cfg.reload_settings_for_tests()
+    init_db()
+    monkeypatch.setattr(files, "write_file_content", lambda path, content, sha256=None: None)
+    monkeypatch.setattr(webdav, "write_file_content", lambda path, content, sha256=None: None)
+    api = FastAPI()
+    api.include_router(files.router, prefix="/api/v1")
+    api.include_router(webdav.router, prefix="/api/v1")
+    api.dependency_overrides[get_current_user] = lambda: None
+    c = TestClient(api)
+
+    def cache_entry(name: str) -> None:
+        response_cache.put("/list-files?kind=entries", b"[]", ("entries",))
+        response_cache.put(f"/read-file?kind=entries&name={name}", b"{}", (file_tag("entries", name),))
+
+    cache_entry("a.md")
+    assert c.post("/api/v1/files/write-file", json={"kind": "entries", "name": "a.md", "content": "x"}).status_code == 200
+    assert response_cache.get("/list-files?kind=entries") is None
+    assert response_cache.get("/read-file?kind=entries&name=a.md") is None
+
+    cache_entry("b.md")
+    inbox = cfg.settings.inbox_dir.strip('/')
+    assert c.post("/api/v1/webdav/put", json={"path": f"{inbox}/b.md", "content": "y"}).status_code == 200
+    assert response_cache.get("/list-files?kind=entries") is None
+    assert response_cache.get("/read-file?kind=entries&name=b.md") is None
+
+    import requests
+    monkeypatch.setattr(files, "get_file_content", lambda path: "x")
+    monkeypatch.setattr(files, "load_webdav_config", lambda: ("https://dav.example", "u", "p"))
+    monkeypatch.setattr(requests, "request", lambda method, url, **kw: type("R", (), {"status_code": 201})())
+    cache_entry("a.md")
+    assert c.post("/api/v1/files/archive", json={"name": "a.md"}).status_code == 200
+    assert response_cache.get("/list-files?kind=entries") is None
+    assert response_cache.get("/read-file?kind=entries&name=a.md") is None
+    monkeypatch.undo()
+    cfg.reload_settings_for_tests()
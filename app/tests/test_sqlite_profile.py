@@ -0,0 +1,36 @@
+from app.core.config import reload_settings_for_tests
+from app.database.database import _make_engine
+
+
+def _pragmas(engine):  # type: ignore[no-untyped-def]
+    with engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "temp_store", "cache_size")
+        }
+
+
+def test_sqlite_production_profile_applies_pragmas(tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    monkeypatch.setenv("DB_SQLITE_PROFILE", "production")
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "1234")
+    reload_settings_for_tests()
+    try:
+        engine = _make_engine(f"sqlite:///{tmp_path / 'prod.db'}")
+        got = _pragmas(engine)
+        engine.dispose()
+    finally:
+        monkeypatch.delenv("DB_SQLITE_PROFILE")
+        monkeypatch.delenv("SQLITE_BUSY_TIMEOUT_MS")
+        reload_settings_for_tests()
+    assert got["journal_mode"] == "wal"
+    assert got["synchronous"] == 1  # NORMAL
+    assert got["busy_timeout"] == 1234
+    assert got["temp_store"] == 2  # MEMORY
+    assert got["cache_size"] < 0
+
+
+def test_sqlite_default_profile_untouched(tmp_path):  # type: ignore[no-untyped-def]
+    engine = _make_engine(f"sqlite:///{tmp_path / 'dev.db'}")
+    got = _pragmas(engine)
+    engine.dispose()
+    assert got["journal_mode"] == "delete"
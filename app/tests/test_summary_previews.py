@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+import app.core.config as cfg
+from app.core.response_cache import response_cache
+from app.database.database import get_session, init_db
+from app.database.models import FileORM, SummaryORM, SummaryPreviewORM
+from app.main import create_app
+
+
+@pytest.fixture()
+def public_client(tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    monkeypatch.setenv("BB_DB_URL", f"sqlite:///{tmp_path / 'prev.db'}")
+    monkeypatch.setenv("BB_TESTING", "1")
+    monkeypatch.setenv("ENABLE_PUBLIC_ALIAS", "true")
+    cfg.reload_settings_for_tests()
+    init_db()
+    response_cache.clear()
+    yield TestClient(create_app())
+    monkeypatch.undo()
+    cfg.reload_settings_for_tests()
+
+
+def _add_summary(text: str, file_name: str | None = None) -> int:
+    with get_session() as s:
+        file_id = None
+        if file_name:
+            f = FileORM(original_name=file_name, storage_path=f"BACKBRAIN5.2/01_inbox/{file_name}")
+            s.add(f)
+            s.flush()
+            file_id = f.id
+        summary = SummaryORM(file_id=file_id, summary_text=text)
+        s.add(summary)
+        s.flush()
+        return summary.id
+
+
+def test_previews_follow_summary_and_file_writes(public_client):
+    sid = _add_summary("x" * 1000, "note.md")
+    orphan = _add_summary("short")
+    with get_session() as s:
+        rows = {r.summary_id: r for r in s.scalars(select(SummaryPreviewORM))}
+        assert rows[sid].name == "note.md" and rows[sid].preview == "x" * 300
+        assert rows[orphan].name == f"summary_{orphan}"
+        s.execute(select(FileORM)).scalar_one().original_name = "renamed.md"
+    with get_session() as s:
+        assert s.get(SummaryPreviewORM, sid).name == "renamed.md"
+        s.get(SummaryORM, orphan).summary_text = "edited"
+    with get_session() as s:
+        assert s.get(SummaryPreviewORM, orphan).preview == "edited"
+        s.delete(s.get(SummaryORM, orphan))
+    with get_session() as s:
+        assert s.get(SummaryPreviewORM, orphan) is None
+        s.execute(delete(SummaryPreviewORM))
+    import app.database.database as db
+    from app.services.summary_previews import backfill
+    with db.engine.begin() as conn:
+        assert backfill(conn) == 1
+        assert backfill(conn) == 0
+
+
+def test_get_all_summaries_cached_with_etag(public_client: TestClient):
+    _add_summary("first summary", "a.md")
+    r1 = public_client.get("/get_all_summaries")
+    assert r1.status_code == 200
+    assert r1.json() == {"summaries": [{"name": "a.md", "content": "first summary"}]}
+    etag = r1.headers["etag"]
+    assert r1.headers["x-cache"] == "MISS"
+    r2 = public_client.get("/get_all_summaries")
+    assert r2.headers["x-cache"] == "HIT" and r2.headers["etag"] == etag
+    r304 = public_client.get("/get_all_summaries", headers={"If-None-Match": etag})
+    assert r304.status_code == 304 and r304.content == b""
+
+    # A committed summary write invalidates the cached body
+    _add_summary("second summary", "b.md")
+    r3 = public_client.get("/get_all_summaries", headers={"If-None-Match": etag})
+    assert r3.status_code == 200 and r3.headers["etag"] != etag
+    assert [s["name"] for s in r3.json()["summaries"]] == ["b.md", "a.md"]
+
+    lf = public_client.get("/list-files", params={"kind": "summaries"})
+    assert lf.json() == {"kind": "summaries", "files": ["b.md", "a.md"]}
+    assert public_client.get("/list-files", params={"kind": "summaries"}, headers={"If-None-Match": lf.headers["etag"]}).status_code == 304
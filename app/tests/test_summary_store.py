@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from app.services import summary_store
+from app.services.summary_loader import iter_cached_summaries
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):  # type: ignore[no-untyped-def]
+    monkeypatch.setenv("SUMMARY_CACHE_ENABLED", "true")
+    monkeypatch.setenv("SUMMARY_CACHE_DIR", str(tmp_path / "cache"))
+    remote: dict[str, str] = {}
+    gate = threading.Event()
+    gate.set()
+
+    def put(path, content, sha256=None):
+        gate.wait(5)
+        remote[path] = content
+
+    def get(path):
+        if path not in remote:
+            raise FileNotFoundError(path)
+        return remote[path]
+
+    monkeypatch.setattr(summary_store, "write_file_content", put)
+    monkeypatch.setattr(summary_store, "get_file_content", get)
+    summary_store.shutdown(0)
+    yield remote, gate
+    gate.set()
+    summary_store.shutdown(5)
+
+
+def test_write_is_cached_before_upload(store):
+    remote, gate = store
+    gate.clear()  # Nextcloud is slow
+    assert summary_store.write("a.summary.md", "v1") == "queued"
+    # Readers see it at once, /query included
+    assert summary_store.read("a.summary.md") == "v1"
+    assert list(iter_cached_summaries()) == [("a.summary.md", "v1")]
+    path = summary_store.remote_path("a.summary.md")
+    assert path not in remote
+    gate.set()
+    assert summary_store.shutdown(5)
+    assert remote[path] == "v1"
+
+
+def test_read_falls_back_to_nextcloud_and_fills_cache(store):
+    remote, _ = store
+    remote[summary_store.remote_path("b.summary.md")] = "remote"
+    assert summary_store.read_cached("b.summary.md") is None
+    assert summary_store.read("b.summary.md") == "remote"
+    assert summary_store.read_cached("b.summary.md") == "remote"
+    with pytest.raises(FileNotFoundError):
+        summary_store.read("missing.summary.md")
+
+
+def test_cache_disabled_uploads_synchronously(store, monkeypatch):
+    remote, _ = store
+    monkeypatch.setenv("SUMMARY_CACHE_ENABLED", "false")
+    assert summary_store.write("c.summary.md", "now") == "sync"
+    assert remote[summary_store.remote_path("c.summary.md")] == "now"
+
+
+def test_writeback_coalesces_and_retries():
+    uploads: list[tuple[str, str]] = []
+    failures = {"a": 2}
+    gate = threading.Event()
+
+    def upload(name: str, content: str) -> None:
+        gate.wait(5)
+        if failures.get(name):
+            failures[name] -= 1
+            raise RuntimeError("HTTP 503")
+        uploads.append((name, content))
+
+    wb = summary_store.WriteBehind(upload, workers=1, max_queue=2, retries=3, retry_seconds=0.01)
+    assert wb.submit("a", "a1") == "queued"
+    time.sleep(0.05)  # worker is now blocked inside a1
+    assert wb.submit("b", "b1") == "queued"
+    assert wb.submit("b", "b2") == "coalesced"
+    assert wb.submit("c", "c1") == "queued"
+    assert wb.submit("d", "d1") == "rejected"  # full: the caller uploads itself
+    gate.set()
+    deadline = time.monotonic() + 5
+    while len(uploads) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(uploads) == [("a", "a1"), ("b", "b2"), ("c", "c1")]
+    assert wb.drain(5)
+
+
+def test_writeback_gives_up_after_retries():
+    attempts: list[str] = []
+
+    def upload(name: str, content: str) -> None:
+        attempts.append(name)
+        raise RuntimeError("down")
+
+    wb = summary_store.WriteBehind(upload, workers=1, max_queue=5, retries=3, retry_seconds=0.01)
+    wb.submit("x", "x1")
+    assert wb.drain(5)
+    assert attempts == ["x", "x", "x"]
+
+
+def test_reconcile_requeues_uploads_lost_at_restart(store, monkeypatch):
+    import hashlib
+    import os
+    from email.utils import formatdate
+
+    from app.services.webdav_client import DavEntry
+
+    remote, _ = store
+    for name, text in (("lost", "never uploaded"), ("old", "v2"), ("same", "same"), ("edited", "v1")):
+        assert summary_store.cache_put(f"{name}.summary.md", text)
+    past, future = formatdate(time.time() - 3600, usegmt=True), formatdate(time.time() + 3600, usegmt=True)
+    listing = [
+        DavEntry("s/old.summary.md", "old.summary.md", None, 2, past, False, hashlib.sha256(b"v1").hexdigest()),
+        DavEntry("s/same.summary.md", "same.summary.md", None, 4, past, False, hashlib.sha256(b"same").hexdigest()),
+        DavEntry("s/edited.summary.md", "edited.summary.md", None, 9, future, False, None),
+    ]
+    monkeypatch.setattr(summary_store, "list_dir_info", lambda path, depth=1: listing)
+    # A restart lost the write-behind queue: only the cache knows about lost and old
+    assert summary_store.reconcile() == {"queued": 2, "current": 1, "dropped": 1, "rejected": 0}
+    assert summary_store.shutdown(5)
+    assert remote[summary_store.remote_path("lost.summary.md")] == "never uploaded"
+    assert remote[summary_store.remote_path("old.summary.md")] == "v2"
+    assert summary_store.remote_path("same.summary.md") not in remote
+    # Changed in Nextcloud after it was cached: the next read fetches the new text
+    assert not os.path.exists(os.path.join(os.environ["SUMMARY_CACHE_DIR"], "edited.summary.md"))
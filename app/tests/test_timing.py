@@ -0,0 +1,45 @@
+import threading
+from fastapi.testclient import TestClient
+from app.core import timing
+from app.core.metrics import stage_duration_seconds
+
+
+def _stage_count(stage: str) -> float:
+    for metric in stage_duration_seconds.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count") and sample.labels.get("stage") == stage:
+                return sample.value
+    return 0.0
+
+
+def test_spans_collect_per_request_and_cross_threads():
+    before = _stage_count("unit")
+    token = timing.begin("rid-1")
+    try:
+        with timing.span("unit"):
+            pass
+        t = threading.Thread(target=timing.bind(lambda: timing.record("unit", 0.25)))
+        t.start()
+        t.join()
+        timings = timing.current()
+    finally:
+        timing.end(token)
+    assert timing.current() is None
+    assert timings is not None and timings.request_id == "rid-1"
+    total, count = timings.totals()["unit"]
+    assert count == 2 and total >= 0.25
+    header = timings.server_timing()
+    assert header.startswith("unit;dur=2") and "app;dur=" in header
+    assert _stage_count("unit") == before + 2
+    # Outside a request spans only feed the histogram
+    timing.record("unit", 0.01)
+    assert _stage_count("unit") == before + 3
+
+
+def test_server_timing_header_reports_db_stage(client: TestClient, auth_headers):
+    r = client.get("/api/v1/entries", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    header = r.headers.get("server-timing")
+    assert header, r.headers
+    stages = {part.split(";")[0].strip() for part in header.split(",")}
+    assert {"db", "app"} <= stages
@@ -9,4 +9,10 @@ else
   echo "[entrypoint] Skipping migrations (DO_MIGRATE=${DO_MIGRATE})"
 fi
 
+# Prometheus multiprocess mode: start every deployment with an empty sample directory
+if [[ -n "${PROMETHEUS_MULTIPROC_DIR:-}" ]]; then
+  rm -rf "${PROMETHEUS_MULTIPROC_DIR:?}"/*.db 2>/dev/null || true
+  mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+fi
+
 exec "$@"
@@ -0,0 +1,39 @@
+"""add ingest_scan_state
+
+Revision ID: 20251019_10_add_ingest_scan_state
+Revises: 20251019_9_add_summary_previews
+Create Date: 2025-10-19
+
+Persisted auto-ingest scanner state (app/services/ingest_service.py): PROPFIND etag /
+size / last-modified and the last action per file, and the ETag per drop directory.
+Starts empty: the first cycle after the upgrade records every existing file once.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_10_add_ingest_scan_state"
+down_revision = "20251019_9_add_summary_previews"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:  # type: ignore[return-value]
+    op.create_table(
+        "ingest_scan_state",
+        sa.Column("path", sa.String(), primary_key=True),
+        sa.Column("dir", sa.String(), nullable=False),
+        sa.Column("is_dir", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("etag", sa.String(), nullable=True),
+        sa.Column("size_bytes", sa.Integer(), nullable=True),
+        sa.Column("last_modified", sa.String(), nullable=True),
+        sa.Column("last_action", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_ingest_scan_state_dir", "ingest_scan_state", ["dir"])
+
+
+def downgrade() -> None:  # type: ignore[return-value]
+    op.drop_index("ix_ingest_scan_state_dir", table_name="ingest_scan_state")
+    op.drop_table("ingest_scan_state")
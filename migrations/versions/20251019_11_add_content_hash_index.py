@@ -0,0 +1,49 @@
+"""add content hash index
+
+Revision ID: 20251019_11_add_content_hash_index
+Revises: 20251019_10_add_ingest_scan_state
+Create Date: 2025-10-19
+
+content_hashes maps sha256 to the canonical file (app/services/content_hash_index.py), and
+content_hash_etags remembers the sha256 of WebDAV file versions by ETag. Existing files
+with a sha256 are backfilled; the lowest id per hash becomes the canonical file.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_11_add_content_hash_index"
+down_revision = "20251019_10_add_ingest_scan_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:  # type: ignore[return-value]
+    op.create_table(
+        "content_hashes",
+        sa.Column("sha256", sa.String(), primary_key=True),
+        sa.Column("file_id", sa.Integer(), nullable=True),
+        sa.Column("size_bytes", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_content_hashes_file_id", "content_hashes", ["file_id"])
+    op.create_table(
+        "content_hash_etags",
+        sa.Column("etag", sa.String(), primary_key=True),
+        sa.Column("sha256", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_content_hash_etags_sha256", "content_hash_etags", ["sha256"])
+    op.execute(
+        "INSERT INTO content_hashes (sha256, file_id, size_bytes, created_at) "
+        "SELECT f.sha256, f.id, f.size_bytes, CURRENT_TIMESTAMP FROM files f "
+        "WHERE f.sha256 IS NOT NULL AND f.id = (SELECT MIN(g.id) FROM files g WHERE g.sha256 = f.sha256)"
+    )
+
+
+def downgrade() -> None:  # type: ignore[return-value]
+    op.drop_index("ix_content_hash_etags_sha256", table_name="content_hash_etags")
+    op.drop_table("content_hash_etags")
+    op.drop_index("ix_content_hashes_file_id", table_name="content_hashes")
+    op.drop_table("content_hashes")
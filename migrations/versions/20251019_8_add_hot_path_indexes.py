@@ -0,0 +1,55 @@
+"""add indexes for hot query paths
+
+Revision ID: 20251019_8_add_hot_path_indexes
+Revises: 7f6a4ec6f819
+Create Date: 2025-10-19
+
+Access paths covered:
+  - files.sha256                      dedup in upload / worker (ix_files_sha256, may exist from rev 5)
+  - jobs(status, id)                  worker poll, covering for SELECT id
+  - summaries(file_id, created_at)    latest summary per file without a sort
+  - files.storage_path pattern ops    LIKE 'inbox/%' on Postgres (SQLite uses the unique index)
+  - api_keys(key_hash) WHERE revoked_at IS NULL   active key lookup
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_8_add_hot_path_indexes"
+down_revision = "7f6a4ec6f819"
+branch_labels = None
+depends_on = None
+
+
+def _existing_indexes(table: str) -> set[str]:
+    insp = sa.inspect(op.get_bind())
+    try:
+        return {ix["name"] for ix in insp.get_indexes(table) if ix.get("name")}
+    except Exception:
+        return set()
+
+
+def upgrade() -> None:  # type: ignore[return-value]
+    dialect = op.get_bind().dialect.name
+    active = sa.text("revoked_at IS NULL")
+    if "ix_files_sha256" not in _existing_indexes("files"):
+        op.create_index("ix_files_sha256", "files", ["sha256"])
+    if "ix_jobs_status_id" not in _existing_indexes("jobs"):
+        op.create_index("ix_jobs_status_id", "jobs", ["status", "id"])
+    if "ix_summaries_file_id_created_at" not in _existing_indexes("summaries"):
+        op.create_index("ix_summaries_file_id_created_at", "summaries", ["file_id", "created_at"])
+    if "ix_api_keys_active_key_hash" not in _existing_indexes("api_keys"):
+        op.create_index("ix_api_keys_active_key_hash", "api_keys", ["key_hash"], sqlite_where=active, postgresql_where=active)
+    if dialect == "postgresql" and "ix_files_storage_path_pattern" not in _existing_indexes("files"):
+        op.create_index("ix_files_storage_path_pattern", "files", ["storage_path"], postgresql_ops={"storage_path": "varchar_pattern_ops"})
+
+
+def downgrade() -> None:  # type: ignore[return-value]
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_files_storage_path_pattern", table_name="files")
+    op.drop_index("ix_api_keys_active_key_hash", table_name="api_keys")
+    op.drop_index("ix_summaries_file_id_created_at", table_name="summaries")
+    op.drop_index("ix_jobs_status_id", table_name="jobs")
+    # ix_files_sha256 predates this revision (rev 5); leave it in place
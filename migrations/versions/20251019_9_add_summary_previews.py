@@ -0,0 +1,42 @@
+"""add summary_previews read model
+
+Revision ID: 20251019_9_add_summary_previews
+Revises: 20251019_8_add_hot_path_indexes
+Create Date: 2025-10-19
+
+Denormalized (name, 300-char preview, created_at) per summary for get_all_summaries and
+list-files(kind=summaries). Maintained at runtime by ORM events
+(app/services/summary_previews.py); existing summaries are backfilled here.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_9_add_summary_previews"
+down_revision = "20251019_8_add_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:  # type: ignore[return-value]
+    op.create_table(
+        "summary_previews",
+        sa.Column("summary_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("file_id", sa.Integer(), nullable=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("preview", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_summary_previews_file_id", "summary_previews", ["file_id"])
+    op.execute(
+        "INSERT INTO summary_previews (summary_id, file_id, name, preview, created_at) "
+        "SELECT s.id, s.file_id, COALESCE(f.original_name, 'summary_' || CAST(s.id AS VARCHAR)), "
+        "SUBSTR(s.summary_text, 1, 300), s.created_at "
+        "FROM summaries s LEFT JOIN files f ON f.id = s.file_id"
+    )
+
+
+def downgrade() -> None:  # type: ignore[return-value]
+    op.drop_index("ix_summary_previews_file_id", table_name="summary_previews")
+    op.drop_table("summary_previews")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Authenticated request throughput with and without the JWT principal cache.
+
+Usage:
+  python scripts/bench_auth_throughput.py                 # 2000 requests per mode
+  python scripts/bench_auth_throughput.py --requests 5000 --threads 8
+
+Mounts a trivial GET /whoami guarded by get_current_user (so auth dominates the request)
+on a temporary SQLite database and reports HTTP req/s plus the cost of the dependency
+itself for AUTH_PRINCIPAL_CACHE_TTL_SECONDS=0 (users query per request) vs cached.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["BB_DB_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bb-auth-'), 'bench.db')}"
+os.environ["BB_TESTING"] = "1"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--threads", type=int, default=4)
+    args = ap.parse_args()
+
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+    from app.core import security
+    from app.core.security import create_access_token, get_current_user
+    from app.database.database import get_session, init_db
+    from app.database.models import UserORM
+
+    init_db()
+    with get_session() as s:
+        s.add(UserORM(username="bench", hashed_password="x"))
+    token = create_access_token("bench")
+    headers = {"Authorization": f"Bearer {token}"}
+    app = FastAPI()
+
+    @app.get("/whoami")
+    def whoami(user: UserORM = Depends(get_current_user)) -> dict[str, str]:
+        return {"username": user.username}
+
+    def one(_: int) -> int:
+        return client.get("/whoami", headers=headers).status_code
+
+    print(f"requests={args.requests} threads={args.threads}")
+    print(f"{'mode':>10} {'req/s':>9} {'ok':>5} {'dep us/call':>12}")
+    with TestClient(app) as client:  # one event loop for the whole run
+        for mode, ttl in (("uncached", 0.0), ("cached", 60.0)):
+            security._principal_cache.ttl = ttl
+            security.invalidate_principal()
+            one(0)  # warm up
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                codes = list(pool.map(one, range(args.requests)))
+            rps = args.requests / (time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            for _ in range(args.requests):
+                get_current_user(token)
+            dep_us = (time.perf_counter() - t0) / args.requests * 1e6
+            ok = sum(1 for c in codes if c == 200) / len(codes)
+            print(f"{mode:>10} {rps:>9.0f} {ok:>5.2f} {dep_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Benchmark offset vs keyset pagination for /api/v1/entries on a large SQLite table.
+
+Usage:
+  python scripts/bench_entries_pagination.py                 # 1,000,000 rows in a temp DB
+  python scripts/bench_entries_pagination.py --rows 200000   # smaller table
+  python scripts/bench_entries_pagination.py --db /tmp/bench.db --keep
+
+Measures (per page of --limit rows) at several depths:
+  - offset:  ORDER BY id LIMIT n OFFSET k   (what list_entries did before)
+  - keyset:  WHERE id > last_id ORDER BY id LIMIT n
+  - count:   SELECT COUNT(id) (recomputed every page before) vs cached_entry_count
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--db", default=None)
+    ap.add_argument("--keep", action="store_true")
+    args = ap.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="bb-bench-"), "entries.db")
+    os.environ["BB_DB_URL"] = f"sqlite:///{db_path}"
+    from sqlalchemy import func, select, text
+    from app.database import database
+    from app.database.database import init_db
+    from app.database.models import EntryORM
+    from app.services.entry_counts import cached_entry_count
+
+    init_db()
+    with database.get_session() as s:
+        have = s.execute(select(func.count(EntryORM.id))).scalar() or 0
+    if have < args.rows:
+        print(f"populating {args.rows - have} rows into {db_path} ...")
+        batch = 50_000
+        with database.engine.begin() as conn:
+            for start in range(have, args.rows, batch):
+                n = min(batch, args.rows - start)
+                conn.execute(text("INSERT INTO entries (text) VALUES (:t)"), [{"t": f"entry {start + i}"} for i in range(n)])
+
+    limit = args.limit
+    depths = [0, args.rows // 10, args.rows // 2, max(0, args.rows - limit)]
+    print(f"rows={args.rows} limit={limit} (best of {args.repeat}, ms)")
+    print(f"{'depth':>10} {'offset':>10} {'keyset':>10}")
+    with database.get_session() as s:
+        for depth in depths:
+            def offset_page():
+                s.query(EntryORM).order_by(EntryORM.id.asc()).offset(depth).limit(limit + 1).all()
+            # keyset needs the id of the row right before the page; ids are dense here
+            def keyset_page():
+                s.query(EntryORM).filter(EntryORM.id > depth).order_by(EntryORM.id.asc()).limit(limit + 1).all()
+            print(f"{depth:>10} {_timeit(offset_page, args.repeat):>10.2f} {_timeit(keyset_page, args.repeat):>10.2f}")
+
+        def full_count():
+            s.execute(select(func.count(EntryORM.id))).scalar()
+        cached_entry_count(s)  # warm
+        def cached_count():
+            cached_entry_count(s)
+        print(f"{'count':>10} {_timeit(full_count, args.repeat):>10.2f} {_timeit(cached_count, args.repeat):>10.4f} (full vs cached)")
+
+    if not args.keep and not args.db:
+        try:
+            os.remove(db_path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Per-request overhead of the middleware stack: BaseHTTPMiddleware vs raw ASGI.
+
+Usage:
+  python scripts/bench_middleware_stack.py                 # 20000 requests per variant
+  python scripts/bench_middleware_stack.py --requests 50000
+
+Drives each app directly through the ASGI interface (no HTTP server, no TestClient) with
+a trivial GET /ping route:
+  bare       no middleware (baseline)
+  basehttp   the previous stack: metrics, request id, API key, limiter, add_ids as
+             BaseHTTPMiddleware / @app.middleware("http") layers doing the same work
+  asgi       the current raw ASGI middleware classes in the same order
+Overhead = variant us/request - bare us/request.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BB_TESTING", "1")
+
+
+def _build(variant: str):  # type: ignore[no-untyped-def]
+    from fastapi import FastAPI, Request
+    from starlette.middleware.base import BaseHTTPMiddleware
+    from app.core.metrics import http_request_duration_seconds, http_requests_total
+    from app.middleware.api_key_auth import ApiKeyAuthMiddleware
+    from app.middleware.rate_limit import InMemoryRateLimiter
+    from app.middleware.request_id import RequestIDMiddleware
+    from app.middleware.request_metrics import RequestMetricsMiddleware
+    from app.middleware.static_headers import StaticHeadersMiddleware
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping() -> dict[str, bool]:
+        return {"ok": True}
+
+    if variant == "asgi":
+        app.add_middleware(RequestMetricsMiddleware)
+        app.add_middleware(RequestIDMiddleware)
+        limiter = InMemoryRateLimiter
+        app.add_middleware(limiter)
+        app.add_middleware(ApiKeyAuthMiddleware)
+        app.add_middleware(StaticHeadersMiddleware, headers={"x-machine-id": "bench", "x-app-version": "bench"})
+    elif variant == "basehttp":
+        class Metrics(BaseHTTPMiddleware):
+            async def dispatch(self, request: Request, call_next):  # type: ignore[no-untyped-def]
+                start = time.time()
+                response = await call_next(request)
+                http_requests_total.labels(method=request.method, path=request.url.path, status=str(response.status_code)).inc()
+                http_request_duration_seconds.labels(method=request.method, path=request.url.path).observe(time.time() - start)
+                return response
+
+        class RequestID(BaseHTTPMiddleware):
+            async def dispatch(self, request: Request, call_next):  # type: ignore[no-untyped-def]
+                rid = uuid.uuid4().hex
+                request.state.request_id = rid
+                response = await call_next(request)
+                response.headers["X-Request-ID"] = rid
+                return response
+
+        class Limiter(BaseHTTPMiddleware):
+            def __init__(self, app):  # type: ignore[no-untyped-def]
+                super().__init__(app)
+                self.inner = InMemoryRateLimiter(app)
+
+            async def dispatch(self, request: Request, call_next):  # type: ignore[no-untyped-def]
+                rate = self.inner._rate_for(request.url.path)[1]
+                allowed, remaining, _, _ = self.inner.engine.hit(request.client.host if request.client else "unknown", rate)
+                response = await call_next(request)
+                response.headers["X-RateLimit-Remaining"] = str(remaining)
+                return response
+
+        class ApiKey(BaseHTTPMiddleware):
+            async def dispatch(self, request: Request, call_next):  # type: ignore[no-untyped-def]
+                request.headers.get("X-API-Key")
+                return await call_next(request)
+
+        app.add_middleware(Metrics)
+        app.add_middleware(RequestID)
+        app.add_middleware(Limiter)
+        app.add_middleware(ApiKey)
+
+        @app.middleware("http")
+        async def add_ids(request: Request, call_next):  # type: ignore[no-untyped-def]
+            resp = await call_next(request)
+            resp.headers["x-machine-id"] = "bench"
+            resp.headers["x-app-version"] = "bench"
+            return resp
+    return app
+
+
+async def _drive(app, n: int) -> float:  # type: ignore[no-untyped-def]
+    scope_base = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("10.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    never = asyncio.Event()
+
+    def make_receive():  # type: ignore[no-untyped-def]
+        sent = False
+
+        async def receive():  # type: ignore[no-untyped-def]
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await never.wait()  # like a server: block until the client disconnects
+        return receive
+
+    async def send(message):  # type: ignore[no-untyped-def]
+        pass
+
+    for _ in range(200):  # warm up (builds middleware stack)
+        await app(dict(scope_base), make_receive(), send)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope_base), make_receive(), send)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=20000)
+    args = ap.parse_args()
+    from app.core import config
+    config.settings.rate_limit_requests_per_minute = 10**9  # never reject in the benchmark
+    results = {v: asyncio.run(_drive(_build(v), args.requests)) for v in ("bare", "basehttp", "asgi")}
+    print(f"requests={args.requests}")
+    print(f"{'variant':>10} {'us/req':>8} {'overhead us':>12}")
+    for variant, us in results.items():
+        print(f"{variant:>10} {us:>8.1f} {us - results['bare']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
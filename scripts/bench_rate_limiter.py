@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Rate limiter microbenchmark: per-key deque log (old) vs GCRA engine.
+
+Usage:
+  python scripts/bench_rate_limiter.py                  # 1M distinct keys
+  python scripts/bench_rate_limiter.py --keys 200000 --ops 500000
+
+Reports ns/op for one hot key (allowed requests only) and for a stream of distinct keys
+(scanner traffic), plus traced memory of the limiter state once --keys distinct clients
+are live (1 request/hour limit so no key goes idle during the run).
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Callable, Deque, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.gcra import GCRALimiter, Rate  # noqa: E402
+
+
+class DequeLog:
+    """The previous InMemoryRateLimiter bookkeeping, without the HTTP layer."""
+
+    def __init__(self, rate: Rate):
+        self.rate = rate
+        self.buckets: Dict[str, Deque[float]] = defaultdict(deque)
+
+    def hit(self, key: str) -> bool:
+        now = time.time()
+        dq = self.buckets[key]
+        while dq and now - dq[0] > self.rate.period:
+            dq.popleft()
+        if len(dq) >= self.rate.limit:
+            return False
+        dq.append(now)
+        return True
+
+
+def _ns_per_op(fn: Callable[[str], object], keys: list[str]) -> float:
+    gc.collect()
+    t0 = time.perf_counter_ns()
+    for k in keys:
+        fn(k)
+    return (time.perf_counter_ns() - t0) / len(keys)
+
+
+def _state_bytes(fn: Callable[[str], object], keys: list[str]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    for k in keys:
+        fn(k)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keys", type=int, default=1_000_000)
+    ap.add_argument("--ops", type=int, default=1_000_000)
+    args = ap.parse_args()
+    hot_rate = Rate(10**9, 60.0)  # never rejects: measures the admit path
+    live_rate = Rate(1, 3600.0)
+    hot = ["10.0.0.1"] * args.ops
+    distinct = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.keys)]
+
+    engines: list[tuple[str, Callable[[Rate], Callable[[str], object]]]] = [
+        ("deque log", lambda rate: DequeLog(rate).hit),
+    ]
+    for max_keys in (args.keys, 100_000):
+        def make(rate: Rate, max_keys: int = max_keys) -> Callable[[str], object]:
+            eng = GCRALimiter(max_keys=max_keys)
+            return lambda k: eng.hit(k, rate)
+        engines.append((f"gcra<={max_keys // 1000}k", make))
+
+    print(f"keys={args.keys} ops={args.ops}")
+    print(f"{'engine':>12} {'hot ns/op':>10} {'distinct ns/op':>15} {'MiB live':>9} {'B/key':>7}")
+    for label, factory in engines:
+        hot_ns = _ns_per_op(factory(hot_rate), hot)
+        distinct_ns = _ns_per_op(factory(live_rate), distinct)
+        mem = _state_bytes(factory(live_rate), distinct)
+        print(f"{label:>12} {hot_ns:>10.0f} {distinct_ns:>15.0f} {mem / 2**20:>9.1f} {mem / args.keys:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
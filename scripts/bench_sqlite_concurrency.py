@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Writer/reader throughput on one SQLite file: default vs production profile.
+
+Usage:
+  python scripts/bench_sqlite_concurrency.py                      # 4 writers, 8 readers, 5s per profile
+  python scripts/bench_sqlite_concurrency.py --writers 8 --seconds 10
+
+Each writer thread commits single-row INSERTs into jobs (like API + worker), each
+reader runs the worker poll query. Reports committed writes/s, reads/s and how many
+operations failed with "database is locked".
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float) -> dict[str, float]:
+    os.environ["DB_SQLITE_PROFILE"] = profile
+    from app.core.config import reload_settings_for_tests
+    reload_settings_for_tests()
+    from sqlalchemy import select
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+    from app.database.database import Base, _make_engine
+    from app.database.models import JobORM, JobStatus
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bb-sqlite-"), "bench.db")
+    engine = _make_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def bump(key: str) -> None:
+        with lock:
+            counts[key] += 1
+
+    def writer() -> None:
+        while not stop.is_set():
+            try:
+                with Session() as s:
+                    s.add(JobORM(input_text="bench"))
+                    s.commit()
+                bump("writes")
+            except OperationalError:
+                bump("locked")
+
+    def reader() -> None:
+        stmt = select(JobORM.id).where(JobORM.status.in_([JobStatus.pending, JobStatus.failed])).limit(5)
+        while not stop.is_set():
+            try:
+                with Session() as s:
+                    s.execute(stmt).all()
+                bump("reads")
+            except OperationalError:
+                bump("locked")
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return {k: v / seconds for k, v in counts.items()}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+    print(f"writers={args.writers} readers={args.readers} seconds={args.seconds}")
+    print(f"{'profile':>12} {'writes/s':>10} {'reads/s':>10} {'locked/s':>10}")
+    for profile in ("default", "production"):
+        r = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(f"{profile:>12} {r['writes']:>10.1f} {r['reads']:>10.1f} {r['locked']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,11 @@
 from __future__ import annotations
 import time
 import logging
-import hashlib
 import requests
 from sqlalchemy import select
 from app.core.config import settings
-from app.services.webdav_client import load_webdav_config
+from app.services import content_hash_index
+from app.services.webdav_client import get_file_bytes, list_dir_info, load_webdav_config
 from app.database.models import FileORM, JobType
 from app.database.database import get_session
 from app.database.models import JobORM, JobStatus
@@ -33,63 +33,43 @@ def scan_manual_uploads() -> None:
     except Exception as exc:  # pragma: no cover
         logger.warning("manual_scan_config_failed", extra={"error": str(exc)})
         return
-    list_url = f"{base_url.rstrip('/')}/{manual_dir}"
-    # WebDAV PROPFIND could list; simple heuristic: try GET directory listing (depends on server) -> fallback skip
-    # For simplicity we attempt naive file name guesses is out-of-scope; rely on user using flat folder.
-    # We'll attempt to fetch an index: many Nextcloud setups forbid; if so abort silently.
+    # PROPFIND metadata (etag, size, server checksum); file bodies are not downloaded here
     try:
-        resp = requests.request("PROPFIND", list_url, auth=(user, pwd), headers={"Depth":"1"}, timeout=10)
-        if resp.status_code >= 400:
-            return
+        listing = list_dir_info(manual_dir, depth=1)
     except Exception:
         return
-    # Extract hrefs (very naive XML parse)
-    names: list[str] = []
-    for line in resp.text.splitlines():
-        if "<d:href>" in line:
-            # pull out between tags
-            start = line.find('<d:href>') + 8
-            end = line.find('</d:href>')
-            if end > start:
-                href = line[start:end]
-                # Expect path ends with /manual_uploads/<file>
-                if manual_dir + '/' in href and not href.endswith('/'):
-                    candidate = href.split(manual_dir + '/')[1]
-                    if '/' not in candidate and candidate:
-                        names.append(candidate)
-    if not names:
+    key = manual_dir.strip('/')
+    entries = [e for e in listing if not e.is_dir and e.path == f"{key}/{e.name}"]  # flat folder only
+    if not entries:
         return
-    names = list(set(names))
     with get_session() as session:
-        for fname in names:
+        for entry in entries:
+            fname = entry.name
             storage_path = f"{manual_dir}/{fname}"
-            # Fetch file content (text/binary) for hashing and later processing
+            file_url = f"{base_url.rstrip('/')}/{storage_path}"
+            if session.query(FileORM.id).filter(FileORM.storage_path == storage_path).first():
+                continue
+            # Deduplicate by content: checksum / known ETag first, stream-hash only if needed
             try:
-                file_url = f"{base_url.rstrip('/')}/{storage_path}"
-                fresp = requests.get(file_url, auth=(user, pwd), timeout=20)
-                if fresp.status_code == 404:
-                    continue
-                if fresp.status_code >= 400:
-                    logger.warning("manual_fetch_failed", extra={"file": storage_path, "status": fresp.status_code})
-                    continue
-                data = fresp.content
-            except Exception as exc:  # pragma: no cover
-                logger.warning("manual_fetch_exc", extra={"file": storage_path, "error": str(exc)})
+                sha256, size, _ = content_hash_index.remote_sha256(session, entry)
+            except FileNotFoundError:
                 continue
-            sha256 = hashlib.sha256(data).hexdigest()
-            # Deduplicate by sha256 or existing storage path
-            existing = session.query(FileORM).filter((FileORM.sha256 == sha256) | (FileORM.storage_path == storage_path)).first()
-            if existing:
+            except Exception as exc:  # pragma: no cover
+                logger.warning("manual_hash_failed", extra={"file": storage_path, "error": str(exc)})
                 continue
+            known = content_hash_index.lookup(session, sha256)
+            if known is not None and known.file_id is not None:
+                continue  # stored as a file already; rows without a file (auto-ingest) get this one
             f = FileORM(
                 original_name=fname,
                 storage_path=storage_path,
                 mime_type=None,
-                size_bytes=len(data),
+                size_bytes=size,
                 sha256=sha256,
             )
             session.add(f)
             session.flush()
+            content_hash_index.register(session, sha256, f.id, size, etag=entry.etag)
             job = JobORM(job_type=JobType.manual_file, file_id=f.id)
             session.add(job)
             session.flush()
@@ -106,6 +86,7 @@ def scan_manual_uploads() -> None:
             if mv_resp.status_code >= 400:
                 # fallback write new + delete old
                 try:
+                    data = get_file_bytes(storage_path)
                     requests.put(dst_url, auth=(user, pwd), data=data, timeout=20)
                     requests.delete(file_url, auth=(user, pwd), timeout=10)
                 except Exception: